@@ -0,0 +1,74 @@
+"""
+Process-local cache of per-day analytics buckets keyed by (metric, scope, date).
+A closed day is computed once and kept (ANALYTICS_CACHE_PAST_TTL backstop); today and later days
+expire after ANALYTICS_CACHE_TODAY_TTL. Rollup writes call invalidate_day(), which bumps the day's
+version so every cached bucket for that date is skipped from then on, in O(1).
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.catalog_cache import LRUCache
+from core.utils.date_ranges import to_date
+from core.utils.time_series import bucket_starts
+
+_MISS = object()
+
+_buckets = LRUCache(
+    maxsize=getattr(settings, 'ANALYTICS_CACHE_SIZE', 50000),
+    ttl=getattr(settings, 'ANALYTICS_CACHE_PAST_TTL', 86400),
+)
+_day_versions = {}
+_versions_lock = threading.Lock()
+
+
+def _bump(day):
+    with _versions_lock:
+        _day_versions[day] = _day_versions.get(day, 0) + 1
+
+
+def invalidate_day(day):
+    """Drop cached buckets for day now and again once the surrounding transaction commits."""
+    _bump(day)
+    transaction.on_commit(lambda: _bump(day))
+
+
+def clear():
+    with _versions_lock:
+        _day_versions.clear()
+    _buckets.clear()
+
+
+def daily_buckets(metric, scope, date_from, date_to, compute):
+    """
+    Per-day series for date_from..date_to inclusive, like core.utils.time_series.time_series with
+    bucket='day'. Cached days are reused; the missing ones are computed with one compute(first, last)
+    call over their span, which must return such a series for first..last.
+    """
+    days = bucket_starts(date_from, date_to)
+    today = timezone.localdate()
+    today_ttl = getattr(settings, 'ANALYTICS_CACHE_TODAY_TTL', 60)
+    with _versions_lock:
+        versions = {day: _day_versions.get(day, 0) for day in days}
+    found = {}
+    for day in days:
+        point = _buckets.get((metric, scope, day, versions[day]), _MISS)
+        if point is not _MISS:
+            found[day] = point
+    missing = [day for day in days if day not in found]
+    if missing:
+        for point in compute(missing[0], missing[-1]):
+            day = to_date(point['bucket'])
+            if day not in versions:
+                continue
+            found[day] = point
+            _buckets.set((metric, scope, day, versions[day]), point, ttl=today_ttl if day >= today else None)
+    # Callers get copies so adding keys (e.g. running totals) never touches the cached buckets.
+    return [dict(found[day]) for day in days]
+
+
+def cache_stats():
+    """Hit/miss counters (per day bucket) and size of the analytics cache."""
+    return _buckets.stats()
@@ -1,22 +1,23 @@
 """
 ASGI middleware: authenticate WebSocket connections using token from query string.
-Attaches scope["user"] for valid Token; scope["user"] is AnonymousUser if invalid/missing.
+Attaches scope["user"] for a valid Token of an active user (read through core.token_cache);
+scope["user"] is AnonymousUser if invalid/missing.
 """
 import urllib.parse
 from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
+
+from core import token_cache
 
 
 @sync_to_async
 def get_user_from_token(token_key):
     if not token_key or not isinstance(token_key, str):
         return AnonymousUser()
-    try:
-        token = Token.objects.select_related("user").get(key=token_key.strip())
-        return token.user
-    except (Token.DoesNotExist, ValueError):
+    user = token_cache.get_user(token_key.strip())
+    if user is None or not user.is_active:
         return AnonymousUser()
+    return user
 
 
 class TokenAuthMiddleware:
@@ -0,0 +1,21 @@
+"""DRF authentication backed by core.token_cache."""
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication ("Authorization: Token <key>") that reads the user from the token cache."""
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        token = Token(key=key, user_id=user.pk)
+        Token.user.field.set_cached_value(token, user)
+        return (user, token)
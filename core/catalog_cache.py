@@ -0,0 +1,177 @@
+"""
+Process-local cache of game catalog lookups for the callback and launch hot paths.
+game_uid / game id -> immutable GameSnapshot, SuperSetting game-API fields -> SettingsSnapshot.
+Size-bounded LRU with a TTL backstop. core.signals clears it when Game, GameProvider or
+SuperSetting rows change in this process; the TTL bounds staleness in other workers.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+
+GameSnapshot = namedtuple(
+    'GameSnapshot',
+    [
+        'game_id',
+        'game_uid',
+        'is_active',
+        'min_bet',
+        'provider_id',
+        'provider_is_active',
+        'api_endpoint',
+        'api_token',
+        'api_secret',
+    ],
+)
+
+SettingsSnapshot = namedtuple(
+    'SettingsSnapshot',
+    [
+        'game_api_url',
+        'game_api_secret',
+        'game_api_token',
+        'game_api_callback_url',
+        'game_api_domain_url',
+        'game_api_launch_url',
+    ],
+)
+
+_MISS = object()
+
+
+class LRUCache:
+    """Thread-safe size-bounded LRU with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISS):
+        """Cached value for key, or default (_MISS)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store value for ttl seconds (default: the cache's ttl)."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+_games = LRUCache(
+    maxsize=getattr(settings, 'GAME_CATALOG_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'GAME_CATALOG_CACHE_TTL', 300),
+)
+_settings = LRUCache(maxsize=1, ttl=getattr(settings, 'GAME_CATALOG_CACHE_TTL', 300))
+
+
+def snapshot_from_game(game):
+    """GameSnapshot from a Game instance with provider loaded."""
+    provider = game.provider
+    return GameSnapshot(
+        game_id=game.pk,
+        game_uid=game.game_uid,
+        is_active=game.is_active,
+        min_bet=game.min_bet,
+        provider_id=provider.pk,
+        provider_is_active=provider.is_active,
+        api_endpoint=(provider.api_endpoint or '').strip(),
+        api_token=(provider.api_token or '').strip(),
+        api_secret=(provider.api_secret or '').strip(),
+    )
+
+
+def _load_game(key, **lookup):
+    cached = _games.get(key)
+    if cached is not _MISS:
+        return cached
+    from core.models import Game
+    game = Game.objects.filter(**lookup).select_related('provider').order_by('pk').first()
+    if game is None:
+        return None
+    snapshot = snapshot_from_game(game)
+    _games.set(('uid', snapshot.game_uid), snapshot)
+    _games.set(('id', snapshot.game_id), snapshot)
+    return snapshot
+
+
+def get_game_by_uid(game_uid):
+    """GameSnapshot for game_uid (first by id when duplicated), or None. Misses are not cached."""
+    if not game_uid:
+        return None
+    return _load_game(('uid', game_uid), game_uid=game_uid)
+
+
+def get_game_by_id(game_id):
+    """GameSnapshot for Game pk, or None. Misses are not cached."""
+    return _load_game(('id', game_id), pk=game_id)
+
+
+def get_game_settings():
+    """SettingsSnapshot of the single SuperSetting row, or None when none exists."""
+    cached = _settings.get('settings')
+    if cached is not _MISS:
+        return cached
+    from core.models import SuperSetting
+    row = SuperSetting.get_settings()
+    snapshot = None
+    if row is not None:
+        snapshot = SettingsSnapshot(
+            game_api_url=row.game_api_url or '',
+            game_api_secret=row.game_api_secret or '',
+            game_api_token=row.game_api_token or '',
+            game_api_callback_url=row.game_api_callback_url or '',
+            game_api_domain_url=row.game_api_domain_url or '',
+            game_api_launch_url=row.game_api_launch_url or '',
+        )
+    _settings.set('settings', snapshot)
+    return snapshot
+
+
+def invalidate_games():
+    """Drop all game snapshots now and again once the surrounding transaction commits."""
+    _games.clear()
+    transaction.on_commit(_games.clear)
+
+
+def invalidate_settings():
+    """Drop the SuperSetting snapshot now and again once the surrounding transaction commits."""
+    _settings.clear()
+    transaction.on_commit(_settings.clear)
+
+
+def cache_stats():
+    """Hit/miss counters and sizes for both caches."""
+    return {'games': _games.stats(), 'settings': _settings.stats()}
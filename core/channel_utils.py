@@ -1,41 +1,53 @@
-"""Send new message to receiver's WebSocket group (call from sync message_create views)."""
-import logging
+"""
+Send events to WebSocket groups (call from sync views and services). Events go through the
+transactional outbox (core.services.outbox_service): they are sent after the surrounding transaction
+commits, off the request thread, and only if it commits.
+"""
+from decimal import Decimal
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-
-from .consumers import messages_group, session_group
-
-logger = logging.getLogger(__name__)
+from .consumers import balance_group, messages_group, pending_group, session_group
+from .services.outbox_service import enqueue, enqueue_many
 
 
 def broadcast_session_revoked(user_id, current_token_key):
     """Notify all connections for this user that session was revoked (new login elsewhere)."""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        logger.warning(
-            "Channel layer is None; session revoked broadcast skipped. "
-            "Set CHANNEL_LAYERS in settings and use Redis in production when using multiple processes."
-        )
-        return
-    group = session_group(user_id)
-    async_to_sync(channel_layer.group_send)(
-        group,
+    enqueue(
+        session_group(user_id),
         {"type": "session.revoked", "current_token": current_token_key or ""},
     )
 
 
 def broadcast_new_message_to_receiver(receiver_id, message_data):
     """message_data: dict from MessageSerializer(msg).data."""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        logger.warning(
-            "Channel layer is None; real-time message broadcast skipped. "
-            "Set CHANNEL_LAYERS in settings and use Redis in production when using multiple processes."
-        )
-        return
-    group = messages_group(receiver_id)
-    async_to_sync(channel_layer.group_send)(
-        group,
-        {"type": "message.new", "message": message_data},
-    )
+    enqueue(messages_group(receiver_id), {"type": "message.new", "message": message_data})
+
+
+def broadcast_new_messages(messages):
+    """Several broadcast_new_message_to_receiver calls in one INSERT. messages: (receiver_id, message_data)."""
+    enqueue_many([
+        (messages_group(receiver_id), {"type": "message.new", "message": message_data})
+        for receiver_id, message_data in messages
+    ])
+
+
+def broadcast_balances(updates):
+    """
+    Push changed balances to each user's balance socket, one INSERT for all. updates: {user_id: {field: value}}
+    with fields among main_balance, bonus_balance, exposure_balance (Decimal) and rolls_needed (int).
+    """
+    enqueue_many([
+        (balance_group(user_id), {
+            "type": "balance.update",
+            **{field: str(value) if isinstance(value, Decimal) else value for field, value in fields.items()},
+        })
+        for user_id, fields in updates.items()
+        if fields
+    ])
+
+
+def broadcast_pending_counts(counts):
+    """
+    Push new approval-queue counts to each queue's "pending" topic, one INSERT for all.
+    counts: {PendingStat node: {'deposits', 'withdrawals', 'bonus_requests'}}.
+    """
+    enqueue_many([(pending_group(node), {"type": "pending.update", **fields}) for node, fields in counts.items()])
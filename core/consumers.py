@@ -1,9 +1,18 @@
 """
 WebSocket consumer for real-time messages.
 Clients join group messages_user_{user_id}; server sends message.new events to receiver's group.
+Balance sockets join balance_user_{user_id} and get balance.update events (see channel_utils.broadcast_balances);
+a field is only forwarded from an event of a higher version than the last one that carried it.
+Masters, supers and powerhouse can follow their approval queue (pending topic, pending.update events).
+StreamConsumer multiplexes these topics over one connection (see its docstring for the protocol).
 """
 import json
+import urllib.parse
+from collections import namedtuple
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 
@@ -15,6 +24,15 @@ def session_group(user_id):
     return f"session_user_{user_id}"
 
 
+def balance_group(user_id):
+    return f"balance_user_{user_id}"
+
+
+def pending_group(node):
+    """Group of a PendingStat queue (core.services.pending_service; node 0 = the whole platform)."""
+    return f"pending_queue_{node}"
+
+
 class MessageConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope.get("user")
@@ -56,3 +74,197 @@ class SessionConsumer(AsyncWebsocketConsumer):
         """Forward session.revoked to client (current_token = new valid token; others should logout)."""
         current_token = event.get("current_token", "")
         await self.send(text_data=json.dumps({"type": "session.revoked", "current_token": current_token}))
+
+
+@database_sync_to_async
+def _balance_snapshot(user_id):
+    from core.models import User
+    from core.services.withdraw_eligibility import get_withdraw_eligibility
+
+    user = User.objects.select_related('withdraw_eligibility').get(pk=user_id)
+    return {
+        "main_balance": str(user.main_balance),
+        "bonus_balance": str(user.bonus_balance),
+        "exposure_balance": str(user.exposure_balance),
+        "rolls_needed": get_withdraw_eligibility(user)["rolls_needed"],
+    }
+
+
+def _newer_fields(versions, event):
+    """
+    event without the fields an event of a higher version (outbox row id) already delivered, or None
+    when none is left; versions ({field: version}) records the fields it keeps.
+    """
+    version = event.get("version")
+    if version is None:
+        return event
+    fields = {
+        field: value for field, value in event.items()
+        if field not in ("type", "version") and version > versions.get(field, 0)
+    }
+    if not fields:
+        return None
+    versions.update(dict.fromkeys(fields, version))
+    return {"type": event["type"], "version": version, **fields}
+
+
+class BalanceConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket for live balances: balance.snapshot (every field) on connect, then balance.update with
+    the fields that changed after each callback or money movement, so clients need not poll /me.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or isinstance(self.user, AnonymousUser):
+            await self.close(code=4401)
+            return
+        self.group_name = balance_group(self.user.id)
+        self.balance_versions = {}
+        # Join before reading the snapshot so no update committed in between is missed.
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        snapshot = await _balance_snapshot(self.user.id)
+        await self.send(text_data=json.dumps({"type": "balance.snapshot", **snapshot}))
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def balance_update(self, event):
+        """Forward the changed fields not superseded already (called by channel_layer.group_send)."""
+        event = _newer_fields(self.balance_versions, event)
+        if event is not None:
+            await self.send(text_data=json.dumps(event))
+
+
+# A topic of the multiplexed stream: group(user) -> channel-layer group name; roles: UserRole values
+# allowed to subscribe (None = any signed-in user); snapshot: async (user) -> data sent on subscribe,
+# or None.
+Topic = namedtuple('Topic', ['group', 'roles', 'snapshot'])
+
+
+async def _balance_topic_snapshot(user):
+    return {"type": "balance.snapshot", **await _balance_snapshot(user.id)}
+
+
+@database_sync_to_async
+def _pending_counts(user):
+    from core.services.pending_service import pending_counts, queue_node
+
+    return pending_counts(queue_node(user))
+
+
+async def _pending_topic_snapshot(user):
+    return {"type": "pending.snapshot", **await _pending_counts(user)}
+
+
+def _pending_topic_group(user):
+    from core.services.pending_service import queue_node
+
+    return pending_group(queue_node(user))
+
+
+TOPICS = {
+    "messages": Topic(lambda user: messages_group(user.id), None, None),
+    "session": Topic(lambda user: session_group(user.id), None, None),
+    "balance": Topic(lambda user: balance_group(user.id), None, _balance_topic_snapshot),
+    "pending": Topic(_pending_topic_group, ("master", "super", "powerhouse"), _pending_topic_snapshot),
+}
+
+MAX_FRAME_BYTES = 1024
+
+
+class StreamConsumer(AsyncWebsocketConsumer):
+    """
+    One socket for every real-time topic (ws/stream/?token=...&topics=messages,balance).
+    Client frames (JSON): {"op": "subscribe" | "unsubscribe", "topic": name, "id": optional}, {"op": "ping"}.
+    Server frames: {"op": "subscribed" | "unsubscribed", "topic", "id"}, {"op": "event", "topic", "data"}
+    (data: the payload the single-topic socket would send), {"op": "error", "code", "detail", "id"},
+    {"op": "pong"}. ?topics= subscribes on connect. At most WS_MAX_SUBSCRIPTIONS topics per connection;
+    frames over MAX_FRAME_BYTES are refused.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or isinstance(self.user, AnonymousUser):
+            await self.close(code=4401)
+            return
+        self.groups_by_topic = {}
+        self.balance_versions = {}
+        await self.accept()
+        params = urllib.parse.parse_qs(self.scope.get("query_string", b"").decode())
+        for topics in params.get("topics", []):
+            for topic in filter(None, (t.strip() for t in topics.split(","))):
+                await self.subscribe(topic)
+
+    async def disconnect(self, close_code):
+        for group in getattr(self, "groups_by_topic", {}).values():
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if text_data is None or len(text_data) > MAX_FRAME_BYTES:
+            await self.send_frame("error", code="bad_frame", detail=f"Expected a JSON text frame of at most {MAX_FRAME_BYTES} bytes.")
+            return
+        try:
+            frame = json.loads(text_data)
+        except ValueError:
+            frame = None
+        if not isinstance(frame, dict):
+            await self.send_frame("error", code="bad_frame", detail="Expected a JSON object.")
+            return
+        op, topic, frame_id = frame.get("op"), frame.get("topic"), frame.get("id")
+        if op == "subscribe":
+            await self.subscribe(topic, frame_id)
+        elif op == "unsubscribe":
+            await self.unsubscribe(topic, frame_id)
+        elif op == "ping":
+            await self.send_frame("pong", id=frame_id)
+        else:
+            await self.send_frame("error", code="bad_op", detail="op must be subscribe, unsubscribe or ping.", id=frame_id)
+
+    async def send_frame(self, op, **fields):
+        await self.send(text_data=json.dumps({"op": op, **fields}, default=str))
+
+    async def subscribe(self, topic, frame_id=None):
+        spec = TOPICS.get(topic)
+        if spec is None or (spec.roles is not None and self.user.role not in spec.roles):
+            await self.send_frame("error", code="unknown_topic", detail=f"No topic {topic!r} for this user.", id=frame_id)
+            return
+        if topic not in self.groups_by_topic:
+            if len(self.groups_by_topic) >= settings.WS_MAX_SUBSCRIPTIONS:
+                await self.send_frame("error", code="too_many_subscriptions",
+                                      detail=f"At most {settings.WS_MAX_SUBSCRIPTIONS} topics per connection.", id=frame_id)
+                return
+            group = spec.group(self.user)
+            # Join before the snapshot so no event committed in between is missed.
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_by_topic[topic] = group
+        await self.send_frame("subscribed", topic=topic, id=frame_id)
+        if spec.snapshot is not None:
+            await self.send_frame("event", topic=topic, data=await spec.snapshot(self.user))
+
+    async def unsubscribe(self, topic, frame_id=None):
+        group = self.groups_by_topic.pop(topic, None)
+        if group is not None:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        await self.send_frame("unsubscribed", topic=topic, id=frame_id)
+
+    async def forward(self, topic, event):
+        # An event already queued for a group left by unsubscribe is dropped.
+        if topic in self.groups_by_topic:
+            await self.send_frame("event", topic=topic, data=event)
+
+    async def message_new(self, event):
+        await self.forward("messages", event)
+
+    async def session_revoked(self, event):
+        await self.forward("session", event)
+
+    async def balance_update(self, event):
+        event = _newer_fields(self.balance_versions, event)
+        if event is not None:
+            await self.forward("balance", event)
+
+    async def pending_update(self, event):
+        await self.forward("pending", event)
@@ -0,0 +1,265 @@
+"""
+Load-test the game callback endpoint: seed synthetic players/master/game (or replay recorded
+callbacks), drive /api/callback/ through the Django test client from a thread pool, then report
+throughput, latency percentiles, queries per callback and whether final balances are consistent.
+
+Seed users are created one by one with save(), so the post_save handlers give them the upline stamp,
+WithdrawEligibility row, DownlineStat membership and rollup counts that production callbacks update.
+
+Works on any configured database. On SQLite use a file database with
+OPTIONS {'transaction_mode': 'IMMEDIATE'} so writers from other threads wait instead of failing.
+"""
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    User,
+    UserRole,
+    Game,
+    GameProvider,
+    GameCategory,
+    GameCallbackReceipt,
+)
+from core.services.game_callback_service import callback_signature, parse_callback_data
+from core.services.pl_service import get_pl_balance
+
+CALLBACK_URL = "/api/callback/"
+START_BALANCE = Decimal("10000.00")
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _round_payloads(rng, username, game_uid, token, game_round, balance):
+    """Provider two-callback round (bet, result) plus round-end ack. Returns (payloads, delta)."""
+    bet = Decimal(rng.randint(1, 50))
+    win = Decimal(rng.choice([0, 0, rng.randint(1, 100)]))
+    after_bet = balance - bet
+    after_win = after_bet + win
+    base = {"mobile": username, "game_uid": game_uid, "token": token, "game_round": game_round}
+    payloads = [
+        dict(base, bet_amount=str(bet), win_amount="0", change=str(-bet),
+             wallet_before=str(balance), wallet_after=str(after_bet)),
+        dict(base, bet_amount="0", win_amount=str(win), change=str(win),
+             wallet_before=str(after_bet), wallet_after=str(after_win)),
+        dict(base, bet_amount="0", win_amount="0", change="0",
+             wallet_before=str(after_win), wallet_after=str(after_win)),
+    ]
+    return payloads, win - bet
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/callback/: seed synthetic players and replay two-callback rounds at a given concurrency "
+        "(or replay recorded callbacks with --replay). Reports req/s, p50/p95/p99 latency, queries per callback "
+        "and checks final balances."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=20, help="Synthetic players to seed (default 20).")
+        parser.add_argument("--rounds", type=int, default=25, help="Rounds per player (default 25).")
+        parser.add_argument("--concurrency", type=int, default=4, help="Worker threads (default 4).")
+        parser.add_argument(
+            "--duplicate-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of callbacks sent twice, as a provider retry would (default 0).",
+        )
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for generated rounds.")
+        parser.add_argument(
+            "--replay",
+            type=str,
+            default=None,
+            help="JSON file (array or one object per line) of recorded callback payloads to replay instead.",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows after the run.")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        if connection.vendor == "sqlite":
+            mode = (connection.settings_dict.get("OPTIONS") or {}).get("transaction_mode")
+            if mode != "IMMEDIATE":
+                self.stdout.write(self.style.WARNING(
+                    "SQLite without transaction_mode=IMMEDIATE: writes from concurrent callbacks or other threads "
+                    "may fail with 'database is locked'."
+                ))
+        if options["replay"]:
+            self._run_replay(options["replay"], concurrency)
+        else:
+            self._run_synthetic(options, concurrency)
+
+    # --- Synthetic ---
+
+    def _seed(self, prefix, players):
+        master = User.objects.create(username=f"{prefix}m", role=UserRole.MASTER)
+        for i in range(players):
+            User.objects.create(
+                username=f"{prefix}p{i}", role=UserRole.PLAYER, parent=master, main_balance=START_BALANCE,
+            )
+        category = GameCategory.objects.create(name=f"{prefix}cat")
+        provider = GameProvider.objects.create(name=f"{prefix}prov", code=f"{prefix}prov", api_token=prefix)
+        game = Game.objects.create(provider=provider, category=category, name=f"{prefix}game", game_uid=f"{prefix}game")
+        return master, category, provider, game
+
+    def _run_synthetic(self, options, concurrency):
+        prefix = f"bench{uuid.uuid4().hex[:8]}_"
+        rng = random.Random(options["seed"])
+        master, category, provider, game = self._seed(prefix, options["players"])
+        try:
+            sequences = {}
+            expected = {}
+            for i in range(options["players"]):
+                username = f"{prefix}p{i}"
+                balance = START_BALANCE
+                payloads = []
+                for r in range(options["rounds"]):
+                    round_payloads, delta = _round_payloads(rng, username, game.game_uid, prefix, f"{prefix}r{r}", balance)
+                    for payload in round_payloads:
+                        payloads.append(payload)
+                        if rng.random() < options["duplicate_rate"]:
+                            payloads.append(payload)
+                    balance += delta
+                sequences[username] = payloads
+                expected[username] = balance
+
+            samples = self._drive(sequences, concurrency)
+
+            actual = dict(
+                User.objects.filter(username__startswith=prefix, role=UserRole.PLAYER)
+                .values_list("username", "main_balance")
+            )
+            mismatched = [u for u in expected if actual.get(u) != expected[u]]
+            expected_pl = -sum(expected[u] - START_BALANCE for u in expected)
+            master_pl = get_pl_balance(master)
+            self._report(samples)
+            self._check(
+                mismatched,
+                len(expected),
+                master_pl == expected_pl,
+                f"master P/L {master_pl} (expected {expected_pl})",
+            )
+        finally:
+            if not options["keep"]:
+                User.objects.filter(username__startswith=prefix).delete()
+                game.delete()
+                provider.delete()
+                category.delete()
+
+    # --- Replay ---
+
+    def _load_replay(self, path):
+        with open(path) as fh:
+            text = fh.read().strip()
+        if text.startswith("["):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def _run_replay(self, path, concurrency):
+        try:
+            payloads = self._load_replay(path)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read replay file: {exc}")
+        sequences = {}
+        for payload in payloads:
+            sequences.setdefault(str(payload.get("mobile") or payload.get("user_id") or ""), []).append(payload)
+        users = {u.username: u for u in User.objects.filter(username__in=list(sequences))}
+        before = {username: user.main_balance for username, user in users.items()}
+        settled = set(
+            GameCallbackReceipt.objects.filter(user__in=list(users.values()))
+            .values_list("user__username", "round", "signature")
+        )
+
+        samples = self._drive(sequences, concurrency)
+
+        # Expected delta: each distinct (user, round, signature) answered 200 and not settled before the run.
+        expected = dict(before)
+        seen = set()
+        for payload, status_code in ((s["payload"], s["status"]) for s in samples):
+            fields, error = parse_callback_data(payload)
+            username = str(fields["mobile"] or "").strip() if fields else ""
+            if error or status_code != 200 or username not in expected:
+                continue
+            key = (username, fields["game_round"], callback_signature(fields))
+            if key in seen or key in settled:
+                continue
+            seen.add(key)
+            expected[username] += fields["wallet_after"] - fields["wallet_before"]
+        actual = dict(User.objects.filter(username__in=list(users)).values_list("username", "main_balance"))
+        mismatched = [u for u in expected if actual.get(u) != expected[u]]
+        self._report(samples)
+        self._check(mismatched, len(expected))
+
+    # --- Driver / report ---
+
+    def _drive(self, sequences, concurrency):
+        """Send each player's callbacks in order; players run concurrently. Returns one sample per request."""
+        def run(payloads):
+            client = Client(raise_request_exception=False)
+            out = []
+            try:
+                for payload in payloads:
+                    with CaptureQueriesContext(connections["default"]) as ctx:
+                        started = time.perf_counter()
+                        response = client.post(CALLBACK_URL, payload, content_type="application/json")
+                        elapsed = time.perf_counter() - started
+                    out.append({
+                        "payload": payload,
+                        "status": response.status_code,
+                        "seconds": elapsed,
+                        "queries": len(ctx.captured_queries),
+                    })
+            finally:
+                connections.close_all()
+            return out
+
+        self._started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(run, sequences.values()))
+        self._elapsed = time.perf_counter() - self._started
+        return [sample for chunk in results for sample in chunk]
+
+    def _report(self, samples):
+        latencies = sorted(s["seconds"] * 1000 for s in samples)
+        queries = [s["queries"] for s in samples]
+        errors = sum(1 for s in samples if s["status"] != 200)
+        total = len(samples)
+        self.stdout.write(f"Requests:        {total} ({errors} non-200)")
+        self.stdout.write(f"Elapsed:         {self._elapsed:.2f}s")
+        self.stdout.write(f"Throughput:      {total / self._elapsed if self._elapsed else 0:.1f} req/s")
+        self.stdout.write(
+            f"Latency (ms):    p50 {_percentile(latencies, 50):.2f}  p95 {_percentile(latencies, 95):.2f}  "
+            f"p99 {_percentile(latencies, 99):.2f}  max {latencies[-1] if latencies else 0:.2f}"
+        )
+        self.stdout.write(
+            f"Queries/request: avg {sum(queries) / total if total else 0:.2f}  max {max(queries) if queries else 0}"
+        )
+
+    def _check(self, mismatched, player_count, pl_ok=True, pl_message=None):
+        if mismatched:
+            self.stdout.write(self.style.ERROR(
+                f"Balances:        {len(mismatched)}/{player_count} players inconsistent (e.g. {mismatched[:5]})"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Balances:        {player_count} players consistent"))
+        if pl_message is None:
+            pass
+        elif pl_ok:
+            self.stdout.write(self.style.SUCCESS(f"P/L:             {pl_message}"))
+        else:
+            self.stdout.write(self.style.ERROR(f"P/L:             {pl_message}"))
+        if mismatched or not pl_ok:
+            raise CommandError("Final balances are inconsistent.")
@@ -0,0 +1,37 @@
+"""Fold pending PLDelta journal rows into master pl_balance (run from cron, or with --interval as a worker)."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.pl_service import COMPACT_BATCH_SIZE, compact_pl_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold pending master P/L journal rows (PLDelta) into User.pl_balance. "
+        "Runs once by default; with --interval N keeps running, compacting every N seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="If provided, loop forever and compact every N seconds.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=COMPACT_BATCH_SIZE,
+            help=f"Journal rows folded per transaction (default {COMPACT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        batch_size = options["batch_size"]
+        while True:
+            folded = compact_pl_deltas(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Folded {folded} P/L delta(s)."))
+            if not interval:
+                return
+            time.sleep(interval)
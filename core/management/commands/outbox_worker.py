@@ -0,0 +1,37 @@
+"""Send due OutboxEvent rows to the channel layer (run from cron, or with --interval as a worker)."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.outbox_service import OUTBOX_BATCH_SIZE, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Send WebSocket events waiting in the outbox (left behind by a stopped process or due for a retry). "
+        "Runs once by default; with --interval N keeps running, sending every N seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="If provided, loop forever and send due events every N seconds.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help=f"Events sent per transaction (default {OUTBOX_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        batch_size = options["batch_size"]
+        while True:
+            sent = dispatch_pending(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} outbox event(s)."))
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,32 @@
+"""Recompute the per-super / per-master downline totals (DownlineStat) from User and PLDelta."""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User, UserRole
+from core.services.downline_service import rebuild_downline_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DownlineStat (downline counts and balance totals) from User balances and pending PLDelta rows. "
+        "Use after deploying the table (backfill) or to repair drift; defaults to every super and master."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", action="append", default=None, metavar="USERNAME",
+            help="Rebuild only this super / master (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        node_ids = None
+        if options["user"]:
+            users = dict(
+                User.objects.filter(username__in=options["user"], role__in=[UserRole.SUPER, UserRole.MASTER])
+                .values_list("username", "pk")
+            )
+            missing = sorted(set(options["user"]) - set(users))
+            if missing:
+                raise CommandError(f"Not a super or master: {', '.join(missing)}")
+            node_ids = list(users.values())
+        written = rebuild_downline_stats(node_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} downline stat row(s)."))
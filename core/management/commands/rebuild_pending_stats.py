@@ -0,0 +1,32 @@
+"""Recompute the approval-queue counters (PendingStat) from the pending Deposit / Withdraw / BonusRequest rows."""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User, UserRole
+from core.services.pending_service import rebuild_pending_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild PendingStat (pending deposit, withdrawal and bonus request counts per queue) from the requests. "
+        "Use after deploying the table (backfill) or to repair drift; defaults to the platform and every super and master."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", action="append", default=None, metavar="USERNAME",
+            help="Rebuild only this super / master's queue (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        node_ids = None
+        if options["user"]:
+            users = dict(
+                User.objects.filter(username__in=options["user"], role__in=[UserRole.SUPER, UserRole.MASTER])
+                .values_list("username", "pk")
+            )
+            missing = sorted(set(options["user"]) - set(users))
+            if missing:
+                raise CommandError(f"Not a super or master: {', '.join(missing)}")
+            node_ids = list(users.values())
+        written = rebuild_pending_stats(node_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} pending stat row(s)."))
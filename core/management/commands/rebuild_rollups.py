@@ -0,0 +1,34 @@
+"""Recompute the daily analytics rollups (DailyStat, DailyGameStat, DailyUserStat) from the raw tables."""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.rollup_service import rebuild_rollups
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}' (expected YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild daily analytics rollups from GameLog, Deposit, Withdraw, ActivityLog, Transaction and User. "
+        "Use after deploying the rollup tables (backfill) or to repair a date range; defaults to all dates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=str, default=None, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--date-to", type=str, default=None, help="Last day to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        date_from = _parse_date(options["date_from"]) if options["date_from"] else None
+        date_to = _parse_date(options["date_to"]) if options["date_to"] else None
+        if date_from and date_to and date_from > date_to:
+            raise CommandError("--date-from must not be after --date-to.")
+        counts = rebuild_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(
+            "Rebuilt {daily_stats} daily, {daily_game_stats} game and {daily_user_stats} user rollup row(s).".format(**counts)
+        ))
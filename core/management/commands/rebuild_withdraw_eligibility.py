@@ -0,0 +1,45 @@
+"""Recompute (or check) the per-player withdraw eligibility counters from GameLog, Deposit and BonusRequest."""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User, UserRole
+from core.services.withdraw_eligibility import check_withdraw_eligibility, rebuild_withdraw_eligibility
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild WithdrawEligibility (games played, first deposit, bonus roll targets) and BonusRequest.roll_base. "
+        "Use after deploying the table (backfill) or to repair drift; defaults to every player. "
+        "With --check, only report rows that differ from a recomputation (exit status 1 if any)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", action="append", default=None, metavar="USERNAME",
+            help="Only this player (repeatable).",
+        )
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Compare instead of rebuilding.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["user"]:
+            users = dict(
+                User.objects.filter(username__in=options["user"], role=UserRole.PLAYER).values_list("username", "pk")
+            )
+            missing = sorted(set(options["user"]) - set(users))
+            if missing:
+                raise CommandError(f"Not a player: {', '.join(missing)}")
+            user_ids = list(users.values())
+        if options["check"]:
+            drift = 0
+            for user_id, field, stored, expected in check_withdraw_eligibility(user_ids):
+                drift += 1
+                self.stdout.write(f"user {user_id}: {field} is {stored}, expected {expected}")
+            if drift:
+                raise CommandError(f"{drift} withdraw eligibility value(s) out of date; run without --check to rebuild.")
+            self.stdout.write(self.style.SUCCESS("Withdraw eligibility is consistent."))
+            return
+        written = rebuild_withdraw_eligibility(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} withdraw eligibility row(s)."))
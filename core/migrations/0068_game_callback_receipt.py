@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0067_deposit_suppress_first_deposit_bonus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameCallbackReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.CharField(max_length=255)),
+                ('signature', models.CharField(max_length=64)),
+                ('response_status', models.PositiveSmallIntegerField(default=200)),
+                ('response_body', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='callback_receipts', to='core.gamelog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_callback_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Game Callback Receipt',
+                'verbose_name_plural': 'Game Callback Receipts',
+                'constraints': [models.UniqueConstraint(fields=('round', 'signature', 'user'), name='unique_game_callback_receipt')],
+            },
+        ),
+    ]
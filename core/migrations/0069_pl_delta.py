@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0068_game_callback_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PLDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pl_deltas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'P/L Delta',
+                'verbose_name_plural': 'P/L Deltas',
+            },
+        ),
+    ]
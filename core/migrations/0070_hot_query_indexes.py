@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:49
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0069_pl_delta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['created_at'], name='activity_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['status', 'created_at'], name='deposit_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['user', 'created_at'], name='deposit_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['user', 'status', 'processed_at'], name='deposit_user_status_proc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(django.db.models.functions.text.Lower('reference_id'), name='deposit_ref_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamelog',
+            index=models.Index(fields=['user', 'round'], name='gamelog_user_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamelog',
+            index=models.Index(fields=['user', 'created_at'], name='gamelog_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamelog',
+            index=models.Index(fields=['created_at'], name='gamelog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', 'is_read', 'sender'], name='message_recv_read_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'created_at'], name='tx_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at'], name='tx_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'created_at'], name='tx_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone'], name='user_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'created_at'], name='user_role_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['parent', 'role'], name='user_parent_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdraw',
+            index=models.Index(fields=['status', 'created_at'], name='withdraw_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdraw',
+            index=models.Index(fields=['user', 'created_at'], name='withdraw_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdraw',
+            index=models.Index(django.db.models.functions.text.Lower('reference_id'), name='withdraw_ref_lower_idx'),
+        ),
+    ]
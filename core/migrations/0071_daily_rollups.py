@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:53
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0070_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new_players', models.PositiveIntegerField(default=0)),
+                ('deposit_count', models.IntegerField(default=0)),
+                ('deposit_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('withdraw_count', models.IntegerField(default=0)),
+                ('withdraw_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('bonus_count', models.IntegerField(default=0)),
+                ('bonus_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+            ],
+            options={
+                'verbose_name': 'Daily Stat',
+                'verbose_name_plural': 'Daily Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyGameStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bet_count', models.IntegerField(default=0)),
+                ('bet_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('win_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('lose_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.game')),
+                ('master', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='downline_daily_game_stats', to=settings.AUTH_USER_MODEL)),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.gameprovider')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_game_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Game Stat',
+                'verbose_name_plural': 'Daily Game Stats',
+                'indexes': [models.Index(fields=['user', 'date'], name='dgs_user_date_idx'), models.Index(fields=['master', 'date'], name='dgs_master_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user', 'game'), name='unique_daily_game_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('deposit_count', models.IntegerField(default=0)),
+                ('deposit_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('withdraw_count', models.IntegerField(default=0)),
+                ('withdraw_amount', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('login_count', models.IntegerField(default=0)),
+                ('activity_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily User Stat',
+                'verbose_name_plural': 'Daily User Stats',
+                'indexes': [models.Index(fields=['user', 'date'], name='dus_user_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='unique_daily_user_stat')],
+            },
+        ),
+    ]
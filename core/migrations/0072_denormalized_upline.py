@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:00
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+
+CHUNK = 1000
+
+
+def backfill_upline(apps, schema_editor):
+    """Stamp master/super on users (top-down from parent) and copy them onto GameLog / Transaction rows."""
+    User = apps.get_model("core", "User")
+    GameLog = apps.get_model("core", "GameLog")
+    Transaction = apps.get_model("core", "Transaction")
+    nodes = {pk: (role, parent_id) for pk, role, parent_id in User.objects.values_list("pk", "role", "parent_id")}
+    upline = {}
+
+    def resolve(pk, depth=0):
+        if pk is None or depth > 10:
+            return (None, None)
+        if pk not in upline:
+            role, parent_id = nodes.get(pk, (None, None))
+            parent_master, parent_super = resolve(parent_id, depth + 1)
+            upline[pk] = (
+                pk if role == "master" else parent_master,
+                pk if role == "super" else parent_super,
+            )
+        return upline[pk]
+
+    groups = defaultdict(list)
+    for pk in nodes:
+        groups[resolve(pk)].append(pk)
+    for (master_id, super_id), pks in groups.items():
+        if master_id is None and super_id is None:
+            continue
+        for start in range(0, len(pks), CHUNK):
+            chunk = pks[start:start + CHUNK]
+            User.objects.filter(pk__in=chunk).update(master_id=master_id, super_id=super_id)
+            GameLog.objects.filter(user_id__in=chunk).update(master_id=master_id, super_id=super_id)
+            Transaction.objects.filter(user_id__in=chunk).update(master_id=master_id, super_id=super_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0071_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamelog',
+            name='master',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='gamelog',
+            name='super',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='master',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='super',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='master',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='master_downline', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='super',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='super_downline', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='gamelog',
+            index=models.Index(fields=['master', 'created_at'], name='gamelog_master_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamelog',
+            index=models.Index(fields=['super', 'created_at'], name='gamelog_super_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['master', 'created_at'], name='tx_master_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['super', 'created_at'], name='tx_super_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['master', 'role'], name='user_master_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['super', 'role'], name='user_super_role_idx'),
+        ),
+        migrations.RunPython(backfill_upline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0072_denormalized_upline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DownlineStat',
+            fields=[
+                ('node', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='downline_stat', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('masters_count', models.IntegerField(default=0)),
+                ('masters_main_balance', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('masters_bonus_balance', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('masters_pl_balance', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('players_count', models.IntegerField(default=0)),
+                ('players_main_balance', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+                ('players_bonus_balance', models.DecimalField(decimal_places=2, default=core.models.default_decimal_zero, max_digits=18)),
+            ],
+            options={
+                'verbose_name': 'Downline Stat',
+                'verbose_name_plural': 'Downline Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_downline_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WithdrawEligibility',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='withdraw_eligibility', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('first_deposit_at', models.DateTimeField(blank=True, null=True)),
+                ('games_at_first_deposit', models.PositiveIntegerField(default=0)),
+                ('approved_bonuses', models.PositiveIntegerField(default=0)),
+                ('bonus_games_target', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Withdraw Eligibility',
+                'verbose_name_plural': 'Withdraw Eligibility',
+            },
+        ),
+        migrations.AddField(
+            model_name='bonusrequest',
+            name='roll_base',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0075_outbox_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingStat',
+            fields=[
+                ('node_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('deposits', models.IntegerField(default=0)),
+                ('withdrawals', models.IntegerField(default=0)),
+                ('bonus_requests', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Pending Stat',
+                'verbose_name_plural': 'Pending Stats',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -210,6 +211,24 @@ class User(AbstractUser):
         blank=True,
         related_name='children'
     )
+    # Denormalized upline (core.services.hierarchy_service): the nearest master / super at or above
+    # this user, the user itself included, so downline filters are a single indexed equality.
+    master = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='master_downline'
+    )
+    super = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='super_downline'
+    )
     commission_percentage = models.DecimalField(
         max_digits=5,
         decimal_places=2,
@@ -259,6 +278,13 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(fields=['phone'], name='user_phone_idx'),
+            models.Index(fields=['role', 'created_at'], name='user_role_created_idx'),
+            models.Index(fields=['parent', 'role'], name='user_parent_role_idx'),
+            models.Index(fields=['master', 'role'], name='user_master_role_idx'),
+            models.Index(fields=['super', 'role'], name='user_super_role_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # Exposure Logic #1: new user gets default exposure_limit from SuperSetting
@@ -378,6 +404,12 @@ class Deposit(models.Model):
     class Meta:
         verbose_name = 'Deposit'
         verbose_name_plural = 'Deposits'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='deposit_status_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='deposit_user_created_idx'),
+            models.Index(fields=['user', 'status', 'processed_at'], name='deposit_user_status_proc_idx'),
+            models.Index(Lower('reference_id'), name='deposit_ref_lower_idx'),
+        ]
 
     def __str__(self):
         return f"Deposit #{self.pk} - {self.user} - {self.amount} ({self.status})"
@@ -437,6 +469,11 @@ class Withdraw(models.Model):
     class Meta:
         verbose_name = 'Withdraw'
         verbose_name_plural = 'Withdrawals'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='withdraw_status_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='withdraw_user_created_idx'),
+            models.Index(Lower('reference_id'), name='withdraw_ref_lower_idx'),
+        ]
 
     def __str__(self):
         return f"Withdraw #{self.pk} - {self.user} - {self.amount} ({self.status})"
@@ -478,6 +515,8 @@ class BonusRequest(models.Model):
     )
     processed_at = models.DateTimeField(null=True, blank=True)
     remarks = models.TextField(blank=True)
+    # Player's game count when approved; roll progress is games played since (see WithdrawEligibility).
+    roll_base = models.PositiveIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -618,6 +657,23 @@ class GameLog(models.Model):
         on_delete=models.CASCADE,
         related_name='game_logs'
     )
+    # Copied from the user's denormalized upline on create (see User.master / User.super).
+    master = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    super = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
     game = models.ForeignKey(
         Game,
         on_delete=models.CASCADE,
@@ -647,11 +703,85 @@ class GameLog(models.Model):
     class Meta:
         verbose_name = 'Bet History'
         verbose_name_plural = 'Bet History'
+        indexes = [
+            models.Index(fields=['user', 'round'], name='gamelog_user_round_idx'),
+            models.Index(fields=['user', 'created_at'], name='gamelog_user_created_idx'),
+            models.Index(fields=['created_at'], name='gamelog_created_idx'),
+            models.Index(fields=['master', 'created_at'], name='gamelog_master_created_idx'),
+            models.Index(fields=['super', 'created_at'], name='gamelog_super_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.user_id and self.master_id is None and self.super_id is None:
+            self.master_id, self.super_id = self.user.master_id, self.user.super_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user} - {self.game} - {self.get_type_display()} ({self.created_at})"
 
 
+# --- 10b. GameCallbackReceipt (provider callback idempotency) ---
+
+class GameCallbackReceipt(models.Model):
+    """
+    One row per settled provider callback. signature = sha256 of (bet, win, wallet_before,
+    wallet_after); a retried callback matches its receipt and is answered with the stored
+    response without touching balances.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='game_callback_receipts'
+    )
+    round = models.CharField(max_length=255)
+    signature = models.CharField(max_length=64)
+    game_log = models.ForeignKey(
+        GameLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='callback_receipts'
+    )
+    response_status = models.PositiveSmallIntegerField(default=200)
+    response_body = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Game Callback Receipt'
+        verbose_name_plural = 'Game Callback Receipts'
+        constraints = [
+            # (round, signature) leads so the pre-lock retry lookup is an index prefix scan.
+            models.UniqueConstraint(fields=['round', 'signature', 'user'], name='unique_game_callback_receipt'),
+        ]
+
+    def __str__(self):
+        return f"Receipt {self.user_id} / {self.round} ({self.signature[:8]})"
+
+
+# --- 10c. PLDelta (write-behind master P/L journal) ---
+
+class PLDelta(models.Model):
+    """
+    Append-only journal of master P/L changes. The game callback inserts a row instead of
+    updating the (hot) master row; compact_pl_deltas folds rows into User.pl_balance.
+    Exact P/L = pl_balance + pending rows (see core.services.pl_service).
+    """
+    master = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pl_deltas'
+    )
+    amount = models.DecimalField(max_digits=16, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'P/L Delta'
+        verbose_name_plural = 'P/L Deltas'
+
+    def __str__(self):
+        return f"P/L delta {self.master_id}: {self.amount}"
+
+
 # --- 11. Transaction ---
 
 class Transaction(models.Model):
@@ -665,6 +795,23 @@ class Transaction(models.Model):
         on_delete=models.CASCADE,
         related_name='transactions'
     )
+    # Copied from the user's denormalized upline on create (see User.master / User.super).
+    master = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    super = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
     action_type = models.CharField(max_length=10, choices=TransactionActionType.choices)
     wallet = models.CharField(max_length=20, choices=TransactionWallet.choices)
     transaction_type = models.CharField(max_length=20, choices=TransactionType.choices)
@@ -722,6 +869,18 @@ class Transaction(models.Model):
     class Meta:
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='tx_user_created_idx'),
+            models.Index(fields=['created_at'], name='tx_created_idx'),
+            models.Index(fields=['transaction_type', 'created_at'], name='tx_type_created_idx'),
+            models.Index(fields=['master', 'created_at'], name='tx_master_created_idx'),
+            models.Index(fields=['super', 'created_at'], name='tx_super_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.user_id and self.master_id is None and self.super_id is None:
+            self.master_id, self.super_id = self.user.master_id, self.user.super_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user} - {self.get_transaction_type_display()} - {self.amount} ({self.status})"
@@ -756,11 +915,214 @@ class ActivityLog(models.Model):
     class Meta:
         verbose_name = 'Activity Log'
         verbose_name_plural = 'Activity Logs'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.get_action_display()} ({self.created_at})"
 
 
+# --- 12b. Daily analytics rollups (maintained by core.services.rollup_service) ---
+
+class DailyStat(models.Model):
+    """Platform totals per calendar day (current time zone) for deposits, withdrawals, bonus and signups."""
+    date = models.DateField(unique=True)
+    new_players = models.PositiveIntegerField(default=0)
+    deposit_count = models.IntegerField(default=0)
+    deposit_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    withdraw_count = models.IntegerField(default=0)
+    withdraw_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    bonus_count = models.IntegerField(default=0)
+    bonus_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+
+    class Meta:
+        verbose_name = 'Daily Stat'
+        verbose_name_plural = 'Daily Stats'
+
+    def __str__(self):
+        return f"Daily stat {self.date}"
+
+
+class DailyGameStat(models.Model):
+    """GameLog totals per day, player and game; provider and master are copied from the log / player."""
+    date = models.DateField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_game_stats'
+    )
+    game = models.ForeignKey(
+        Game,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    provider = models.ForeignKey(
+        GameProvider,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    master = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='downline_daily_game_stats'
+    )
+    bet_count = models.IntegerField(default=0)
+    bet_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    win_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    lose_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+
+    class Meta:
+        verbose_name = 'Daily Game Stat'
+        verbose_name_plural = 'Daily Game Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user', 'game'], name='unique_daily_game_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='dgs_user_date_idx'),
+            models.Index(fields=['master', 'date'], name='dgs_master_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.user_id} game {self.game_id}"
+
+
+class DailyUserStat(models.Model):
+    """Approved deposits/withdrawals and activity per day and user."""
+    date = models.DateField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    deposit_count = models.IntegerField(default=0)
+    deposit_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    withdraw_count = models.IntegerField(default=0)
+    withdraw_amount = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    login_count = models.IntegerField(default=0)
+    activity_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily User Stat'
+        verbose_name_plural = 'Daily User Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='unique_daily_user_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='dus_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.user_id}"
+
+
+# --- 12c. DownlineStat (per-node downline totals, maintained by core.services.downline_service) ---
+
+class DownlineStat(models.Model):
+    """
+    Running totals for one super or master: counts and summed balances of the masters directly
+    under it and of every player below it. Updated in the same transaction as each balance change.
+    """
+    node = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='downline_stat'
+    )
+    masters_count = models.IntegerField(default=0)
+    masters_main_balance = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    masters_bonus_balance = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    masters_pl_balance = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    players_count = models.IntegerField(default=0)
+    players_main_balance = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+    players_bonus_balance = models.DecimalField(max_digits=18, decimal_places=2, default=default_decimal_zero)
+
+    class Meta:
+        verbose_name = 'Downline Stat'
+        verbose_name_plural = 'Downline Stats'
+
+    def __str__(self):
+        return f"Downline of {self.node_id}"
+
+
+# --- 12d. WithdrawEligibility (per-player withdraw state, maintained by core.services.withdraw_eligibility) ---
+
+class WithdrawEligibility(models.Model):
+    """
+    Counters behind a player's withdraw eligibility, so a check is one row read: games played so far,
+    the count when the first deposit was approved, and the game count every approved bonus needs
+    (max of BonusRequest.roll_base + roll_required).
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='withdraw_eligibility'
+    )
+    games_played = models.PositiveIntegerField(default=0)
+    first_deposit_at = models.DateTimeField(null=True, blank=True)
+    games_at_first_deposit = models.PositiveIntegerField(default=0)
+    approved_bonuses = models.PositiveIntegerField(default=0)
+    bonus_games_target = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Withdraw Eligibility'
+        verbose_name_plural = 'Withdraw Eligibility'
+
+    def __str__(self):
+        return f"Withdraw eligibility of {self.user_id}"
+
+
+# --- 12e. OutboxEvent (channel-layer events waiting to be sent, see core.services.outbox_service) ---
+
+class OutboxEvent(models.Model):
+    """
+    A WebSocket group_send written in the same transaction as the change it announces and sent after
+    commit. Rows are deleted once sent; failed sends stay with a later next_attempt_at.
+    """
+    group = models.CharField(max_length=100)
+    event = models.JSONField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='outbox_next_attempt_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event.get('type')} -> {self.group}"
+
+
+# --- 12f. PendingStat (approval-queue counters, maintained by core.services.pending_service) ---
+
+class PendingStat(models.Model):
+    """
+    Pending Deposit / Withdraw / BonusRequest counts of one approval queue: a master's (its players'
+    requests), a super's (its masters' and players') or, negative node_ids, one shard of the whole
+    platform's (powerhouse; see core.services.pending_service).
+    Updated in the same transaction as each request that enters or leaves the pending state.
+    """
+    node_id = models.BigIntegerField(primary_key=True)
+    deposits = models.IntegerField(default=0)
+    withdrawals = models.IntegerField(default=0)
+    bonus_requests = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Pending Stat'
+        verbose_name_plural = 'Pending Stats'
+
+    def __str__(self):
+        return f"Pending queue of {self.node_id if self.node_id > 0 else 'platform'}"
+
+
 # --- 13. Message ---
 
 class Message(models.Model):
@@ -784,6 +1146,9 @@ class Message(models.Model):
     class Meta:
         verbose_name = 'Message'
         verbose_name_plural = 'Messages'
+        indexes = [
+            models.Index(fields=['receiver', 'is_read', 'sender'], name='message_recv_read_sender_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.receiver} ({self.created_at})"
@@ -1,21 +1,40 @@
 """
 Notify player of approval events (deposit, withdrawal, bonus) via Message and real-time broadcast.
 """
+from django.db import transaction
+
 from core.models import Message
 from core.serializers import MessageSerializer
-from core.channel_utils import broadcast_new_message_to_receiver
+from core.channel_utils import broadcast_new_message_to_receiver, broadcast_new_messages
 
 
-def notify_player_approval(user, processed_by, message_text):
+def notify_player_approval(user, processed_by, message_text, batch=None):
     """
     Create a Message from processed_by to user and broadcast to the receiver's WebSocket group.
     Call only when user.role == UserRole.PLAYER so the player sees it in their Messages.
+    batch: a list to collect (user, message_text) into instead; send it with notify_player_approvals.
     """
-    msg = Message.objects.create(
-        sender=processed_by,
-        receiver=user,
-        message=message_text,
-        is_read=False,
-    )
-    data = MessageSerializer(msg).data
-    broadcast_new_message_to_receiver(user.id, data)
+    if batch is not None:
+        batch.append((user, message_text))
+        return
+    with transaction.atomic():
+        msg = Message.objects.create(
+            sender=processed_by,
+            receiver=user,
+            message=message_text,
+            is_read=False,
+        )
+        data = MessageSerializer(msg).data
+        broadcast_new_message_to_receiver(user.id, data)
+
+
+def notify_player_approvals(processed_by, batch):
+    """notify_player_approval for every (user, message_text) in batch, broadcast in one go."""
+    if not batch:
+        return
+    with transaction.atomic():
+        messages = [
+            Message.objects.create(sender=processed_by, receiver=user, message=text, is_read=False)
+            for user, text in batch
+        ]
+        broadcast_new_messages([(msg.receiver_id, MessageSerializer(msg).data) for msg in messages])
@@ -30,16 +30,13 @@ def get_users_queryset_for_role(user):
     - powerhouse: all users (filter by role for supers, masters, players)
     - super: all masters (children) and all players under those masters
     - master: only direct children (players)
+    Downlines use the denormalized User.super / User.master (see core.services.hierarchy_service).
     """
-    from django.db.models import Q
     if user.role == UserRole.POWERHOUSE:
         return User.objects.all()
     if user.role == UserRole.SUPER:
         # Masters that are direct children + players under those masters
-        return User.objects.filter(
-            Q(parent=user, role=UserRole.MASTER) |
-            Q(parent__parent=user, role=UserRole.PLAYER)
-        )
+        return User.objects.filter(super=user, role__in=[UserRole.MASTER, UserRole.PLAYER])
     if user.role == UserRole.MASTER:
         return User.objects.filter(parent=user, role=UserRole.PLAYER)
     return User.objects.none()
@@ -66,7 +63,7 @@ def get_players_queryset(user):
     if user.role == UserRole.POWERHOUSE:
         return User.objects.filter(role=UserRole.PLAYER)
     if user.role == UserRole.SUPER:
-        return User.objects.filter(parent__parent=user, role=UserRole.PLAYER)
+        return User.objects.filter(super=user, role=UserRole.PLAYER)
     if user.role == UserRole.MASTER:
         return User.objects.filter(parent=user, role=UserRole.PLAYER)
     return User.objects.none()
@@ -4,4 +4,6 @@ from . import consumers
 websocket_urlpatterns = [
     re_path(r"^/?ws/messages/$", consumers.MessageConsumer.as_asgi()),
     re_path(r"^/?ws/session/$", consumers.SessionConsumer.as_asgi()),
+    re_path(r"^/?ws/balance/$", consumers.BalanceConsumer.as_asgi()),
+    re_path(r"^/?ws/stream/$", consumers.StreamConsumer.as_asgi()),
 ]
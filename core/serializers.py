@@ -35,6 +35,9 @@ from .models import (
     PaymentMethod,
 )
 from .services.withdraw_eligibility import get_withdraw_eligibility
+from .services.balance_summary_service import header_balances
+from .services.downline_service import downline_stat, record_balance_change
+from .services.pl_service import get_pl_balance
 from .services.reference_id_validation import validate_reference_id_unique
 from django.core.exceptions import ValidationError as DjangoValidationError
 
@@ -72,9 +75,21 @@ class RegisterSerializer(serializers.Serializer):
 
 
 # --- User ---
+class PLBalanceField(serializers.DecimalField):
+    """Read-only pl_balance including pending PLDelta rows (see core.services.pl_service)."""
+
+    def __init__(self, **kwargs):
+        kwargs.update(max_digits=16, decimal_places=2, read_only=True, source='*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return super().to_representation(get_pl_balance(obj))
+
+
 class UserMinimalSerializer(serializers.ModelSerializer):
     """For list views and nested relations."""
     role_display = serializers.CharField(source='get_role_display', read_only=True)
+    pl_balance = PLBalanceField()
 
     class Meta:
         model = User
@@ -102,6 +117,7 @@ class UserListSerializer(serializers.ModelSerializer):
     parent_username = serializers.SerializerMethodField()
     no_activity_7_days = serializers.SerializerMethodField()
     masters_balance = serializers.SerializerMethodField()
+    pl_balance = PLBalanceField()
     masters_pl_balance = serializers.SerializerMethodField()
     users_balance = serializers.SerializerMethodField()
     players_count = serializers.SerializerMethodField()
@@ -125,8 +141,11 @@ class UserListSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_default(self, obj):
-        settings = SuperSetting.get_settings()
-        return settings is not None and settings.default_master_id == obj.id
+        # Read once per serializer (the list child is shared by every row).
+        if not hasattr(self, '_default_master_id'):
+            settings = SuperSetting.get_settings()
+            self._default_master_id = settings.default_master_id if settings is not None else None
+        return self._default_master_id is not None and self._default_master_id == obj.id
 
     def get_no_activity_7_days(self, obj):
         if obj.role != UserRole.PLAYER:
@@ -148,38 +167,36 @@ class UserListSerializer(serializers.ModelSerializer):
             return obj.parent.username if obj.parent else None
         return None
 
+    def _downline(self, obj):
+        """Maintained totals (core.services.downline_service); views select_related('downline_stat')."""
+        return downline_stat(obj)
+
     def get_masters_balance(self, obj):
         if obj.role == UserRole.SUPER:
-            return sum(c.main_balance for c in obj.children.filter(role=UserRole.MASTER))
+            return self._downline(obj).masters_main_balance
         return None
 
     def get_masters_pl_balance(self, obj):
         if obj.role == UserRole.SUPER:
-            return sum(c.pl_balance for c in obj.children.filter(role=UserRole.MASTER))
+            return self._downline(obj).masters_pl_balance
         return None
 
     def get_users_balance(self, obj):
         if obj.role == UserRole.MASTER:
-            return sum(
-                (u.main_balance or 0) for u in obj.children.filter(role=UserRole.PLAYER)
-            )
+            return self._downline(obj).players_main_balance
         if obj.role == UserRole.SUPER:
-            total = sum((m.main_balance or 0) for m in obj.children.filter(role=UserRole.MASTER))
-            for m in obj.children.filter(role=UserRole.MASTER):
-                total += sum((p.main_balance or 0) for p in m.children.filter(role=UserRole.PLAYER))
-            return total
+            stat = self._downline(obj)
+            return stat.masters_main_balance + stat.players_main_balance
         return None
 
     def get_players_count(self, obj):
-        if obj.role == UserRole.MASTER:
-            return obj.children.filter(role=UserRole.PLAYER).count()
-        if obj.role == UserRole.SUPER:
-            return User.objects.filter(parent__parent=obj, role=UserRole.PLAYER).count()
+        if obj.role in (UserRole.MASTER, UserRole.SUPER):
+            return self._downline(obj).players_count
         return None
 
     def get_masters_count(self, obj):
         if obj.role == UserRole.SUPER:
-            return obj.children.filter(role=UserRole.MASTER).count()
+            return self._downline(obj).masters_count
         return None
 
     def get_total_balance(self, obj):
@@ -208,6 +225,7 @@ class UserListSerializer(serializers.ModelSerializer):
 
 class UserDetailSerializer(serializers.ModelSerializer):
     role_display = serializers.CharField(source='get_role_display', read_only=True)
+    pl_balance = PLBalanceField()
 
     class Meta:
         model = User
@@ -251,9 +269,17 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password', None)
         if password:
             instance.set_password(password)
+        before = (instance.master_id, instance.super_id, instance.main_balance or 0, instance.bonus_balance or 0)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
+        # A move rebuilds the upline's DownlineStats from the saved row; otherwise apply the edit.
+        if (instance.master_id, instance.super_id) == before[:2]:
+            record_balance_change(
+                instance,
+                main=(instance.main_balance or 0) - before[2],
+                bonus=(instance.bonus_balance or 0) - before[3],
+            )
         return instance
 
 
@@ -262,6 +288,7 @@ class MeSerializer(serializers.ModelSerializer):
     role_display = serializers.CharField(source='get_role_display', read_only=True)
     # Header balances by role (computed or same fields)
     main_balance = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    pl_balance = PLBalanceField()
     super_balance = serializers.SerializerMethodField()
     master_balance = serializers.SerializerMethodField()
     player_balance = serializers.SerializerMethodField()
@@ -308,38 +335,27 @@ class MeSerializer(serializers.ModelSerializer):
         sym = Country.objects.filter(country_code=code, is_active=True).values_list('currency_symbol', flat=True).first()
         return sym or '₹'
 
+    def _header_balances(self, obj):
+        # One lookup per serialized user; see core.services.balance_summary_service.
+        cached = getattr(self, '_balances', None)
+        if cached is None or cached[0] != obj.pk:
+            cached = self._balances = (obj.pk, header_balances(obj))
+        return cached[1]
+
     def get_super_balance(self, obj):
-        if obj.role == UserRole.POWERHOUSE:
-            return sum(c.main_balance for c in User.objects.filter(role=UserRole.SUPER, parent=obj))
-        return None
+        return self._header_balances(obj)['super_balance']
 
     def get_master_balance(self, obj):
-        if obj.role == UserRole.POWERHOUSE:
-            return sum(c.main_balance for c in User.objects.filter(role=UserRole.MASTER))
-        if obj.role == UserRole.SUPER:
-            return sum(c.main_balance for c in obj.children.filter(role=UserRole.MASTER))
-        return None
+        return self._header_balances(obj)['master_balance']
 
     def get_player_balance(self, obj):
-        if obj.role == UserRole.POWERHOUSE:
-            return sum(c.main_balance for c in User.objects.filter(role=UserRole.PLAYER))
-        if obj.role in (UserRole.SUPER, UserRole.MASTER):
-            qs = User.objects.filter(role=UserRole.PLAYER)
-            if obj.role == UserRole.MASTER:
-                qs = qs.filter(parent=obj)
-            else:
-                qs = qs.filter(parent__parent=obj)
-            return sum(c.main_balance for c in qs)
-        return None
+        return self._header_balances(obj)['player_balance']
 
     def get_total_balance(self, obj):
         if obj.role == UserRole.PLAYER:
             return (obj.main_balance or 0) + (obj.bonus_balance or 0)
         main = obj.main_balance or 0
-        sb = self.get_super_balance(obj) or 0
-        mb = self.get_master_balance(obj) or 0
-        pb = self.get_player_balance(obj) or 0
-        return main + sb + mb + pb
+        return main + sum(value or 0 for value in self._header_balances(obj).values())
 
 
 # --- SuperSetting ---
@@ -732,7 +748,7 @@ class BonusRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = BonusRequest
-        fields = '__all__'
+        exclude = ['roll_base']
 
     def get_bonus_rule_name(self, obj):
         return obj.bonus_rule.name if obj.bonus_rule else None
@@ -832,7 +848,7 @@ class GameLogSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = GameLog
-        fields = '__all__'
+        exclude = ['master', 'super']
 
     def get_effective_bet_amount(self, obj):
         if obj.bet_amount and obj.bet_amount > 0:
@@ -851,7 +867,7 @@ class TransactionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Transaction
-        fields = '__all__'
+        exclude = ['master', 'super']
 
 
 # --- ActivityLog ---
@@ -2,6 +2,7 @@
 from django.utils import timezone
 
 from core.models import ActivityLog
+from core.services.rollup_service import record_activity
 
 
 def create_activity_log(user, action, request=None, game=None, remarks=""):
@@ -13,7 +14,7 @@ def create_activity_log(user, action, request=None, game=None, remarks=""):
         ip = request.META.get("REMOTE_ADDR")
         ua = request.META.get("HTTP_USER_AGENT") or ""
         device = ua[:255]
-    ActivityLog.objects.create(
+    activity_log = ActivityLog.objects.create(
         user=user,
         action=action,
         game=game,
@@ -23,3 +24,4 @@ def create_activity_log(user, action, request=None, game=None, remarks=""):
         ip=ip,
         device=device,
     )
+    record_activity(activity_log)
@@ -0,0 +1,71 @@
+"""
+Balance totals for the /me header and the powerhouse dashboard without loading user rows.
+Platform-wide totals are one conditional aggregate over User, cached per process for
+BALANCE_SUMMARY_TTL seconds (the admin UI polls /me); a super's or master's downline totals are
+read from its DownlineStat row (core.services.downline_service), which is always current.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from core.catalog_cache import LRUCache
+from core.models import User, UserRole
+from core.services.downline_service import downline_stat
+
+ZERO = Decimal('0')
+
+_ROLES = (UserRole.SUPER, UserRole.MASTER, UserRole.PLAYER)
+
+_totals = LRUCache(maxsize=256, ttl=getattr(settings, 'BALANCE_SUMMARY_TTL', 5))
+
+
+def clear():
+    _totals.clear()
+
+
+def platform_totals():
+    """{'super_count', 'super_main_balance', 'master_...', 'player_...'} over all users; one query."""
+    totals = _totals.get('platform', None)
+    if totals is None:
+        aggregates = {}
+        for role in _ROLES:
+            aggregates[f'{role}_count'] = Count('id', filter=Q(role=role))
+            aggregates[f'{role}_main_balance'] = Coalesce(Sum('main_balance', filter=Q(role=role)), ZERO)
+        totals = User.objects.aggregate(**aggregates)
+        _totals.set('platform', totals)
+    return totals
+
+
+def supers_main_balance(powerhouse):
+    """Summed main balance of the supers directly under powerhouse."""
+    key = ('supers', powerhouse.pk)
+    total = _totals.get(key, None)
+    if total is None:
+        total = User.objects.filter(role=UserRole.SUPER, parent=powerhouse).aggregate(
+            total=Coalesce(Sum('main_balance'), ZERO),
+        )['total']
+        _totals.set(key, total)
+    return total
+
+
+def header_balances(user):
+    """
+    {'super_balance', 'master_balance', 'player_balance'} shown in user's header; None where the
+    role has no such level below it.
+    """
+    balances = {'super_balance': None, 'master_balance': None, 'player_balance': None}
+    if user.role == UserRole.POWERHOUSE:
+        totals = platform_totals()
+        balances.update(
+            super_balance=supers_main_balance(user),
+            master_balance=totals['master_main_balance'],
+            player_balance=totals['player_main_balance'],
+        )
+    elif user.role == UserRole.SUPER:
+        stat = downline_stat(user)
+        balances.update(master_balance=stat.masters_main_balance, player_balance=stat.players_main_balance)
+    elif user.role == UserRole.MASTER:
+        balances['player_balance'] = downline_stat(user).players_main_balance
+    return balances
@@ -1,84 +1,47 @@
 """
 Bonus request approval: parent main_balance deducted, user bonus_balance added.
-Dual transactions. Powerhouse approving Super: only add to Super's bonus_balance.
+Dual transactions, posted through ledger_service. Powerhouse approving Super: only add to Super's bonus_balance.
 """
-from decimal import Decimal
-from django.utils import timezone
+from django.db import transaction
 
 from core.models import (
     UserRole,
-    Transaction,
-    TransactionActionType,
     TransactionWallet,
     TransactionType,
-    TransactionStatus,
 )
 from core.notification_utils import notify_player_approval
+from core.services.ledger_service import InsufficientBalance, Leg, approve_pending, post_legs
+from core.services.withdraw_eligibility import record_bonus_approved
 
 
-def approve_bonus_request(bonus_request, processed_by, pin=None, use_password=False):
+def approve_bonus_request(bonus_request, processed_by, pin=None, use_password=False, locked=None, notifications=None):
     """
     Approve a bonus request. For powerhouse->super: only add to super's bonus_balance.
     For others: deduct parent main_balance, add to user bonus_balance.
+    locked / notifications: held user locks and a notification batch (see bulk_approval_service).
     Returns (True, None) or (False, error_message).
     """
     user = bonus_request.user
     amount = bonus_request.amount
+    remarks = f'Bonus request #{bonus_request.pk} approved'
     if user.role == UserRole.SUPER and processed_by.role == UserRole.POWERHOUSE:
-        user.bonus_balance = (user.bonus_balance or Decimal('0')) + amount
-        user.save(update_fields=['bonus_balance'])
-        bonus_request.status = 'approved'
-        bonus_request.processed_by = processed_by
-        bonus_request.processed_at = timezone.now()
-        bonus_request.save(update_fields=['status', 'processed_by', 'processed_at'])
-        Transaction.objects.create(
-            user=user,
-            action_type=TransactionActionType.IN,
-            wallet=TransactionWallet.BONUS_BALANCE,
-            transaction_type=TransactionType.BONUS,
-            amount=amount,
-            status=TransactionStatus.SUCCESS,
-            remarks=f'Bonus request #{bonus_request.pk} approved',
-            processed_by=processed_by,
-        )
-        if user.role == UserRole.PLAYER:
-            notify_player_approval(user, processed_by, f'Your bonus request of ₹{amount} has been approved.')
-        return True, None
-    parent = user.parent
-    if not parent:
-        return False, 'User has no parent'
-    if (parent.main_balance or Decimal('0')) < amount:
+        legs = [Leg(user, TransactionWallet.BONUS_BALANCE, amount, remarks=remarks)]
+    else:
+        parent = user.parent
+        if not parent:
+            return False, 'User has no parent'
+        legs = [
+            Leg(parent, TransactionWallet.MAIN_BALANCE, -amount, user, f'Bonus request #{bonus_request.pk} for {user.username}'),
+            Leg(user, TransactionWallet.BONUS_BALANCE, amount, parent, remarks),
+        ]
+    try:
+        with transaction.atomic():
+            if not approve_pending(bonus_request, processed_by):
+                return False, 'Bonus request is not pending'
+            post_legs(legs, TransactionType.BONUS, processed_by=processed_by, locked=locked)
+            record_bonus_approved(bonus_request)
+    except InsufficientBalance:
         return False, 'Parent has insufficient balance'
-    parent.main_balance = (parent.main_balance or Decimal('0')) - amount
-    parent.save(update_fields=['main_balance'])
-    user.bonus_balance = (user.bonus_balance or Decimal('0')) + amount
-    user.save(update_fields=['bonus_balance'])
-    bonus_request.status = 'approved'
-    bonus_request.processed_by = processed_by
-    bonus_request.processed_at = timezone.now()
-    bonus_request.save(update_fields=['status', 'processed_by', 'processed_at'])
-    Transaction.objects.create(
-        user=parent,
-        action_type=TransactionActionType.OUT,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        to_user=user,
-        remarks=f'Bonus request #{bonus_request.pk} for {user.username}',
-        processed_by=processed_by,
-    )
-    Transaction.objects.create(
-        user=user,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.BONUS_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=parent,
-        remarks=f'Bonus request #{bonus_request.pk} approved',
-        processed_by=processed_by,
-    )
     if user.role == UserRole.PLAYER:
-        notify_player_approval(user, processed_by, f'Your bonus request of ₹{amount} has been approved.')
+        notify_player_approval(user, processed_by, f'Your bonus request of ₹{amount} has been approved.', batch=notifications)
     return True, None
@@ -1,19 +1,13 @@
 """
 Bonus application: welcome, first deposit, referral.
 """
-from decimal import Decimal
-from django.utils import timezone
-
 from core.models import (
-    User,
     BonusRule,
     BonusType,
-    Transaction,
-    TransactionActionType,
     TransactionWallet,
     TransactionType,
-    TransactionStatus,
 )
+from core.services.ledger_service import InsufficientBalance, Leg, post_legs
 
 
 def apply_welcome_bonus(user):
@@ -35,35 +29,16 @@ def apply_welcome_bonus(user):
     amount = rule.reward_amount
     if amount <= 0:
         return False, 'Invalid reward amount'
-    if (parent.main_balance or Decimal('0')) < amount:
+    try:
+        post_legs(
+            [
+                Leg(parent, TransactionWallet.MAIN_BALANCE, -amount, user, f'Welcome bonus for {user.username}'),
+                Leg(user, TransactionWallet.BONUS_BALANCE, amount, parent, 'Welcome bonus'),
+            ],
+            TransactionType.BONUS,
+        )
+    except InsufficientBalance:
         return False, 'Parent has insufficient balance'
-    # Deduct from parent main_balance
-    parent.main_balance = (parent.main_balance or Decimal('0')) - amount
-    parent.save(update_fields=['main_balance'])
-    # Add to user bonus_balance
-    user.bonus_balance = (user.bonus_balance or Decimal('0')) + amount
-    user.save(update_fields=['bonus_balance'])
-    # Transactions
-    Transaction.objects.create(
-        user=parent,
-        action_type=TransactionActionType.OUT,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        to_user=user,
-        remarks=f'Welcome bonus for {user.username}',
-    )
-    Transaction.objects.create(
-        user=user,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.BONUS_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=parent,
-        remarks='Welcome bonus',
-    )
     return True, amount
 
 
@@ -85,30 +60,16 @@ def apply_referral_bonus(referrer, referred_user):
     if amount <= 0:
         return False, 'Invalid reward amount'
     parent = referrer.parent
-    if (parent.main_balance or Decimal('0')) < amount:
+    try:
+        post_legs(
+            [
+                Leg(parent, TransactionWallet.MAIN_BALANCE, -amount, referrer,
+                    f'Referral bonus for inviting {referred_user.username}'),
+                Leg(referrer, TransactionWallet.BONUS_BALANCE, amount, parent,
+                    f'Referral bonus for {referred_user.username}'),
+            ],
+            TransactionType.BONUS,
+        )
+    except InsufficientBalance:
         return False, 'Parent has insufficient balance for referral bonus'
-    parent.main_balance = (parent.main_balance or Decimal('0')) - amount
-    parent.save(update_fields=['main_balance'])
-    referrer.bonus_balance = (referrer.bonus_balance or Decimal('0')) + amount
-    referrer.save(update_fields=['bonus_balance'])
-    Transaction.objects.create(
-        user=parent,
-        action_type=TransactionActionType.OUT,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        to_user=referrer,
-        remarks=f'Referral bonus for inviting {referred_user.username}',
-    )
-    Transaction.objects.create(
-        user=referrer,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.BONUS_BALANCE,
-        transaction_type=TransactionType.BONUS,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=parent,
-        remarks=f'Referral bonus for {referred_user.username}',
-    )
     return True, amount
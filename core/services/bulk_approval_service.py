@@ -0,0 +1,91 @@
+"""
+Bulk approve / reject of pending Deposit, Withdraw and BonusRequest rows (month-end queues).
+approve_many locks every affected user (the requesters and their parents) once, then approves each
+request with the single-item service in its own savepoint of one transaction, so a failing item
+(insufficient balance, no longer pending) leaves the others approved. Player notifications are
+collected and sent in one batch after the commit. reject_many is one UPDATE (and one counter upsert).
+Each item gets a result: {"id", "ok", "detail"} (detail: the error, None on success), in request order.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import BonusRequest, Deposit, Withdraw, WithdrawEligibility
+from core.notification_utils import notify_player_approvals
+from core.services.bonus_request_service import approve_bonus_request
+from core.services.deposit_service import approve_deposit
+from core.services import pending_service
+from core.services.ledger_service import lock_users
+from core.services.withdraw_service import approve_withdraw
+
+MAX_BULK_ITEMS = 500
+
+NOT_FOUND = 'Not found or not pending.'
+
+_APPROVERS = {
+    Deposit: approve_deposit,
+    Withdraw: approve_withdraw,
+    BonusRequest: approve_bonus_request,
+}
+
+
+def parse_ids(data):
+    """Distinct request ids from data['ids'] (order kept); raises ValidationError."""
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError({'ids': 'Expected a non-empty list of ids.'})
+    if len(ids) > MAX_BULK_ITEMS:
+        raise ValidationError({'ids': f'At most {MAX_BULK_ITEMS} ids per request.'})
+    try:
+        return list(dict.fromkeys(int(pk) for pk in ids))
+    except (TypeError, ValueError):
+        raise ValidationError({'ids': 'Ids must be integers.'})
+
+
+def approve_many(queryset, ids, processed_by):
+    """Approve the pending rows of queryset (already scoped to what processed_by may approve) with these ids."""
+    approve = _APPROVERS[queryset.model]
+    pending = queryset.filter(pk__in=ids, status='pending').select_related('user__parent').in_bulk()
+    notifications = []
+    results = []
+    with transaction.atomic():
+        locked = lock_users(
+            pk for obj in pending.values() for pk in (obj.user_id, obj.user.parent_id) if pk
+        )
+        if queryset.model is Withdraw:
+            # Eligibility state read under the locks, in one query, for approve_withdraw's re-check.
+            for state in WithdrawEligibility.objects.filter(user_id__in=locked):
+                locked[state.user_id].withdraw_eligibility = state
+        for pk in ids:
+            obj = pending.get(pk)
+            if obj is None:
+                results.append({'id': pk, 'ok': False, 'detail': NOT_FOUND})
+                continue
+            ok, msg = approve(obj, processed_by, locked=locked, notifications=notifications)
+            results.append({'id': pk, 'ok': ok, 'detail': msg})
+    notify_player_approvals(processed_by, notifications)
+    return results
+
+
+def reject_many(queryset, ids, processed_by, reject_reason=''):
+    """Reject the pending rows of queryset with these ids."""
+    with transaction.atomic():
+        rows = (
+            queryset.select_for_update(of=('self',)).filter(pk__in=ids, status='pending').order_by()
+            .values_list('pk', 'user_id', 'user__master_id', 'user__super_id')
+        )
+        uplines = {pk: upline for pk, *upline in rows}
+        pending = set(uplines)
+        queryset.model.objects.filter(pk__in=pending).update(
+            status='rejected', reject_reason=reject_reason, processed_by=processed_by, processed_at=timezone.now(),
+        )
+        pending_service.record_changes(queryset.model, uplines.values(), -1)
+    return [
+        {'id': pk, 'ok': pk in pending, 'detail': None if pk in pending else NOT_FOUND}
+        for pk in ids
+    ]
+
+
+def summary(results, done_key):
+    """Response body: the per-item results plus how many succeeded under done_key ('approved' / 'rejected')."""
+    return {'results': results, done_key: sum(1 for r in results if r['ok'])}
@@ -5,6 +5,9 @@ Protected (never deleted here): Game, GameCategory, GameProvider — ignored if
 
 SuperSetting / SiteSetting: delete all rows then recreate a single row with model defaults so code
 that calls .first() or get_settings() still finds one instance.
+
+Daily analytics rollups and withdraw eligibility counters are rebuilt afterwards when any table
+they are derived from was cleaned.
 """
 import logging
 from decimal import Decimal
@@ -40,12 +43,20 @@ from core.models import (
     UserRole,
     Withdraw,
 )
+from core.services.rollup_service import rebuild_rollups
+from core.services.withdraw_eligibility import rebuild_withdraw_eligibility
 
 logger = logging.getLogger(__name__)
 
 # Server-side ignore (defense in depth; also omitted from GET catalog).
 PROTECTED_KEYS = frozenset({"game", "game_category", "game_provider"})
 
+# Keys whose tables feed DailyStat / DailyGameStat / DailyUserStat.
+ROLLUP_SOURCE_KEYS = frozenset({"transaction", "game_log", "activity_log", "deposit", "withdraw", "user"})
+
+# Keys whose tables feed WithdrawEligibility.
+ELIGIBILITY_SOURCE_KEYS = frozenset({"game_log", "deposit", "bonus_request", "bonus_rule"})
+
 # Execution order: dependents before parents / PROTECT targets.
 DELETION_ORDER = [
     "transaction",
@@ -176,6 +187,10 @@ def execute_clean(selected_keys: list[str], powerhouse_user_id: int) -> dict[str
                 if fn:
                     r = fn()
                     deleted_counts[key] = _count_tuple(r)
+        if keys_set & ROLLUP_SOURCE_KEYS:
+            rebuild_rollups()
+        if keys_set & ELIGIBILITY_SOURCE_KEYS:
+            rebuild_withdraw_eligibility()
 
     logger.info(
         "clean_data executed user_id=%s models=%s counts=%s",
@@ -1,28 +1,28 @@
 """
 Deposit approval: parent main_balance deducted, user main_balance added.
-Dual transactions. Powerhouse: only adjust super balance (no parent deduction).
+Dual transactions, posted through ledger_service. Powerhouse: only adjust super balance (no parent deduction).
 First-deposit bonus: if player's first approved deposit and an applicable deposit
 bonus rule exists, credit bonus to user's bonus_balance and create BONUS transaction.
 """
 from decimal import Decimal
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
 
 from core.models import (
-    User,
     UserRole,
     Deposit,
-    Transaction,
-    TransactionActionType,
     TransactionWallet,
     TransactionType,
-    TransactionStatus,
     BonusRule,
     BonusRequest,
     BonusType,
     RewardType,
 )
 from core.notification_utils import notify_player_approval
+from core.services import withdraw_eligibility
+from core.services.ledger_service import InsufficientBalance, Leg, approve_pending, post_legs
+from core.services.rollup_service import record_deposit_approved
 
 
 def _deposit_ref(deposit):
@@ -48,127 +48,80 @@ def get_applicable_deposit_bonus_rule():
     )
 
 
-def approve_deposit(deposit, processed_by, pin=None, use_password=False):
+def approve_deposit(deposit, processed_by, pin=None, use_password=False, locked=None, notifications=None):
     """
     Approve a deposit. For powerhouse->super: only add to super. For others: deduct parent, add to user.
+    locked / notifications: held user locks and a notification batch (see bulk_approval_service).
     Returns (True, None) or (False, error_message).
     """
     user = deposit.user
     amount = deposit.amount
+    ref = _deposit_ref(deposit)
     if user.role == UserRole.SUPER and processed_by.role == UserRole.POWERHOUSE:
-        user.main_balance = (user.main_balance or Decimal('0')) + amount
-        user.save(update_fields=['main_balance'])
-        deposit.status = 'approved'
-        deposit.processed_by = processed_by
-        deposit.processed_at = timezone.now()
-        deposit.save(update_fields=['status', 'processed_by', 'processed_at'])
-        ref = _deposit_ref(deposit)
-        Transaction.objects.create(
-            user=user,
-            action_type=TransactionActionType.IN,
-            wallet=TransactionWallet.MAIN_BALANCE,
-            transaction_type=TransactionType.DEPOSIT,
-            amount=amount,
-            status=TransactionStatus.SUCCESS,
-            remarks=f'Deposit #{deposit.pk} approved',
-            reference_id=ref,
-            processed_by=processed_by,
-        )
-        if user.role == UserRole.PLAYER:
-            notify_player_approval(user, processed_by, f'Your deposit of ₹{amount} has been approved.')
-        return True, None
-    parent = user.parent
-    if not parent:
-        return False, 'User has no parent'
-    if (parent.main_balance or Decimal('0')) < amount:
+        legs = [Leg(user, TransactionWallet.MAIN_BALANCE, amount, remarks=f'Deposit #{deposit.pk} approved')]
+        parent = None
+    else:
+        parent = user.parent
+        if not parent:
+            return False, 'User has no parent'
+        legs = [
+            Leg(parent, TransactionWallet.MAIN_BALANCE, -amount, user, f'Deposit #{deposit.pk} for {user.username}'),
+            Leg(user, TransactionWallet.MAIN_BALANCE, amount, parent, f'Deposit #{deposit.pk} approved'),
+        ]
+    try:
+        with transaction.atomic():
+            if not approve_pending(deposit, processed_by):
+                return False, 'Deposit is not pending'
+            post_legs(legs, TransactionType.DEPOSIT, processed_by=processed_by, reference_id=ref, locked=locked)
+            record_deposit_approved(deposit)
+            withdraw_eligibility.record_deposit_approved(deposit)
+    except InsufficientBalance:
         return False, 'Parent has insufficient balance'
-    parent.main_balance = (parent.main_balance or Decimal('0')) - amount
-    parent.save(update_fields=['main_balance'])
-    user.main_balance = (user.main_balance or Decimal('0')) + amount
-    user.save(update_fields=['main_balance'])
-    deposit.status = 'approved'
-    deposit.processed_by = processed_by
-    deposit.processed_at = timezone.now()
-    deposit.save(update_fields=['status', 'processed_by', 'processed_at'])
-    ref = _deposit_ref(deposit)
-    Transaction.objects.create(
-        user=parent,
-        action_type=TransactionActionType.OUT,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.DEPOSIT,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        to_user=user,
-        remarks=f'Deposit #{deposit.pk} for {user.username}',
-        reference_id=ref,
-        processed_by=processed_by,
-    )
-    Transaction.objects.create(
-        user=user,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.DEPOSIT,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=parent,
-        remarks=f'Deposit #{deposit.pk} approved',
-        reference_id=ref,
-        processed_by=processed_by,
-    )
     if user.role == UserRole.PLAYER:
-        notify_player_approval(user, processed_by, f'Your deposit of ₹{amount} has been approved.')
+        notify_player_approval(user, processed_by, f'Your deposit of ₹{amount} has been approved.', batch=notifications)
         # First-deposit bonus: player-requested deposits only (not staff-initiated)
-        if deposit.suppress_first_deposit_bonus:
-            return True, None
-        # First-deposit bonus: if this is the user's first approved deposit and a rule applies, credit bonus
-        approved_count = Deposit.objects.filter(user=user, status='approved').count()
-        if approved_count == 1:
-            rule = get_applicable_deposit_bonus_rule()
-            if rule:
-                if rule.reward_type == RewardType.FLAT:
-                    bonus_amount = rule.reward_amount
-                else:
-                    bonus_amount = (deposit.amount * rule.reward_amount / 100).quantize(Decimal('0.01'))
-                if bonus_amount > 0:
-                    parent_balance = parent.main_balance or Decimal('0')
-                    if parent_balance < bonus_amount:
-                        return False, f'Parent master has insufficient balance for first deposit bonus (need {bonus_amount}, have {parent_balance}).'
-                    BonusRequest.objects.create(
-                        user=user,
-                        amount=bonus_amount,
-                        bonus_type=BonusType.DEPOSIT,
-                        bonus_rule=rule,
-                        status='approved',
-                        processed_by=processed_by,
-                        processed_at=timezone.now(),
-                        remarks=f'First deposit bonus (Deposit #{deposit.pk})',
-                    )
-                    parent.main_balance = parent_balance - bonus_amount
-                    parent.save(update_fields=['main_balance'])
-                    user.bonus_balance = (user.bonus_balance or Decimal('0')) + bonus_amount
-                    user.save(update_fields=['bonus_balance'])
-                    Transaction.objects.create(
-                        user=parent,
-                        action_type=TransactionActionType.OUT,
-                        wallet=TransactionWallet.MAIN_BALANCE,
-                        transaction_type=TransactionType.BONUS,
-                        amount=bonus_amount,
-                        status=TransactionStatus.SUCCESS,
-                        to_user=user,
-                        remarks=f'First deposit bonus for {user.username} (Deposit #{deposit.pk})',
-                        reference_id=ref,
-                        processed_by=processed_by,
-                    )
-                    Transaction.objects.create(
-                        user=user,
-                        action_type=TransactionActionType.IN,
-                        wallet=TransactionWallet.BONUS_BALANCE,
-                        transaction_type=TransactionType.BONUS,
-                        amount=bonus_amount,
-                        status=TransactionStatus.SUCCESS,
-                        from_user=parent,
-                        remarks=f'First deposit bonus (Deposit #{deposit.pk})',
-                        reference_id=ref,
-                        processed_by=processed_by,
-                    )
+        if parent and not deposit.suppress_first_deposit_bonus:
+            return _apply_first_deposit_bonus(deposit, parent, processed_by, ref, locked)
+    return True, None
+
+
+def _apply_first_deposit_bonus(deposit, parent, processed_by, ref, locked=None):
+    """If this is the user's first approved deposit and a rule applies, credit the bonus (parent -> user)."""
+    user = deposit.user
+    approved_count = Deposit.objects.filter(user=user, status='approved').count()
+    if approved_count != 1:
+        return True, None
+    rule = get_applicable_deposit_bonus_rule()
+    if not rule:
+        return True, None
+    if rule.reward_type == RewardType.FLAT:
+        bonus_amount = rule.reward_amount
+    else:
+        bonus_amount = (deposit.amount * rule.reward_amount / 100).quantize(Decimal('0.01'))
+    if bonus_amount <= 0:
+        return True, None
+    try:
+        with transaction.atomic():
+            bonus_request = BonusRequest.objects.create(
+                user=user,
+                amount=bonus_amount,
+                bonus_type=BonusType.DEPOSIT,
+                bonus_rule=rule,
+                status='approved',
+                processed_by=processed_by,
+                processed_at=timezone.now(),
+                remarks=f'First deposit bonus (Deposit #{deposit.pk})',
+            )
+            post_legs(
+                [
+                    Leg(parent, TransactionWallet.MAIN_BALANCE, -bonus_amount, user,
+                        f'First deposit bonus for {user.username} (Deposit #{deposit.pk})'),
+                    Leg(user, TransactionWallet.BONUS_BALANCE, bonus_amount, parent,
+                        f'First deposit bonus (Deposit #{deposit.pk})'),
+                ],
+                TransactionType.BONUS, processed_by=processed_by, reference_id=ref, locked=locked,
+            )
+            withdraw_eligibility.record_bonus_approved(bonus_request)
+    except InsufficientBalance as e:
+        return False, f'Parent master has insufficient balance for first deposit bonus (need {bonus_amount}, have {e.balance}).'
     return True, None
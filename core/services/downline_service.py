@@ -0,0 +1,187 @@
+"""
+Downline aggregates: one DownlineStat row per super / master holding the count and summed main /
+bonus (and, for masters, P/L) balances of the masters directly under it and of every player below it.
+Nodes come from the denormalized upline (User.master / User.super, see hierarchy_service): a player
+counts towards its master and its super, a master towards its super.
+
+Every balance writer calls record_balance_change (ledger postings record_balance_changes, the game
+callback record_game_results) in the same transaction as the balance update; each call is one INSERT ... ON CONFLICT/DUPLICATE KEY increment.
+Joining is recorded by core.signals, leaving by record_left, and moves rebuild the affected nodes.
+rebuild_downline_stats recomputes any set of nodes from User and PLDelta (management command:
+rebuild_downline_stats).
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from core.models import User, UserRole, PLDelta, DownlineStat
+from core.utils.upsert import upsert_increment
+
+ZERO = Decimal('0')
+
+COUNTERS = [
+    'masters_count', 'masters_main_balance', 'masters_bonus_balance', 'masters_pl_balance',
+    'players_count', 'players_main_balance', 'players_bonus_balance',
+]
+
+# Role -> (column prefix, delta names) a member of that role contributes to its nodes.
+_MEMBER_COUNTERS = {
+    UserRole.MASTER: ('masters', ('count', 'main_balance', 'bonus_balance', 'pl_balance')),
+    UserRole.PLAYER: ('players', ('count', 'main_balance', 'bonus_balance')),
+}
+
+
+def _nodes(pk, role, master_id, super_id):
+    """Node ids a user rolls up into: a player's master and super, a master's super."""
+    if role == UserRole.PLAYER:
+        return [node for node in (master_id, super_id) if node and node != pk]
+    if role == UserRole.MASTER and super_id and super_id != pk:
+        return [super_id]
+    return []
+
+
+def _rows(members):
+    """
+    Sum per-member deltas into one row per node (sorted by node id, so concurrent writers lock in
+    the same order). members: (pk, role, master_id, super_id, {'count'|'main_balance'|...: delta}).
+    """
+    rows = {}
+    for pk, role, master_id, super_id, deltas in members:
+        if role not in _MEMBER_COUNTERS:
+            continue
+        prefix, names = _MEMBER_COUNTERS[role]
+        for node in _nodes(pk, role, master_id, super_id):
+            row = rows.setdefault(node, {'node_id': node})
+            for name in names:
+                if deltas.get(name):
+                    column = f'{prefix}_{name}'
+                    row[column] = row.get(column, 0) + deltas[name]
+    return [rows[node] for node in sorted(rows) if len(rows[node]) > 1]
+
+
+def _apply(members):
+    upsert_increment(DownlineStat, ['node_id'], COUNTERS, _rows(members))
+
+
+def _member(user, **deltas):
+    return (user.pk, user.role, user.master_id, user.super_id, deltas)
+
+
+def record_balance_change(user, main=ZERO, bonus=ZERO, pl=ZERO):
+    """Add a change of user's main / bonus / P/L balance to its upline nodes."""
+    _apply([_member(user, main_balance=main, bonus_balance=bonus, pl_balance=pl)])
+
+
+def record_balance_changes(changes):
+    """Several record_balance_change calls in one statement. changes: (user, {'main_balance'|'bonus_balance'|'pl_balance': delta})."""
+    _apply([_member(user, **deltas) for user, deltas in changes])
+
+
+def record_game_results(results):
+    """
+    Callback wallet changes in one statement. results: (player, wallet_field, amount) with
+    wallet_field 'main_balance' or 'bonus_balance'; the player's master P/L moves by -amount.
+    """
+    members = []
+    for user, wallet_field, amount in results:
+        members.append(_member(user, **{wallet_field: amount}))
+        if user.master_id and user.master_id != user.pk:
+            members.append((user.master_id, UserRole.MASTER, user.master_id, user.super_id, {'pl_balance': -amount}))
+    _apply(members)
+
+
+def _current(user):
+    return {
+        'count': 1,
+        'main_balance': user.main_balance or ZERO,
+        'bonus_balance': user.bonus_balance or ZERO,
+        'pl_balance': user.pl_balance or ZERO,
+    }
+
+
+def record_joined(user):
+    """Count a new user (and any opening balances) in its upline nodes."""
+    _apply([_member(user, **_current(user))])
+
+
+def record_left(user):
+    """
+    Remove a deleted user from its upline nodes. Plain UPDATEs, so nodes deleted in the same
+    cascade are skipped rather than re-created.
+    """
+    for row in _rows([_member(user, **{name: -value for name, value in _current(user).items()})]):
+        node = row.pop('node_id')
+        DownlineStat.objects.filter(node_id=node).update(**{name: F(name) + value for name, value in row.items()})
+
+
+def downline_stat(user):
+    """DownlineStat for a super / master (unsaved zeros when it has no downline yet)."""
+    try:
+        return user.downline_stat
+    except DownlineStat.DoesNotExist:
+        return DownlineStat(node=user)
+
+
+def rebuild_downline_stats(node_ids=None):
+    """
+    Recompute DownlineStat for node_ids (None = every super and master) from User balances plus
+    pending PLDelta rows, in one transaction. Returns the number of rows written.
+    """
+    stats = {}
+
+    def stat(node):
+        if node not in stats:
+            stats[node] = DownlineStat(node_id=node)
+        return stats[node]
+
+    def scoped(queryset, field):
+        if node_ids is not None:
+            queryset = queryset.filter(**{f'{field}__in': node_ids})
+        return queryset.filter(**{f'{field}__isnull': False})
+
+    with transaction.atomic():
+        nodes = User.objects.filter(role__in=[UserRole.SUPER, UserRole.MASTER])
+        if node_ids is not None:
+            nodes = nodes.filter(pk__in=node_ids)
+        node_pks = set(nodes.values_list('pk', flat=True))
+        stale = DownlineStat.objects.all()
+        if node_ids is not None:
+            stale = stale.filter(node_id__in=node_ids)
+        stale.delete()
+
+        for field in ('master_id', 'super_id'):
+            rows = (
+                scoped(User.objects.filter(role=UserRole.PLAYER), field)
+                .values(field)
+                .annotate(n=Count('id'), main=Sum('main_balance'), bonus=Sum('bonus_balance'))
+            )
+            for r in rows:
+                s = stat(r[field])
+                s.players_count += r['n']
+                s.players_main_balance += r['main'] or ZERO
+                s.players_bonus_balance += r['bonus'] or ZERO
+
+        rows = (
+            scoped(User.objects.filter(role=UserRole.MASTER), 'super_id')
+            .values('super_id')
+            .annotate(n=Count('id'), main=Sum('main_balance'), bonus=Sum('bonus_balance'), pl=Sum('pl_balance'))
+        )
+        for r in rows:
+            s = stat(r['super_id'])
+            s.masters_count = r['n']
+            s.masters_main_balance = r['main'] or ZERO
+            s.masters_bonus_balance = r['bonus'] or ZERO
+            s.masters_pl_balance += r['pl'] or ZERO
+
+        pending = (
+            scoped(PLDelta.objects.all(), 'master__super_id')
+            .values('master__super_id')
+            .annotate(total=Sum('amount'))
+        )
+        for r in pending:
+            stat(r['master__super_id']).masters_pl_balance += r['total'] or ZERO
+
+        rows = [s for node, s in stats.items() if node in node_pks]
+        DownlineStat.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,81 @@
+"""
+Deposit / withdrawal reports for any hierarchy level. Approved Deposit and Withdraw rows in the date range
+are counted and summed with one grouped query per table, grouped by the owner each row belongs to (the
+player itself, the player's master, a super's own requests, ...); the two results are merged in Python
+with the owner list, so a report costs three queries whatever the number of owners.
+Sorting (ordering=field or -field) and paging (page / page_size) are done here on the merged rows, since
+the sort keys are the computed totals.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from rest_framework.exceptions import ValidationError
+
+from core.models import Deposit, Withdraw
+from core.utils.date_ranges import day_start, day_end
+
+ZERO = Decimal('0')
+
+MAX_PAGE_SIZE = 500
+
+
+def _grouped(model, owner_lookup, owners, date_from, date_to):
+    qs = model.objects.filter(status='approved', **{f'{owner_lookup}__in': owners.values('pk')})
+    if date_from:
+        qs = qs.filter(created_at__gte=day_start(date_from))
+    if date_to:
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    rows = qs.order_by().values(owner_lookup).annotate(n=Count('id'), total=Sum('amount'))
+    return {r[owner_lookup]: (r['n'], r['total'] or ZERO) for r in rows}
+
+
+def dw_rows(owners, owner_lookup, date_from='', date_to=''):
+    """
+    One row per user in owners (in id order): user_id, username, deposit_count, deposit,
+    withdraw_count, withdrawal, net (deposit - withdrawal) and gross (deposit + withdrawal).
+    owner_lookup: path from Deposit / Withdraw to the owner, e.g. 'user' or 'user__parent'.
+    """
+    deposits = _grouped(Deposit, owner_lookup, owners, date_from, date_to)
+    withdrawals = _grouped(Withdraw, owner_lookup, owners, date_from, date_to)
+    rows = []
+    for pk, username in owners.order_by('pk').values_list('pk', 'username'):
+        deposit_count, deposit = deposits.get(pk, (0, ZERO))
+        withdraw_count, withdrawal = withdrawals.get(pk, (0, ZERO))
+        rows.append({
+            'user_id': pk,
+            'username': username,
+            'deposit_count': deposit_count,
+            'deposit': deposit,
+            'withdraw_count': withdraw_count,
+            'withdrawal': withdrawal,
+            'net': deposit - withdrawal,
+            'gross': deposit + withdrawal,
+        })
+    return rows
+
+
+def sort_rows(rows, ordering, fields):
+    """
+    rows sorted by ordering ('field' or '-field'; fields maps the public name to the row key),
+    ties broken by user id. Empty ordering keeps the id order.
+    """
+    ordering = (ordering or '').strip()
+    if not ordering:
+        return rows
+    name = ordering.lstrip('-')
+    if name not in fields:
+        raise ValidationError({'ordering': f'Expected one of: {", ".join(sorted(fields))} (prefix - for descending).'})
+    key = fields[name]
+    rows = sorted(rows, key=lambda row: row['user_id'])
+    return sorted(rows, key=lambda row: row[key], reverse=ordering.startswith('-'))
+
+
+def page_rows(rows, page, page_size):
+    """(rows of the 1-based page, total row count)."""
+    try:
+        page = max(1, int(page or 1))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(page_size or 20)))
+    except (TypeError, ValueError):
+        raise ValidationError({'page': 'page and page_size must be integers.'})
+    start = (page - 1) * page_size
+    return rows[start:start + page_size], len(rows)
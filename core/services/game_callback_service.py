@@ -0,0 +1,586 @@
+"""
+Game callback engine: settle one provider round callback in a single atomic unit.
+Provider wallet_before/wallet_after give the round delta; the player's wallet moves by that
+delta with an F() update while only the player row is locked, so concurrent deposits,
+withdrawals and callbacks are never overwritten. The master's P/L is appended to the PLDelta
+journal (core.services.pl_service) instead of updating the shared master row; the upline's
+DownlineStat totals move by one counter upsert per callback (per batch for batches), and new
+rounds advance the player's WithdrawEligibility game count.
+Every settled callback leaves a GameCallbackReceipt; provider retries are answered from it.
+"""
+import hashlib
+import logging
+from decimal import Decimal
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import catalog_cache
+from core.channel_utils import broadcast_balances
+from core.services import downline_service, rollup_service, withdraw_eligibility
+from core.services.pl_service import record_pl_deltas
+from core.models import (
+    User,
+    Game,
+    GameProvider,
+    GameCategory,
+    GameLog,
+    GameCallbackReceipt,
+    GameLogWallet,
+    GameLogType,
+    Transaction,
+    TransactionActionType,
+    TransactionWallet,
+    TransactionType,
+    TransactionStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+GAME_LOG_RESULT_FIELDS = [
+    "bet_amount", "win_amount", "type", "lose_amount", "before_balance", "after_balance", "wallet", "provider_raw_data",
+]
+
+
+def parse_callback_data(data):
+    """
+    Normalise raw callback fields (form or JSON dict).
+    Returns (fields, None) or (None, error_message). fields keys: mobile, bet, win, game_uid,
+    game_round, token, wallet_before, wallet_after, change.
+    """
+    def _get(key, default=""):
+        val = data.get(key, default)
+        return val if val is not None else default
+
+    try:
+        fields = {
+            "mobile": _get("mobile") or _get("user_id"),
+            "bet": Decimal(str(_get("bet_amount", "0"))),
+            "win": Decimal(str(_get("win_amount", "0"))),
+            "game_uid": (_get("game_uid") or "").strip(),
+            "game_round": (_get("game_round") or "").strip(),
+            "token": _get("token") or "",
+            "wallet_before": Decimal(str(_get("wallet_before", "0"))),
+            "wallet_after": Decimal(str(_get("wallet_after", "0"))),
+            "change": Decimal(str(_get("change", "0"))),
+        }
+    except Exception:
+        return None, "Invalid parameters"
+    return fields, None
+
+
+def callback_signature(fields):
+    """sha256 hex of (bet, win, wallet_before, wallet_after) at 2dp; identifies a retried callback."""
+    cents = Decimal("0.01")
+    raw = "|".join(
+        str(fields[key].quantize(cents))
+        for key in ("bet", "win", "wallet_before", "wallet_after")
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _user_lookup(mobile, prefix=""):
+    """Q matching a user by username or numeric id (prefix e.g. 'user__' for related lookups)."""
+    lookup = Q(**{f"{prefix}username": mobile})
+    try:
+        lookup |= Q(**{f"{prefix}pk": int(mobile)})
+    except (ValueError, TypeError):
+        pass
+    return lookup
+
+
+def _find_receipt(mobile, game_round, signature):
+    """Stored receipt for an already-settled callback (one indexed lookup, no locks), or None."""
+    mobile = str(mobile or "").strip()
+    if not mobile or not game_round:
+        return None
+    return (
+        GameCallbackReceipt.objects.filter(round=game_round, signature=signature)
+        .filter(_user_lookup(mobile, prefix="user__"))
+        .only("response_status", "response_body")
+        .first()
+    )
+
+
+def _effective_token(game):
+    """Provider api_token first, SuperSetting.game_api_token as fallback (both from catalog_cache)."""
+    if game and game.api_token:
+        return game.api_token
+    super_settings = catalog_cache.get_game_settings()
+    return (super_settings.game_api_token or "").strip() if super_settings else ""
+
+
+def _create_placeholder_game(game_uid):
+    """Resolve game snapshot by game_uid; if not found, create placeholder provider/game."""
+    game = catalog_cache.get_game_by_uid(game_uid)
+    if game:
+        return game
+    cat, _ = GameCategory.objects.get_or_create(
+        name="Other",
+        defaults={"is_active": True},
+    )
+    prov, _ = GameProvider.objects.get_or_create(
+        code="callback_unknown",
+        defaults={"name": "Unknown (Callback)", "is_active": True},
+    )
+    game = Game.objects.create(
+        provider=prov,
+        category=cat,
+        name=game_uid[:255],
+        game_uid=game_uid,
+        is_active=True,
+    )
+    return catalog_cache.snapshot_from_game(game)
+
+
+def _locked_users():
+    """
+    SELECT ... FOR UPDATE on players only. The master comes from the player's denormalized
+    master_id, so players under the same master never queue on the master row. The withdraw
+    eligibility row rides along (unlocked) for the rolls_needed pushed to the balance socket.
+    """
+    return User.objects.select_related("withdraw_eligibility").select_for_update(of=("self",))
+
+
+def _master_id(user):
+    """The master above user (P/L is tracked for masters only), else None."""
+    return user.master_id if user.master_id != user.pk else None
+
+
+def _lock_user(mobile):
+    """
+    Resolve the player by username or numeric id (username wins) and lock the player row in one
+    SELECT ... FOR UPDATE. Must run inside transaction.atomic.
+    """
+    if not mobile:
+        return None
+    mobile = str(mobile).strip()
+    if not mobile:
+        return None
+    candidates = list(
+        _locked_users().filter(_user_lookup(mobile))[:2]
+    )
+    for candidate in candidates:
+        if candidate.username == mobile:
+            return candidate
+    return candidates[0] if candidates else None
+
+
+def _round_amounts(fields):
+    """(result_amount, bet, win, lose_amount) from provider wallet_before/wallet_after."""
+    result_amount = fields["wallet_after"] - fields["wallet_before"]
+    if result_amount > 0:
+        win = result_amount
+        lose_amount = Decimal("0")
+    elif result_amount < 0:
+        win = Decimal("0")
+        lose_amount = -result_amount
+    else:
+        win = Decimal("0")
+        lose_amount = Decimal("0")
+    if fields["bet"] > 0:
+        bet = fields["bet"]
+    elif result_amount < 0:
+        bet = -result_amount
+    else:
+        bet = Decimal("0")
+    return result_amount, bet, win, lose_amount
+
+
+def process_game_callback(data):
+    """
+    Validate and settle one callback. Returns (http_status, response_body).
+    Steady-state cost (game snapshot cached): receipt lookup, one locked player read, round
+    lookup, GameLog write, wallet update, P/L journal, Transaction and receipt inserts, all
+    in one transaction. A retry costs the receipt lookup only.
+    """
+    fields, error = parse_callback_data(data)
+    if error:
+        logger.warning("game_callback: invalid parameters, data keys=%s", list(data.keys()) if data else [])
+        return 400, {"error": error}
+
+    mobile = fields["mobile"]
+    game_round = fields["game_round"]
+    game = catalog_cache.get_game_by_uid(fields["game_uid"])
+
+    # Only validate when we have a configured token AND the provider sent one (some providers don't echo token)
+    token = (fields["token"] or "").strip()
+    if token:
+        effective_token = _effective_token(game)
+        if effective_token and token != effective_token:
+            logger.warning("game_callback: token mismatch for mobile=%s", mobile)
+            return 403, {"error": "Invalid token"}
+
+    signature = callback_signature(fields)
+    receipt = _find_receipt(mobile, game_round, signature)
+    if receipt:
+        logger.info("game_callback: duplicate (receipt) mobile=%s game_round=%s", mobile, game_round)
+        return receipt.response_status, receipt.response_body
+
+    try:
+        with transaction.atomic():
+            user = _lock_user(mobile)
+            if not user:
+                logger.warning("game_callback: user not found for mobile=%s (try user_id or numeric id)", mobile)
+                return 400, {"error": "User not found"}
+            if not game_round:
+                logger.warning("game_callback: game_round missing for user id=%s", user.pk)
+                return 400, {"error": "game_round required"}
+            if game is None:
+                game = _create_placeholder_game(fields["game_uid"] or "unknown")
+            status_code, body, game_log = _settle_locked(user, game, fields, data)
+            if game_log is not None:
+                GameCallbackReceipt.objects.create(
+                    user=user,
+                    round=game_round,
+                    signature=signature,
+                    game_log=game_log,
+                    response_status=status_code,
+                    response_body=body,
+                )
+            return status_code, body
+    except IntegrityError:
+        # A concurrent copy of this callback committed its receipt first; our work was rolled back.
+        receipt = _find_receipt(mobile, game_round, signature)
+        if receipt is None:
+            raise
+        logger.info("game_callback: duplicate (concurrent) mobile=%s game_round=%s", mobile, game_round)
+        return receipt.response_status, receipt.response_body
+
+
+def _apply_round(user, game, fields, data, existing):
+    """
+    In-memory settlement of one round for a locked user; game is a catalog_cache.GameSnapshot and
+    existing the round's GameLog (or None). Nothing is written. Returns None for a round-end no-op,
+    else (game_log, created, result_amount, pl_transaction or None).
+    """
+    game_round = fields["game_round"]
+    wallet_before = fields["wallet_before"]
+    wallet_after = fields["wallet_after"]
+    result_amount, bet, win, lose_amount = _round_amounts(fields)
+    log_type = GameLogType.WIN if win > 0 else GameLogType.LOSE
+
+    # Provider two-callback pattern: 1st = bet/deduct, 2nd = result (win_amount) or round-end (bet=0, win=0, change=0).
+    # Round-end only carries no delta: keep the existing GameLog and skip all writes.
+    is_round_end_only = (
+        fields["bet"] == 0 and fields["win"] == 0 and fields["change"] == 0 and result_amount == 0
+    )
+    if existing and is_round_end_only:
+        logger.info(
+            "game_callback: round-end only (idempotent) user_id=%s game_round=%s wallet_after=%s wallet=%s",
+            user.pk, game_round, wallet_after, user.game_wallet,
+        )
+        return None
+
+    # Which wallet this game session uses (set at launch)
+    is_bonus_game = (getattr(user, "game_wallet", "main") == "bonus")
+    log_wallet = GameLogWallet.BONUS_BALANCE if is_bonus_game else GameLogWallet.MAIN_BALANCE
+    tx_wallet = TransactionWallet.BONUS_BALANCE if is_bonus_game else TransactionWallet.MAIN_BALANCE
+
+    if existing:
+        # Second callback (result): provider often sends bet_amount=0; preserve first-callback bet and round-start balance.
+        if fields["bet"] == 0 and existing.bet_amount > 0:
+            bet = existing.bet_amount
+            wallet_before = existing.before_balance
+        game_log = existing
+        created = False
+    else:
+        game_log = GameLog(
+            user=user,
+            master_id=user.master_id,
+            super_id=user.super_id,
+            game_id=game.game_id,
+            provider_id=game.provider_id,
+            round=game_round,
+        )
+        created = True
+    game_log.bet_amount = bet
+    game_log.win_amount = win
+    game_log.type = log_type
+    game_log.lose_amount = lose_amount
+    game_log.before_balance = wallet_before
+    game_log.after_balance = wallet_after
+    game_log.wallet = log_wallet
+    game_log.provider_raw_data = data
+
+    pl_transaction = None
+    if result_amount != 0:
+        # P/L transaction for every callback with a net change (bet deduction or win/loss).
+        pl_transaction = Transaction(
+            user=user,
+            master_id=user.master_id,
+            super_id=user.super_id,
+            action_type=TransactionActionType.IN if result_amount >= 0 else TransactionActionType.OUT,
+            wallet=tx_wallet,
+            transaction_type=TransactionType.PL,
+            amount=abs(result_amount),
+            status=TransactionStatus.SUCCESS,
+            remarks=f"Game round {game_round}",
+            game_log=game_log,
+            balance_before=wallet_before,
+            balance_after=wallet_after,
+        )
+
+    logger.info(
+        "game_callback: ok user_id=%s game_round=%s bet=%s win=%s wallet_after=%s",
+        user.pk, game_round, bet, win, wallet_after,
+    )
+    return game_log, created, result_amount, pl_transaction
+
+
+def _wallet_field(user):
+    return "bonus_balance" if getattr(user, "game_wallet", "main") == "bonus" else "main_balance"
+
+
+def _balance_update(user, new_rounds, delta):
+    """Fields for the player's balance socket after new_rounds new rounds and a wallet change of delta."""
+    update = {}
+    if delta != 0:
+        wallet_field = _wallet_field(user)
+        update[wallet_field] = (getattr(user, wallet_field) or Decimal("0")) + delta
+    state = getattr(user, "withdraw_eligibility", None)
+    if new_rounds and state is not None and state.approved_bonuses:
+        state.games_played += new_rounds
+        update["rolls_needed"] = withdraw_eligibility.get_rolls_needed(state)
+    return update
+
+
+def _settle_locked(user, game, fields, data):
+    """
+    Settle one round for an already-locked user (from _lock_user). Caller owns the transaction.
+    Returns (http_status, response_body, game_log); game_log is None when nothing was written.
+    """
+    existing = GameLog.objects.filter(user=user, round=fields["game_round"]).first()
+    old_values = rollup_service.game_log_values(existing)
+    applied = _apply_round(user, game, fields, data, existing)
+    if applied is None:
+        return 200, {"status": "ok"}, None
+    game_log, created, result_amount, pl_transaction = applied
+    if created:
+        game_log.save()
+        withdraw_eligibility.record_games(user.pk)
+    else:
+        game_log.save(update_fields=GAME_LOG_RESULT_FIELDS + ["updated_at"])
+    rollup_service.record_game_logs(
+        user, _master_id(user), [(game_log, old_values, rollup_service.game_log_values(game_log))],
+    )
+    if result_amount != 0:
+        wallet_field = _wallet_field(user)
+        User.objects.filter(pk=user.pk).update(**{wallet_field: F(wallet_field) + result_amount})
+        master_id = _master_id(user)
+        if master_id:
+            record_pl_deltas({master_id: -result_amount})
+        downline_service.record_game_results([(user, wallet_field, result_amount)])
+        pl_transaction.save()
+    broadcast_balances({user.pk: _balance_update(user, 1 if created else 0, result_amount)})
+    return 200, {"status": "ok"}, game_log
+
+
+BATCH_MAX_ITEMS = 1000
+
+
+def _batch_item(index, status_code, body):
+    return {"index": index, "status": status_code, "body": body}
+
+
+def _lock_users_by_mobile(mobiles):
+    """
+    Lock every player referenced by mobiles in one SELECT ... FOR UPDATE ordered by id (deadlock-safe
+    across concurrent batches). Returns {mobile: User}; username match wins over numeric id.
+    """
+    lookup = Q(username__in=mobiles)
+    numeric = set()
+    for mobile in mobiles:
+        try:
+            numeric.add(int(mobile))
+        except (ValueError, TypeError):
+            pass
+    if numeric:
+        lookup |= Q(pk__in=numeric)
+    users = list(_locked_users().filter(lookup).order_by("pk"))
+    by_username = {u.username: u for u in users}
+    by_pk = {u.pk: u for u in users}
+    resolved = {}
+    for mobile in mobiles:
+        user = by_username.get(mobile)
+        if user is None:
+            try:
+                user = by_pk.get(int(mobile))
+            except (ValueError, TypeError):
+                user = None
+        if user is not None:
+            resolved[mobile] = user
+    return resolved
+
+
+def _assign_bulk_pks(user_id, new_logs):
+    """Backends that cannot return ids from bulk_create (MySQL): read them back by round (rows are locked)."""
+    pks = dict(
+        GameLog.objects.filter(user_id=user_id, round__in=[log.round for log in new_logs])
+        .order_by("pk")
+        .values_list("round", "pk")
+    )
+    for log in new_logs:
+        log.pk = pks.get(log.round)
+
+
+def _write_user_batch(user, new_logs, updated_logs, delta, pl_transactions, receipts):
+    """Persist one player's share of a batch: bulk inserts plus a single wallet update."""
+    if new_logs:
+        GameLog.objects.bulk_create(new_logs)
+        if any(log.pk is None for log in new_logs):
+            _assign_bulk_pks(user.pk, new_logs)
+        withdraw_eligibility.record_games(user.pk, len(new_logs))
+    if updated_logs:
+        now = timezone.now()
+        for log in updated_logs:
+            log.updated_at = now
+        GameLog.objects.bulk_update(updated_logs, GAME_LOG_RESULT_FIELDS + ["updated_at"])
+    if delta != 0:
+        wallet_field = _wallet_field(user)
+        User.objects.filter(pk=user.pk).update(**{wallet_field: F(wallet_field) + delta})
+    if pl_transactions:
+        Transaction.objects.bulk_create(pl_transactions)
+    if receipts:
+        GameCallbackReceipt.objects.bulk_create(receipts)
+
+
+def process_callback_batch(items):
+    """
+    Settle a list of callback dicts (same fields as a single callback).
+    Returns a list of {"index", "status", "body"} in input order.
+    Every item is validated in one pass; valid items are grouped by player and settled in one
+    transaction: players locked once in id order, receipts and existing rounds read once, then per
+    player a savepoint with bulk GameLog/Transaction/receipt inserts and one wallet update. Master
+    P/L goes to the PLDelta journal in one insert at the end. A failing item or player never rolls back the others.
+    """
+    results = [None] * len(items)
+    pending = []  # (index, fields, data, game, mobile, signature)
+    placeholder_games = {}
+    for index, data in enumerate(items):
+        if not isinstance(data, dict):
+            results[index] = _batch_item(index, 400, {"error": "Invalid parameters"})
+            continue
+        fields, error = parse_callback_data(data)
+        if error:
+            results[index] = _batch_item(index, 400, {"error": error})
+            continue
+        game = catalog_cache.get_game_by_uid(fields["game_uid"])
+        token = (fields["token"] or "").strip()
+        if token:
+            effective_token = _effective_token(game)
+            if effective_token and token != effective_token:
+                logger.warning("game_callback_batch: token mismatch for mobile=%s", fields["mobile"])
+                results[index] = _batch_item(index, 403, {"error": "Invalid token"})
+                continue
+        mobile = str(fields["mobile"] or "").strip()
+        if not mobile:
+            results[index] = _batch_item(index, 400, {"error": "User not found"})
+            continue
+        if game is None:
+            uid = fields["game_uid"] or "unknown"
+            if uid not in placeholder_games:
+                placeholder_games[uid] = _create_placeholder_game(uid)
+            game = placeholder_games[uid]
+        pending.append((index, fields, data, game, mobile, callback_signature(fields)))
+
+    if not pending:
+        return results
+
+    with transaction.atomic():
+        users = _lock_users_by_mobile({item[4] for item in pending})
+        groups = {}
+        for item in pending:
+            index, fields, _data, _game, mobile, _signature = item
+            user = users.get(mobile)
+            if user is None:
+                logger.warning("game_callback_batch: user not found for mobile=%s", mobile)
+                results[index] = _batch_item(index, 400, {"error": "User not found"})
+            elif not fields["game_round"]:
+                results[index] = _batch_item(index, 400, {"error": "game_round required"})
+            else:
+                groups.setdefault(user.pk, (user, []))[1].append(item)
+        if not groups:
+            return results
+
+        user_ids = list(groups)
+        rounds = {item[1]["game_round"] for _user, group in groups.values() for item in group}
+        receipts = {
+            (user_id, game_round, signature): (status_code, body)
+            for user_id, game_round, signature, status_code, body in GameCallbackReceipt.objects.filter(
+                user_id__in=user_ids, round__in=rounds,
+            ).values_list("user_id", "round", "signature", "response_status", "response_body")
+        }
+        round_logs = {}
+        for log in GameLog.objects.filter(user_id__in=user_ids, round__in=rounds).order_by("pk"):
+            round_logs.setdefault((log.user_id, log.round), log)
+
+        master_deltas = {}
+        game_results = []
+        balance_updates = {}
+        for user_id in sorted(groups):
+            user, group = groups[user_id]
+            new_logs, updated_logs, pl_transactions, new_receipts = [], {}, [], []
+            rollup_entries = []
+            answered = []
+            new_keys = set()
+            delta = Decimal("0")
+            for index, fields, data, game, _mobile, signature in group:
+                key = (user_id, fields["game_round"], signature)
+                if key in receipts:
+                    status_code, body = receipts[key]
+                    results[index] = _batch_item(index, status_code, body)
+                    if key in new_keys:
+                        # A retry of an item settled in this savepoint stands or falls with it.
+                        answered.append(index)
+                    continue
+                existing = round_logs.get((user_id, fields["game_round"]))
+                old_values = rollup_service.game_log_values(existing)
+                applied = _apply_round(user, game, fields, data, existing)
+                answered.append(index)
+                if applied is None:
+                    results[index] = _batch_item(index, 200, {"status": "ok"})
+                    continue
+                game_log, created, result_amount, pl_transaction = applied
+                if created:
+                    new_logs.append(game_log)
+                    round_logs[(user_id, fields["game_round"])] = game_log
+                elif game_log.pk is not None:
+                    updated_logs[game_log.pk] = game_log
+                delta += result_amount
+                rollup_entries.append((game_log, old_values, rollup_service.game_log_values(game_log)))
+                if pl_transaction is not None:
+                    pl_transactions.append(pl_transaction)
+                body = {"status": "ok"}
+                new_receipts.append(GameCallbackReceipt(
+                    user=user,
+                    round=fields["game_round"],
+                    signature=signature,
+                    game_log=game_log,
+                    response_status=200,
+                    response_body=body,
+                ))
+                receipts[key] = (200, body)
+                new_keys.add(key)
+                results[index] = _batch_item(index, 200, body)
+            try:
+                with transaction.atomic():
+                    _write_user_batch(user, new_logs, list(updated_logs.values()), delta, pl_transactions, new_receipts)
+                    rollup_service.record_game_logs(user, _master_id(user), rollup_entries)
+            except DatabaseError:
+                logger.exception("game_callback_batch: settlement failed for user_id=%s", user_id)
+                for index in answered:
+                    results[index] = _batch_item(index, 500, {"error": "Settlement failed"})
+                continue
+            master_id = _master_id(user)
+            if master_id and delta != 0:
+                master_deltas[master_id] = master_deltas.get(master_id, Decimal("0")) - delta
+            if delta != 0:
+                game_results.append((user, _wallet_field(user), delta))
+            balance_updates[user.pk] = _balance_update(user, len(new_logs), delta)
+
+        record_pl_deltas(master_deltas)
+        downline_service.record_game_results(game_results)
+        broadcast_balances(balance_updates)
+    return results
@@ -0,0 +1,96 @@
+"""
+Denormalized upline: User.master / User.super hold the nearest master / super at or above each user
+(the user itself included), and GameLog / Transaction rows carry a copy of their user's values.
+Downline filters then become one indexed equality (super=X, master=X) instead of parent__parent joins.
+
+User rows are kept correct by core.signals (sync_user_upline -> refresh_upline) whenever a user is
+created or its parent or role changes; the change is pushed down the whole subtree, including the
+GameLog / Transaction / DailyGameStat rows of every moved user, the DownlineStat and PendingStat
+rows of the old and new upline are rebuilt, and the moved users' cached tokens (core.token_cache)
+are revoked.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from core import token_cache
+from core.models import User, UserRole, GameLog, Transaction, DailyGameStat
+from core.services import downline_service, pending_service
+
+UPDATE_CHUNK = 1000
+
+
+def _own_upline(pk, role, parent_upline):
+    """(master_id, super_id) for a user given its parent's (master_id, super_id)."""
+    parent_master, parent_super = parent_upline
+    return (
+        pk if role == UserRole.MASTER else parent_master,
+        pk if role == UserRole.SUPER else parent_super,
+    )
+
+
+def _parent_upline(parent_id):
+    if parent_id is None:
+        return (None, None)
+    row = User.objects.filter(pk=parent_id).values_list('master_id', 'super_id').first()
+    return row or (None, None)
+
+
+def expected_upline(user):
+    """(master_id, super_id) user should hold, read from its parent's stored columns."""
+    return _own_upline(user.pk, user.role, _parent_upline(user.parent_id))
+
+
+def stamp_new_user(user):
+    """Set master/super on a just-created user (no downline or logs yet, so one UPDATE)."""
+    upline = expected_upline(user)
+    if upline != (user.master_id, user.super_id):
+        User.objects.filter(pk=user.pk).update(master_id=upline[0], super_id=upline[1])
+        user.master_id, user.super_id = upline
+
+
+def refresh_upline(user):
+    """
+    Recompute master/super for user and its downline from user.parent, update the rows whose values
+    changed (users, their GameLogs, Transactions and DailyGameStats), rebuild the DownlineStats of the
+    old and new upline and set the values on user itself.
+    Returns the number of users updated.
+    """
+    nodes = {}
+    frontier = User.objects.filter(pk=user.pk)
+    while True:
+        rows = [row for row in frontier.values_list('pk', 'role', 'parent_id', 'master_id', 'super_id')
+                if row[0] not in nodes]
+        if not rows:
+            break
+        for row in rows:
+            nodes[row[0]] = row
+        frontier = User.objects.filter(parent_id__in=[row[0] for row in rows])
+
+    # nodes is in breadth-first order, so every parent is computed before its children.
+    upline = {}
+    changed = defaultdict(list)
+    affected_nodes = set()
+    for pk, role, parent_id, master_id, super_id in nodes.values():
+        parent = upline.get(parent_id) or _parent_upline(parent_id)
+        upline[pk] = _own_upline(pk, role, parent)
+        if upline[pk] != (master_id, super_id):
+            changed[upline[pk]].append(pk)
+            affected_nodes.update((pk, master_id, super_id) + upline[pk])
+
+    with transaction.atomic():
+        for (master_id, super_id), pks in changed.items():
+            for start in range(0, len(pks), UPDATE_CHUNK):
+                chunk = pks[start:start + UPDATE_CHUNK]
+                User.objects.filter(pk__in=chunk).update(master_id=master_id, super_id=super_id)
+                GameLog.objects.filter(user_id__in=chunk).update(master_id=master_id, super_id=super_id)
+                Transaction.objects.filter(user_id__in=chunk).update(master_id=master_id, super_id=super_id)
+                # Rollups track the master above a player (a master's own row keeps master=None).
+                DailyGameStat.objects.filter(user_id__in=chunk).exclude(user_id=master_id).update(master_id=master_id)
+        if affected_nodes:
+            downline_service.rebuild_downline_stats(affected_nodes - {None})
+            pending_service.rebuild_pending_stats(affected_nodes - {None})
+        token_cache.revoke_users(pk for pks in changed.values() for pk in pks)
+    if user.pk in upline:
+        user.master_id, user.super_id = upline[user.pk]
+    return sum(len(pks) for pks in changed.values())
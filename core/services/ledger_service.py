@@ -0,0 +1,139 @@
+"""
+Double-entry ledger posting. A money movement (deposit / withdraw / bonus approval, welcome and referral
+bonus, settlement, transfer) is a list of legs, each a signed change of one user's wallet, and
+post_legs applies them in one transaction:
+  1. lock every affected user (SELECT ... FOR UPDATE in id order, so concurrent postings cannot deadlock)
+  2. check that no debited wallet goes below zero (InsufficientBalance, nothing written)
+  3. one UPDATE per user with F() increments of its wallets
+  4. one bulk_create of the Transaction legs, with balance_before / balance_after
+  5. DownlineStat and daily bonus rollups, one statement each (bulk_create sends no post_save)
+  6. the new balances, queued for the users' balance sockets (sent after commit)
+Callers that must read a locked balance first (settlement) or post several movements in one
+transaction (bulk approvals) lock with lock_users and pass the result on.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.channel_utils import broadcast_balances
+from core.models import (
+    User,
+    Transaction,
+    TransactionActionType,
+    TransactionType,
+    TransactionStatus,
+)
+from core.services import downline_service, pending_service, rollup_service
+
+ZERO = Decimal('0')
+
+WALLETS = ('main_balance', 'bonus_balance', 'pl_balance', 'exposure_balance')
+PUSHED_WALLETS = ('main_balance', 'bonus_balance', 'exposure_balance')
+
+# user: User; wallet: a TransactionWallet value (= the User balance field); amount: signed change
+# (credit > 0 is an IN leg, debit < 0 an OUT leg); counterparty: the other side of the movement
+# (to_user of an OUT leg, from_user of an IN leg), None to leave it unset.
+Leg = namedtuple('Leg', ['user', 'wallet', 'amount', 'counterparty', 'remarks'], defaults=(None, ''))
+
+
+class InsufficientBalance(Exception):
+    def __init__(self, user, wallet, balance, amount):
+        self.user, self.wallet, self.balance, self.amount = user, wallet, balance, amount
+        super().__init__(f'{user.username}: {wallet} {balance} is less than {amount}')
+
+
+def lock_users(user_ids):
+    """{id: User} with the balances of user_ids, locked (id order) until the surrounding transaction ends."""
+    users = (
+        User.objects.select_for_update()
+        .filter(pk__in=set(user_ids))
+        .order_by('pk')
+        .only('username', 'role', 'master', 'super', *WALLETS)
+    )
+    return {user.pk: user for user in users}
+
+
+def approve_pending(request_obj, processed_by):
+    """
+    Mark a pending Deposit / Withdraw / BonusRequest approved (and take it off the approval-queue
+    counters). The conditional UPDATE also locks the row, so of two concurrent approvals only one gets
+    True; call inside the posting's transaction.
+    """
+    now = timezone.now()
+    updated = type(request_obj).objects.filter(pk=request_obj.pk, status='pending').update(
+        status='approved', processed_by=processed_by, processed_at=now,
+    )
+    if updated:
+        request_obj.status, request_obj.processed_by, request_obj.processed_at = 'approved', processed_by, now
+        pending_service.record_changes(type(request_obj), [pending_service.request_upline(request_obj)], -1)
+    return bool(updated)
+
+
+def post_legs(legs, transaction_type, processed_by=None, reference_id='', check_funds=True, locked=None):
+    """
+    Apply legs (see Leg) atomically and write one Transaction per leg. Raises InsufficientBalance when
+    check_funds and a debit would take a wallet below zero, User.DoesNotExist when a user is gone.
+    locked: the lock_users result when the caller already holds the locks (kept current, so one lock
+    can serve several postings in the same transaction).
+    Returns {user_id: {wallet: new balance}}; the legs' User objects are updated too.
+    """
+    with transaction.atomic():
+        if locked is None:
+            locked = lock_users(leg.user.pk for leg in legs)
+        balances = {}
+        deltas = {}
+        rows = []
+        changes = []
+        for leg in legs:
+            user = locked.get(leg.user.pk)
+            if user is None:
+                raise User.DoesNotExist(f'User {leg.user.pk} does not exist.')
+            key = (user.pk, leg.wallet)
+            before = balances.get(key, getattr(user, leg.wallet) or ZERO)
+            after = before + leg.amount
+            if check_funds and leg.amount < 0 and after < 0:
+                raise InsufficientBalance(user, leg.wallet, before, -leg.amount)
+            balances[key] = after
+            user_deltas = deltas.setdefault(user.pk, {})
+            user_deltas[leg.wallet] = user_deltas.get(leg.wallet, ZERO) + leg.amount
+            changes.append((user, {leg.wallet: leg.amount}))
+            credit = leg.amount >= 0
+            rows.append(Transaction(
+                user_id=user.pk,
+                master_id=user.master_id,
+                super_id=user.super_id,
+                action_type=TransactionActionType.IN if credit else TransactionActionType.OUT,
+                wallet=leg.wallet,
+                transaction_type=transaction_type,
+                amount=abs(leg.amount),
+                status=TransactionStatus.SUCCESS,
+                from_user=leg.counterparty if credit else None,
+                to_user=None if credit else leg.counterparty,
+                balance_before=before,
+                balance_after=after,
+                remarks=leg.remarks,
+                reference_id=reference_id,
+                processed_by=processed_by,
+            ))
+        for pk, wallets in deltas.items():
+            User.objects.filter(pk=pk).update(**{wallet: F(wallet) + amount for wallet, amount in wallets.items()})
+        Transaction.objects.bulk_create(rows)
+        downline_service.record_balance_changes(changes)
+        if transaction_type == TransactionType.BONUS:
+            rollup_service.record_bonus_transactions(rows)
+        updates = {}
+        for (pk, wallet), balance in balances.items():
+            if wallet in PUSHED_WALLETS:
+                updates.setdefault(pk, {})[wallet] = balance
+        broadcast_balances(updates)
+
+    result = {}
+    for (pk, wallet), balance in balances.items():
+        result.setdefault(pk, {})[wallet] = balance
+        setattr(locked[pk], wallet, balance)
+    for leg in legs:
+        setattr(leg.user, leg.wallet, result[leg.user.pk][leg.wallet])
+    return result
@@ -0,0 +1,146 @@
+"""
+Transactional outbox for channel-layer (WebSocket) events. enqueue / enqueue_many write OutboxEvent
+rows in the caller's transaction, so an event exists exactly when the change it announces committed.
+After the commit a per-process background thread drains due rows in batches of OUTBOX_BATCH_SIZE.
+A batch is claimed in a short transaction (its next_attempt_at pushed CLAIM_SECONDS ahead, so other
+dispatchers leave it alone), sent with no transaction or row lock held (one event-loop hop per batch),
+then sent rows are deleted and failures retried with exponential backoff (dropped after
+OUTBOX_MAX_ATTEMPTS). The request that wrote the event never waits for the channel layer.
+A retried event can arrive after newer ones for its group, so every event is sent with its row id as
+"version": rows that announce changes of one locked row (a user's balances, a queue's counts) are
+written while that lock is held, so their ids follow commit order and receivers drop older versions.
+Rows left behind (process exit, retries, expired claims) are sent by the outbox_worker management
+command; concurrent claimers skip each other's locked rows where the database supports SKIP LOCKED.
+OUTBOX_DISPATCH_IN_BACKGROUND = False, and any SQLite database (one writer at a time, so a second
+thread's writes would fail requests with "database is locked"), send in the on_commit callback itself.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from core.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_MAX_ATTEMPTS = 10
+MAX_RETRY_DELAY = 300  # seconds
+CLAIM_SECONDS = 60
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+_scheduled = threading.Lock()
+
+
+def enqueue(group, event):
+    """Queue channel_layer.group_send(group, event) to run after the current transaction commits."""
+    enqueue_many([(group, event)])
+
+
+def enqueue_many(events):
+    """enqueue for every (group, event), with one INSERT."""
+    if not events:
+        return
+    OutboxEvent.objects.bulk_create([OutboxEvent(group=group, event=event) for group, event in events])
+    transaction.on_commit(_schedule)
+
+
+def _dispatch_in_background():
+    return getattr(settings, 'OUTBOX_DISPATCH_IN_BACKGROUND', True) and connection.vendor != 'sqlite'
+
+
+def _schedule():
+    if not _dispatch_in_background():
+        # The change already committed: a failed send stays queued instead of failing the request.
+        try:
+            dispatch_pending()
+        except Exception:
+            logger.exception("outbox: dispatch failed")
+        return
+    # One queued drain at a time: a drain that starts after this point sees every committed row.
+    if _scheduled.acquire(blocking=False):
+        _executor.submit(_drain)
+
+
+def _drain():
+    _scheduled.release()
+    try:
+        dispatch_pending()
+    except Exception:
+        logger.exception("outbox: dispatch failed")
+    finally:
+        close_old_connections()
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(MAX_RETRY_DELAY, 2 ** attempts))
+
+
+async def _send_all(channel_layer, events):
+    """{event id: error text} for the events whose group_send raised."""
+    errors = {}
+    for event in events:
+        try:
+            await channel_layer.group_send(event.group, {**event.event, 'version': event.pk})
+        except Exception as e:
+            errors[event.pk] = f'{type(e).__name__}: {e}'
+    return errors
+
+
+def _claim_batch(batch_size):
+    """Up to batch_size due events, oldest first, claimed for CLAIM_SECONDS in one short transaction."""
+    with transaction.atomic():
+        qs = OutboxEvent.objects.filter(next_attempt_at__lte=timezone.now()).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        events = list(qs[:batch_size])
+        if events:
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=CLAIM_SECONDS),
+            )
+    return events
+
+
+def dispatch_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """Send every due event, oldest first, batch_size per claim. Returns the number sent."""
+    channel_layer = get_channel_layer()
+    sent = 0
+    while True:
+        events = _claim_batch(batch_size)
+        if not events:
+            return sent
+        if channel_layer is None:
+            logger.warning(
+                "Channel layer is None; %d real-time event(s) dropped. "
+                "Set CHANNEL_LAYERS in settings and use Redis in production when using multiple processes.",
+                len(events),
+            )
+            errors = {}
+        else:
+            errors = async_to_sync(_send_all)(channel_layer, events)
+        done = [event.pk for event in events if event.pk not in errors]
+        retry = []
+        now = timezone.now()
+        for event in events:
+            if event.pk not in errors:
+                continue
+            event.attempts += 1
+            event.last_error = errors[event.pk]
+            if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                logger.error("outbox: dropping %s after %d attempts: %s", event, event.attempts, event.last_error)
+                done.append(event.pk)
+            else:
+                event.next_attempt_at = now + _retry_delay(event.attempts)
+                retry.append(event)
+        with transaction.atomic():
+            OutboxEvent.objects.filter(pk__in=done).delete()
+            OutboxEvent.objects.bulk_update(retry, ['attempts', 'last_error', 'next_attempt_at'])
+        sent += len(events) - len(errors)
+        if len(events) < batch_size:
+            return sent
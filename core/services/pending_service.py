@@ -0,0 +1,140 @@
+"""
+Approval-queue counters: one PendingStat row per master and super holding the pending Deposit,
+Withdraw and BonusRequest rows of the users below it (a player's request counts towards its master
+and its super, a master's towards its super), plus the platform queue (powerhouse) for every request.
+The platform count is split over PLATFORM_SHARDS rows (node ids -1 .. -PLATFORM_SHARDS, by user id) so
+concurrent requests do not all wait on one row; pending_counts(PLATFORM) sums them (with a node
+PLATFORM row, when one is left from before the split).
+Updated in the same transaction as each change, one INSERT ... ON CONFLICT increment per change:
+  created pending, rejected with save(), deleted while pending   core.signals
+  approved                                                      ledger_service.approve_pending
+  bulk rejected                                                 bulk_approval_service.reject_many
+The new counts of every touched queue are pushed to its "pending" stream topic after commit, so
+admin dashboards need not poll. rebuild_pending_stats recomputes queues (management command:
+rebuild_pending_stats); hierarchy_service rebuilds the queues a user moved between.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Mod
+
+from core.channel_utils import broadcast_pending_counts
+from core.models import BonusRequest, Deposit, PendingStat, User, UserRole, Withdraw
+from core.utils.upsert import upsert_increment
+
+PLATFORM = 0
+PLATFORM_SHARDS = 16
+
+COUNTER_BY_MODEL = {
+    Deposit: 'deposits',
+    Withdraw: 'withdrawals',
+    BonusRequest: 'bonus_requests',
+}
+COUNTERS = list(COUNTER_BY_MODEL.values())
+
+
+def queue_node(user):
+    """PendingStat node of the queue user approves from: own id (master / super), PLATFORM (powerhouse), else None."""
+    if user.role == UserRole.POWERHOUSE:
+        return PLATFORM
+    if user.role in (UserRole.MASTER, UserRole.SUPER):
+        return user.pk
+    return None
+
+
+def _platform_shard(user_id):
+    return -1 - user_id % PLATFORM_SHARDS
+
+
+def _nodes(user_id, master_id, super_id):
+    return [_platform_shard(user_id)] + [node for node in (master_id, super_id) if node and node != user_id]
+
+
+def request_upline(request_obj):
+    """(user_id, master_id, super_id) of a Deposit / Withdraw / BonusRequest's user."""
+    if type(request_obj).user.is_cached(request_obj):
+        user = request_obj.user
+        return (user.pk, user.master_id, user.super_id)
+    master_id, super_id = User.objects.filter(pk=request_obj.user_id).values_list('master_id', 'super_id').first() or (None, None)
+    return (request_obj.user_id, master_id, super_id)
+
+
+def pending_counts(node):
+    """{'deposits', 'withdrawals', 'bonus_requests'} of the queue at node (zeros when it has none)."""
+    if node == PLATFORM:
+        return PendingStat.objects.filter(node_id__lte=PLATFORM).aggregate(
+            **{counter: Coalesce(Sum(counter), 0) for counter in COUNTERS}
+        )
+    row = PendingStat.objects.filter(node_id=node).values(*COUNTERS).first()
+    return row or dict.fromkeys(COUNTERS, 0)
+
+
+def _broadcast(nodes):
+    """Push the counts of the queues at nodes; platform shards are pushed as one PLATFORM total."""
+    nodes = sorted({PLATFORM if node <= PLATFORM else node for node in nodes})
+    queues = [node for node in nodes if node != PLATFORM]
+    rows = {row['node_id']: row for row in PendingStat.objects.filter(node_id__in=queues).values('node_id', *COUNTERS)}
+    counts = {node: {counter: rows.get(node, {}).get(counter, 0) for counter in COUNTERS} for node in queues}
+    if PLATFORM in nodes:
+        counts[PLATFORM] = pending_counts(PLATFORM)
+    broadcast_pending_counts(counts)
+
+
+def record_changes(model, uplines, delta):
+    """
+    Add delta (+1 entered pending, -1 left it) to model's counter in the queues above each
+    (user_id, master_id, super_id) in uplines, and push the new counts.
+    """
+    counter = COUNTER_BY_MODEL[model]
+    totals = {}
+    for user_id, master_id, super_id in uplines:
+        for node in _nodes(user_id, master_id, super_id):
+            totals[node] = totals.get(node, 0) + delta
+    # Sorted by node, so concurrent writers lock the rows in the same order.
+    rows = [{'node_id': node, counter: totals[node]} for node in sorted(totals) if totals[node]]
+    if not rows:
+        return
+    upsert_increment(PendingStat, ['node_id'], COUNTERS, rows)
+    _broadcast([row['node_id'] for row in rows])
+
+
+def rebuild_pending_stats(node_ids=None):
+    """
+    Recompute PendingStat for node_ids (None = PLATFORM and every super and master; PLATFORM stands
+    for all of its shards) from the pending requests, in one transaction, and push the new counts.
+    Returns the number of rows written.
+    """
+    if node_ids is not None:
+        node_ids = set(node_ids)
+        if PLATFORM in node_ids:
+            node_ids.update(range(-PLATFORM_SHARDS, PLATFORM))
+    stats = {}
+
+    def stat(node):
+        if node not in stats:
+            stats[node] = PendingStat(node_id=node)
+        return stats[node]
+
+    with transaction.atomic():
+        stale = PendingStat.objects.all()
+        if node_ids is not None:
+            stale = stale.filter(node_id__in=node_ids)
+        changed = set(stale.values_list('node_id', flat=True)) | (node_ids or set())
+        stale.delete()
+
+        for model, counter in COUNTER_BY_MODEL.items():
+            pending = model.objects.filter(status='pending')
+            if node_ids is None or PLATFORM in node_ids:
+                shards = pending.order_by().values(shard=Mod('user_id', PLATFORM_SHARDS)).annotate(n=Count('id'))
+                for r in shards:
+                    setattr(stat(-1 - r['shard']), counter, r['n'])
+            for field in ('master', 'super'):
+                rows = pending.filter(**{f'user__{field}__isnull': False}).exclude(**{f'user__{field}': F('user')})
+                if node_ids is not None:
+                    rows = rows.filter(**{f'user__{field}_id__in': node_ids})
+                for r in rows.values(f'user__{field}_id').annotate(n=Count('id')):
+                    node = stat(r[f'user__{field}_id'])
+                    setattr(node, counter, getattr(node, counter) + r['n'])
+
+        PendingStat.objects.bulk_create(stats.values(), batch_size=1000)
+        _broadcast(sorted(changed | set(stats)))
+    return len(stats)
@@ -0,0 +1,96 @@
+"""
+Master P/L write-behind: callbacks append PLDelta rows instead of updating the master row;
+compact_pl_deltas folds them into User.pl_balance. Reads add pending rows to pl_balance so the
+value is always exact, whether or not compaction has run.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from core.models import User, UserRole, PLDelta
+
+COMPACT_BATCH_SIZE = 5000
+
+
+def record_pl_deltas(deltas):
+    """Append journal rows. deltas: {master_id: amount}; zero amounts are skipped."""
+    rows = [PLDelta(master_id=master_id, amount=amount) for master_id, amount in deltas.items() if amount]
+    if len(rows) == 1:
+        rows[0].save()
+    elif rows:
+        PLDelta.objects.bulk_create(rows)
+
+
+def _pending_subquery():
+    return Subquery(
+        PLDelta.objects.filter(master_id=OuterRef('pk'))
+        .values('master_id')
+        .annotate(total=Sum('amount'))
+        .values('total')[:1]
+    )
+
+
+def annotate_pending_pl(queryset):
+    """Annotate _pending_pl on a User queryset so get_pl_balance needs no extra query per row."""
+    return queryset.annotate(_pending_pl=_pending_subquery())
+
+
+def pending_pl(master_ids):
+    """{master_id: pending Decimal} for the given masters (one grouped query)."""
+    rows = (
+        PLDelta.objects.filter(master_id__in=master_ids)
+        .values('master_id')
+        .annotate(total=Sum('amount'))
+        .values_list('master_id', 'total')
+    )
+    return {master_id: total or Decimal('0') for master_id, total in rows}
+
+
+def get_pl_balance(user):
+    """
+    Exact P/L for user: pl_balance plus pending journal rows. Only masters have journal rows.
+    Uses the _pending_pl annotation when present; otherwise base and pending are read in one
+    statement so a concurrent compaction can never be half-observed.
+    """
+    if hasattr(user, '_pending_pl'):
+        return (user.pl_balance or Decimal('0')) + (user._pending_pl or Decimal('0'))
+    if user.role != UserRole.MASTER or user.pk is None:
+        return user.pl_balance or Decimal('0')
+    row = (
+        User.objects.filter(pk=user.pk)
+        .annotate(_pending_pl=Coalesce(_pending_subquery(), Decimal('0')))
+        .values_list('pl_balance', '_pending_pl')
+        .first()
+    )
+    if row is None:
+        return user.pl_balance or Decimal('0')
+    return (row[0] or Decimal('0')) + (row[1] or Decimal('0'))
+
+
+def compact_pl_deltas(master_ids=None, batch_size=COMPACT_BATCH_SIZE):
+    """
+    Fold pending journal rows into User.pl_balance. Each batch runs in one transaction: rows are
+    read with FOR UPDATE, summed per master, applied with F() (ascending master id) and deleted by
+    id, so exactly the rows that were summed are removed. Returns the number of rows folded.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            qs = PLDelta.objects.select_for_update().order_by('pk')
+            if master_ids is not None:
+                qs = qs.filter(master_id__in=master_ids)
+            rows = list(qs.values_list('pk', 'master_id', 'amount')[:batch_size])
+            if not rows:
+                return folded
+            totals = {}
+            for _pk, master_id, amount in rows:
+                totals[master_id] = totals.get(master_id, Decimal('0')) + amount
+            for master_id in sorted(totals):
+                if totals[master_id]:
+                    User.objects.filter(pk=master_id).update(pl_balance=F('pl_balance') + totals[master_id])
+            PLDelta.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        folded += len(rows)
+        if len(rows) < batch_size:
+            return folded
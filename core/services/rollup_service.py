@@ -0,0 +1,264 @@
+"""
+Daily analytics rollups: DailyStat (per day), DailyGameStat (per day, player, game) and
+DailyUserStat (per day, user). Writers call the record_* helpers in the same transaction as the
+event they count; each helper is one INSERT ... ON CONFLICT/DUPLICATE KEY increment, so a rollup
+row never needs a read or a lock of its own. rebuild_rollups recomputes any date range from the
+raw tables (management command: rebuild_rollups).
+Days are calendar days in the current time zone, matching core.utils.date_ranges. Every write
+invalidates the affected day in core.analytics_cache.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core import analytics_cache
+from core.models import (
+    User,
+    UserRole,
+    GameLog,
+    Deposit,
+    Withdraw,
+    ActivityLog,
+    ActivityAction,
+    Transaction,
+    TransactionType,
+    DailyStat,
+    DailyGameStat,
+    DailyUserStat,
+)
+from core.utils.date_ranges import day_start, day_end
+from core.utils.upsert import upsert_increment
+
+ZERO = Decimal('0')
+
+# Counter columns per rollup model; every insert writes all of them (missing values count as 0).
+COUNTERS = {
+    DailyStat: [
+        'new_players', 'deposit_count', 'deposit_amount', 'withdraw_count', 'withdraw_amount',
+        'bonus_count', 'bonus_amount',
+    ],
+    DailyGameStat: ['bet_count', 'bet_amount', 'win_amount', 'lose_amount'],
+    DailyUserStat: [
+        'deposit_count', 'deposit_amount', 'withdraw_count', 'withdraw_amount', 'login_count', 'activity_count',
+    ],
+}
+
+
+def _upsert_increment(model, key_fields, rows, insert_only=()):
+    """Add rows into model (see core.utils.upsert) and invalidate the cached days they touch."""
+    if not rows:
+        return
+    upsert_increment(model, key_fields, COUNTERS[model], rows, insert_only=insert_only)
+    for day in {row['date'] for row in rows}:
+        analytics_cache.invalidate_day(day)
+
+
+def _local_date(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+# --- Incremental writers ---
+
+def game_log_values(game_log):
+    """(bet, win, lose) of a GameLog before it is changed; None for a log not yet written."""
+    if game_log is None:
+        return None
+    return (game_log.bet_amount, game_log.win_amount, game_log.lose_amount)
+
+
+def record_game_logs(user, master_id, entries):
+    """
+    Apply GameLog writes to DailyGameStat. entries: (game_log, old_values or None, new_values)
+    after the logs are saved (created_at set); old_values None counts a new round.
+    """
+    totals = {}
+    for game_log, old, new in entries:
+        key = (_local_date(game_log.created_at), game_log.game_id)
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = {
+                'date': key[0], 'user_id': user.pk, 'game_id': game_log.game_id,
+                'provider_id': game_log.provider_id, 'master_id': master_id,
+                'bet_count': 0, 'bet_amount': ZERO, 'win_amount': ZERO, 'lose_amount': ZERO,
+            }
+        if old is None:
+            row['bet_count'] += 1
+            old = (ZERO, ZERO, ZERO)
+        row['bet_amount'] += new[0] - old[0]
+        row['win_amount'] += new[1] - old[1]
+        row['lose_amount'] += new[2] - old[2]
+    rows = [
+        totals[key] for key in sorted(totals)
+        if any(totals[key][name] for name in COUNTERS[DailyGameStat])
+    ]
+    _upsert_increment(DailyGameStat, ['date', 'user_id', 'game_id'], rows, insert_only=['provider_id', 'master_id'])
+
+
+def _record_user_and_day(day, user_id, **counters):
+    """Same counters into DailyUserStat (day, user) and DailyStat (day)."""
+    _upsert_increment(DailyUserStat, ['date', 'user_id'], [dict(date=day, user_id=user_id, **counters)])
+    _upsert_increment(DailyStat, ['date'], [dict(date=day, **counters)])
+
+
+def record_deposit_approved(deposit):
+    _record_user_and_day(
+        _local_date(deposit.created_at), deposit.user_id, deposit_count=1, deposit_amount=deposit.amount,
+    )
+
+
+def record_withdraw_approved(withdrawal):
+    _record_user_and_day(
+        _local_date(withdrawal.created_at), withdrawal.user_id, withdraw_count=1, withdraw_amount=withdrawal.amount,
+    )
+
+
+def record_activity(activity_log):
+    if not activity_log.user_id:
+        return
+    _upsert_increment(
+        DailyUserStat,
+        ['date', 'user_id'],
+        [{
+            'date': _local_date(activity_log.created_at),
+            'user_id': activity_log.user_id,
+            'activity_count': 1,
+            'login_count': 1 if activity_log.action == ActivityAction.LOGIN else 0,
+        }],
+    )
+
+
+def record_new_player(user):
+    _upsert_increment(DailyStat, ['date'], [{'date': _local_date(user.created_at), 'new_players': 1}])
+
+
+def record_bonus_transaction(tx):
+    record_bonus_transactions([tx])
+
+
+def record_bonus_transactions(txs):
+    """BONUS transactions written with bulk_create (no post_save), summed per day into one statement."""
+    days = {}
+    for tx in txs:
+        day = days.setdefault(_local_date(tx.created_at), {'bonus_count': 0, 'bonus_amount': ZERO})
+        day['bonus_count'] += 1
+        day['bonus_amount'] += tx.amount
+    _upsert_increment(DailyStat, ['date'], [dict(date=day, **counters) for day, counters in sorted(days.items())])
+
+
+# --- Rebuild ---
+
+def rebuild_rollups(date_from=None, date_to=None):
+    """
+    Recompute all rollups for date_from..date_to inclusive (None = unbounded) from GameLog, Deposit,
+    Withdraw, ActivityLog, Transaction and User in one transaction. Returns rows written per table.
+    """
+    raw = {}
+    rollup_range = {}
+    if date_from is not None:
+        raw['created_at__gte'] = day_start(date_from)
+        rollup_range['date__gte'] = date_from
+    if date_to is not None:
+        raw['created_at__lt'] = day_end(date_to)
+        rollup_range['date__lte'] = date_to
+
+    with transaction.atomic():
+        DailyGameStat.objects.filter(**rollup_range).delete()
+        DailyUserStat.objects.filter(**rollup_range).delete()
+        DailyStat.objects.filter(**rollup_range).delete()
+
+        game_rows = (
+            GameLog.objects.filter(**raw)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'user_id', 'game_id', 'provider_id', 'master_id')
+            .annotate(
+                bet_count=Count('id'),
+                bet_amount=Sum('bet_amount'),
+                win_amount=Sum('win_amount'),
+                lose_amount=Sum('lose_amount'),
+            )
+        )
+        game_stats = {}
+        for r in game_rows:
+            key = (r['day'], r['user_id'], r['game_id'])
+            stat = game_stats.get(key)
+            if stat is None:
+                master_id = r['master_id'] if r['master_id'] != r['user_id'] else None
+                stat = game_stats[key] = DailyGameStat(
+                    date=r['day'], user_id=r['user_id'], game_id=r['game_id'],
+                    provider_id=r['provider_id'], master_id=master_id,
+                )
+            stat.bet_count += r['bet_count']
+            stat.bet_amount += r['bet_amount'] or ZERO
+            stat.win_amount += r['win_amount'] or ZERO
+            stat.lose_amount += r['lose_amount'] or ZERO
+        DailyGameStat.objects.bulk_create(game_stats.values(), batch_size=1000)
+
+        user_stats = {}
+        day_stats = {}
+
+        def user_stat(day, user_id):
+            if (day, user_id) not in user_stats:
+                user_stats[(day, user_id)] = DailyUserStat(date=day, user_id=user_id)
+            return user_stats[(day, user_id)]
+
+        def day_stat(day):
+            if day not in day_stats:
+                day_stats[day] = DailyStat(date=day)
+            return day_stats[day]
+
+        for model, prefix in ((Deposit, 'deposit'), (Withdraw, 'withdraw')):
+            rows = (
+                model.objects.filter(status='approved', **raw)
+                .annotate(day=TruncDate('created_at'))
+                .values('day', 'user_id')
+                .annotate(n=Count('id'), total=Sum('amount'))
+            )
+            for r in rows:
+                for stat in (user_stat(r['day'], r['user_id']), day_stat(r['day'])):
+                    setattr(stat, f'{prefix}_count', getattr(stat, f'{prefix}_count') + r['n'])
+                    setattr(stat, f'{prefix}_amount', getattr(stat, f'{prefix}_amount') + (r['total'] or ZERO))
+
+        activity_rows = (
+            ActivityLog.objects.filter(user__isnull=False, **raw)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'user_id')
+            .annotate(n=Count('id'), logins=Count('id', filter=Q(action=ActivityAction.LOGIN)))
+        )
+        for r in activity_rows:
+            stat = user_stat(r['day'], r['user_id'])
+            stat.activity_count = r['n']
+            stat.login_count = r['logins']
+
+        bonus_rows = (
+            Transaction.objects.filter(transaction_type=TransactionType.BONUS, **raw)
+            .annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(n=Count('id'), total=Sum('amount'))
+        )
+        for r in bonus_rows:
+            stat = day_stat(r['day'])
+            stat.bonus_count = r['n']
+            stat.bonus_amount = r['total'] or ZERO
+
+        player_rows = (
+            User.objects.filter(role=UserRole.PLAYER, **raw)
+            .annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(n=Count('id'))
+        )
+        for r in player_rows:
+            day_stat(r['day']).new_players = r['n']
+
+        DailyUserStat.objects.bulk_create(user_stats.values(), batch_size=1000)
+        DailyStat.objects.bulk_create(day_stats.values(), batch_size=1000)
+        analytics_cache.clear()
+        transaction.on_commit(analytics_cache.clear)
+
+    return {
+        'daily_game_stats': len(game_stats),
+        'daily_user_stats': len(user_stats),
+        'daily_stats': len(day_stats),
+    }
@@ -1,48 +1,41 @@
 """Settlement: Super settles a master - master pl_balance to 0, master main_balance to super."""
 from decimal import Decimal
-from django.utils import timezone
+from django.db import transaction
 from core.models import (
     User,
     UserRole,
-    Transaction,
-    TransactionActionType,
     TransactionWallet,
     TransactionType,
-    TransactionStatus,
 )
+from core.services.downline_service import record_balance_change
+from core.services.ledger_service import Leg, lock_users, post_legs
+from core.services.pl_service import compact_pl_deltas
+
+ZERO = Decimal('0')
 
 
 def settle_master(master, super_user, pin=None):
     """
     Super settles a master: master pl_balance -> 0, master main_balance added to super main_balance, master main_balance -> 0.
+    The master row is locked first, then its pending P/L journal rows are folded, and the P/L that
+    is zeroed is read from the locked row, so a delta journaled meanwhile is either settled or left pending.
     Returns (True, None) or (False, error_message).
     """
     if super_user.role != UserRole.SUPER or master.role != UserRole.MASTER or master.parent_id != super_user.id:
         return False, 'Invalid settlement'
-    amount = master.main_balance or Decimal('0')
-    super_user.main_balance = (super_user.main_balance or Decimal('0')) + amount
-    super_user.save(update_fields=['main_balance'])
-    master.main_balance = Decimal('0')
-    master.pl_balance = Decimal('0')
-    master.save(update_fields=['main_balance', 'pl_balance'])
-    Transaction.objects.create(
-        user=master,
-        action_type=TransactionActionType.OUT,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.SETTLEMENT,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        to_user=super_user,
-        remarks='Settlement to super',
-    )
-    Transaction.objects.create(
-        user=super_user,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.SETTLEMENT,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=master,
-        remarks=f'Settlement from master {master.username}',
-    )
+    with transaction.atomic():
+        locked = lock_users([master.pk, super_user.pk])
+        compact_pl_deltas(master_ids=[master.pk])
+        pl_balance = User.objects.filter(pk=master.pk).values_list('pl_balance', flat=True).get() or ZERO
+        amount = locked[master.pk].main_balance or ZERO
+        post_legs(
+            [
+                Leg(master, TransactionWallet.MAIN_BALANCE, -amount, super_user, 'Settlement to super'),
+                Leg(super_user, TransactionWallet.MAIN_BALANCE, amount, master, f'Settlement from master {master.username}'),
+            ],
+            TransactionType.SETTLEMENT, check_funds=False, locked=locked,
+        )
+        User.objects.filter(pk=master.pk).update(pl_balance=ZERO)
+        locked[master.pk].pl_balance = master.pl_balance = ZERO
+        record_balance_change(master, pl=-pl_balance)
     return True, None
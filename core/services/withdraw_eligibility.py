@@ -1,10 +1,146 @@
 """
 Withdrawal eligibility for players: main withdrawable (after deposit + 1 game)
 and bonus withdrawable (after approved bonus + roll_required games).
+
+The counters live in one WithdrawEligibility row per player (created with the player), advanced in the
+same transaction as the events they count:
+  record_games            game callback, new rounds
+  record_deposit_approved first approved deposit: remember the game count at that point
+  record_bonus_approved   stamp BonusRequest.roll_base and raise the games the bonuses need
+  refresh_bonus_targets   a BonusRule's roll_required changed or the rule was deleted
+(the last two push the new rolls_needed to the player's balance socket)
+so a check is one row read (none when the user was loaded with select_related('withdraw_eligibility')).
+Players without a row (not backfilled yet) are computed from GameLog,
+Deposit and BonusRequest. rebuild_withdraw_eligibility recomputes rows and check_withdraw_eligibility
+reports drift (management command: rebuild_withdraw_eligibility [--check]).
 """
 from decimal import Decimal
 
-from core.models import Deposit, BonusRequest, GameLog
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import Coalesce, Greatest
+
+from core.channel_utils import broadcast_balances
+from core.models import Deposit, BonusRequest, GameLog, User, UserRole, WithdrawEligibility
+
+ZERO = Decimal('0')
+
+STATE_FIELDS = ['games_played', 'first_deposit_at', 'games_at_first_deposit', 'approved_bonuses', 'bonus_games_target']
+
+REBUILD_BATCH = 500
+
+
+def _roll_required(bonus_request):
+    rule = bonus_request.bonus_rule if bonus_request.bonus_rule_id else None
+    return (rule.roll_required or 0) if rule else 0
+
+
+# --- Incremental writers ---
+
+def record_games(user_id, count=1):
+    """count new GameLog rounds for user_id."""
+    if count:
+        WithdrawEligibility.objects.filter(user_id=user_id).update(games_played=F('games_played') + count)
+
+
+def record_deposit_approved(deposit):
+    """Start the main-wallet rule at the player's first approved deposit."""
+    WithdrawEligibility.objects.filter(user_id=deposit.user_id, first_deposit_at__isnull=True).update(
+        first_deposit_at=deposit.processed_at,
+        games_at_first_deposit=F('games_played'),
+    )
+
+
+def record_bonus_approved(bonus_request):
+    """Stamp roll_base on a just-approved bonus request and raise its player's bonus target."""
+    with transaction.atomic():
+        state = WithdrawEligibility.objects.select_for_update().filter(user_id=bonus_request.user_id)
+        row = state.values_list('games_played', 'bonus_games_target').first()
+        if row is None:
+            return
+        games, target = row
+        bonus_request.roll_base = games
+        BonusRequest.objects.filter(pk=bonus_request.pk).update(roll_base=games)
+        state.update(
+            approved_bonuses=F('approved_bonuses') + 1,
+            bonus_games_target=Greatest('bonus_games_target', games + _roll_required(bonus_request)),
+        )
+        target = max(target, games + _roll_required(bonus_request))
+        broadcast_balances({bonus_request.user_id: {'rolls_needed': max(0, target - games)}})
+
+
+def refresh_bonus_targets(user_ids):
+    """
+    Recompute approved_bonuses / bonus_games_target of user_ids from their approved requests' roll_base
+    and current roll_required: one grouped query and one bulk update.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    totals = {
+        r['user_id']: r for r in (
+            BonusRequest.objects.filter(user_id__in=user_ids, status='approved')
+            .values('user_id')
+            .annotate(
+                n=Count('id'),
+                target=Max(F('roll_base') + Coalesce('bonus_rule__roll_required', 0)),
+            )
+        )
+    }
+    states = list(WithdrawEligibility.objects.filter(user_id__in=user_ids))
+    for state in states:
+        r = totals.get(state.user_id, {})
+        state.approved_bonuses = r.get('n') or 0
+        state.bonus_games_target = r.get('target') or 0
+    WithdrawEligibility.objects.bulk_update(states, ['approved_bonuses', 'bonus_games_target'], batch_size=1000)
+    broadcast_balances({state.user_id: {'rolls_needed': get_rolls_needed(state)} for state in states})
+
+
+# --- Read ---
+
+def _computed_state(user_id):
+    """
+    (unsaved WithdrawEligibility, {bonus_request_id: roll_base}) for user_id from the raw tables: one
+    conditional aggregate over the player's GameLogs counts the games up to each cut-off. An approved
+    request without processed_at (approved outside approve_bonus_request) rolls from the games played
+    now, so it counts as met once roll_required more games are played (at once when that is 0).
+    """
+    first_deposit_at = (
+        Deposit.objects.filter(user_id=user_id, status='approved', processed_at__isnull=False)
+        .aggregate(first=Min('processed_at'))['first']
+    )
+    bonuses = list(
+        BonusRequest.objects.filter(user_id=user_id, status='approved')
+        .values_list('pk', 'processed_at', 'bonus_rule__roll_required')
+    )
+    cutoffs = {'games_played': Count('id')}
+    if first_deposit_at:
+        cutoffs['at_first_deposit'] = Count('id', filter=Q(created_at__lte=first_deposit_at))
+    for pk, processed_at, _roll in bonuses:
+        if processed_at:
+            cutoffs[f'bonus_{pk}'] = Count('id', filter=Q(created_at__lte=processed_at))
+    counts = GameLog.objects.filter(user_id=user_id).aggregate(**cutoffs)
+
+    games = counts['games_played']
+    roll_bases = {}
+    target = 0
+    for pk, processed_at, roll_required in bonuses:
+        roll_bases[pk] = counts[f'bonus_{pk}'] if processed_at else games
+        target = max(target, roll_bases[pk] + (roll_required or 0))
+    state = WithdrawEligibility(
+        user_id=user_id,
+        games_played=games,
+        first_deposit_at=first_deposit_at,
+        games_at_first_deposit=counts.get('at_first_deposit', 0),
+        approved_bonuses=len(bonuses),
+        bonus_games_target=target,
+    )
+    return state, roll_bases
+
+
+def get_rolls_needed(state):
+    """Games state's player still has to play before the bonus is withdrawable."""
+    return max(0, state.bonus_games_target - state.games_played) if state.approved_bonuses else 0
 
 
 def get_withdraw_eligibility(user):
@@ -16,72 +152,78 @@ def get_withdraw_eligibility(user):
       total_withdrawable: main_withdrawable + bonus_withdrawable
       can_withdraw_main: bool
       can_withdraw_bonus: bool
+      rolls_needed: games still needed before the bonus is withdrawable
     """
-    main_balance = user.main_balance or Decimal('0')
-    bonus_balance = user.bonus_balance or Decimal('0')
-
-    # Main: need at least one approved deposit and at least one game after earliest such deposit
-    first_approved = (
-        Deposit.objects.filter(user=user, status='approved')
-        .order_by('processed_at')
-        .values_list('processed_at', flat=True)
-        .first()
-    )
-    if not first_approved:
-        main_withdrawable = Decimal('0')
-        can_withdraw_main = False
-    else:
-        has_game_after_deposit = GameLog.objects.filter(
-            user=user,
-            created_at__gt=first_approved,
-        ).exists()
-        if not has_game_after_deposit:
-            main_withdrawable = Decimal('0')
-            can_withdraw_main = False
-        else:
-            main_withdrawable = main_balance
-            can_withdraw_main = True
-
-    # Bonus: need at least one approved bonus request; for every approved request,
-    # games played after its processed_at must be >= bonus_rule.roll_required
-    approved_bonus_requests = list(
-        BonusRequest.objects.filter(user=user, status='approved').select_related('bonus_rule')
-    )
-    rolls_needed = 0  # remaining games the player must play before bonus is withdrawable
-    if not approved_bonus_requests:
-        bonus_withdrawable = Decimal('0')
-        can_withdraw_bonus = False
-    else:
-        all_rolls_met = True
-        max_remaining = 0
-        for req in approved_bonus_requests:
-            roll_required = (req.bonus_rule.roll_required or 0) if req.bonus_rule else 0
-            if not req.processed_at:
-                all_rolls_met = False
-                max_remaining = max(max_remaining, roll_required)
-                continue
-            count = GameLog.objects.filter(
-                user=user,
-                created_at__gt=req.processed_at,
-            ).count()
-            remaining = max(0, roll_required - count)
-            if remaining > 0:
-                all_rolls_met = False
-            max_remaining = max(max_remaining, remaining)
-        rolls_needed = max_remaining
-        if not all_rolls_met:
-            bonus_withdrawable = Decimal('0')
-            can_withdraw_bonus = False
-        else:
-            bonus_withdrawable = bonus_balance
-            can_withdraw_bonus = True
-
-    total_withdrawable = main_withdrawable + bonus_withdrawable
+    try:
+        state = user.withdraw_eligibility
+    except WithdrawEligibility.DoesNotExist:
+        state, _roll_bases = _computed_state(user.pk)
+
+    # Main: at least one approved deposit and at least one game after the earliest one
+    can_withdraw_main = bool(state.first_deposit_at) and state.games_played > state.games_at_first_deposit
+    main_withdrawable = (user.main_balance or ZERO) if can_withdraw_main else ZERO
+
+    # Bonus: at least one approved bonus request and roll_required games since each was approved
+    rolls_needed = get_rolls_needed(state)
+    can_withdraw_bonus = state.approved_bonuses > 0 and rolls_needed == 0
+    bonus_withdrawable = (user.bonus_balance or ZERO) if can_withdraw_bonus else ZERO
+
     return {
         'main_withdrawable': main_withdrawable,
         'bonus_withdrawable': bonus_withdrawable,
-        'total_withdrawable': total_withdrawable,
+        'total_withdrawable': main_withdrawable + bonus_withdrawable,
         'can_withdraw_main': can_withdraw_main,
         'can_withdraw_bonus': can_withdraw_bonus,
         'rolls_needed': rolls_needed,
     }
+
+
+# --- Rebuild / check ---
+
+def _players(user_ids):
+    players = User.objects.filter(role=UserRole.PLAYER)
+    if user_ids is not None:
+        players = players.filter(pk__in=user_ids)
+    return players.order_by('pk').values_list('pk', flat=True)
+
+
+def rebuild_withdraw_eligibility(user_ids=None):
+    """
+    Recompute WithdrawEligibility rows and BonusRequest.roll_base for user_ids (None = every player),
+    REBUILD_BATCH players per transaction. Returns the number of rows written.
+    """
+    ids = list(_players(user_ids))
+    written = 0
+    for start in range(0, len(ids), REBUILD_BATCH):
+        batch = ids[start:start + REBUILD_BATCH]
+        with transaction.atomic():
+            # Lock the players so callbacks and approvals wait for the batch instead of racing it.
+            list(User.objects.select_for_update().filter(pk__in=batch).values_list('pk', flat=True))
+            states, requests = [], []
+            for user_id in batch:
+                state, roll_bases = _computed_state(user_id)
+                states.append(state)
+                requests.extend(BonusRequest(pk=pk, roll_base=base) for pk, base in roll_bases.items())
+            WithdrawEligibility.objects.filter(user_id__in=batch).delete()
+            WithdrawEligibility.objects.bulk_create(states)
+            BonusRequest.objects.bulk_update(requests, ['roll_base'], batch_size=1000)
+        written += len(states)
+    return written
+
+
+def check_withdraw_eligibility(user_ids=None):
+    """(user_id, field, stored, expected) for every stored value that differs from a recomputation."""
+    stored = {
+        state.user_id: state for state in WithdrawEligibility.objects.filter(
+            user_id__in=_players(user_ids)
+        )
+    }
+    for user_id in _players(user_ids).iterator():
+        expected, _roll_bases = _computed_state(user_id)
+        state = stored.get(user_id)
+        if state is None:
+            yield user_id, 'row', None, 'missing'
+            continue
+        for field in STATE_FIELDS:
+            if getattr(state, field) != getattr(expected, field):
+                yield user_id, field, getattr(state, field), getattr(expected, field)
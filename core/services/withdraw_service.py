@@ -1,18 +1,15 @@
 """Withdraw approval: user deducted, parent added. Player must have at least one approved payment mode (parent's)."""
-from decimal import Decimal
-from django.utils import timezone
+from django.db import transaction
 from core.models import (
     UserRole,
     PaymentMode,
-    Withdraw,
     WithdrawWallet,
-    Transaction,
-    TransactionActionType,
     TransactionWallet,
     TransactionType,
-    TransactionStatus,
 )
 from core.notification_utils import notify_player_approval
+from core.services.ledger_service import InsufficientBalance, Leg, approve_pending, lock_users, post_legs
+from core.services.rollup_service import record_withdraw_approved
 from core.services.withdraw_eligibility import get_withdraw_eligibility
 
 
@@ -20,106 +17,74 @@ def _withdraw_ref(withdrawal):
     return (getattr(withdrawal, 'reference_id', None) or '').strip()
 
 
-def approve_withdraw(withdrawal, processed_by, pin=None, use_password=False):
+def _eligibility_error(user, wallet, amount):
+    """Why user may not withdraw amount from wallet (WithdrawWallet) now, or None."""
+    eligibility = get_withdraw_eligibility(user)
+    if wallet == WithdrawWallet.BONUS:
+        if not eligibility['can_withdraw_bonus']:
+            return 'Bonus is not withdrawable until bonus roll requirement is met.'
+        if amount > eligibility['bonus_withdrawable']:
+            return 'Insufficient bonus balance.'
+    else:
+        if not eligibility['can_withdraw_main']:
+            return 'Main balance is not withdrawable until at least one game is played after deposit.'
+        if amount > eligibility['main_withdrawable']:
+            return 'Insufficient balance'
+    return None
+
+
+def approve_withdraw(withdrawal, processed_by, pin=None, use_password=False, locked=None, notifications=None):
+    """
+    Approve a withdrawal (locked / notifications: see bulk_approval_service).
+    Returns (True, None) or (False, error_message).
+    """
     user = withdrawal.user
     amount = withdrawal.amount
     wref = _withdraw_ref(withdrawal)
+    out_wallet = TransactionWallet.MAIN_BALANCE
+    check_wallet = None
     if user.role == UserRole.SUPER and processed_by.role == UserRole.POWERHOUSE:
-        if (user.main_balance or Decimal('0')) < amount:
-            return False, 'Insufficient balance'
-        user.main_balance = (user.main_balance or Decimal('0')) - amount
-        user.save(update_fields=['main_balance'])
-        withdrawal.status = 'approved'
-        withdrawal.processed_by = processed_by
-        withdrawal.processed_at = timezone.now()
-        withdrawal.save(update_fields=['status', 'processed_by', 'processed_at'])
-        Transaction.objects.create(
-            user=user,
-            action_type=TransactionActionType.OUT,
-            wallet=TransactionWallet.MAIN_BALANCE,
-            transaction_type=TransactionType.WITHDRAW,
-            amount=amount,
-            status=TransactionStatus.SUCCESS,
-            remarks='Withdraw approved',
-            reference_id=wref,
-            processed_by=processed_by,
-        )
+        legs = [Leg(user, TransactionWallet.MAIN_BALANCE, -amount, remarks='Withdraw approved')]
+    else:
+        parent = user.parent
+        if not parent:
+            return False, 'User has no parent'
         if user.role == UserRole.PLAYER:
-            notify_player_approval(user, processed_by, f'Your withdrawal of ₹{amount} has been approved.')
-        return True, None
-    parent = user.parent
-    if not parent:
-        return False, 'User has no parent'
-    if user.role == UserRole.PLAYER:
-        # Bypass payment-method check when master/super/powerhouse withdraw for a player
-        if processed_by.role not in (UserRole.MASTER, UserRole.SUPER, UserRole.POWERHOUSE):
-            if not PaymentMode.objects.filter(user=user, status='approved').exists():
-                return False, 'At least one of the player\'s payment methods must be approved before withdrawal.'
-        # Re-check eligibility at approval time (player only; wallet = main or bonus)
-        wallet = getattr(withdrawal, 'wallet', None) or WithdrawWallet.MAIN
-        if wallet == WithdrawWallet.BONUS:
-            eligibility = get_withdraw_eligibility(user)
-            if not eligibility['can_withdraw_bonus']:
-                return False, 'Bonus is not withdrawable until bonus roll requirement is met.'
-            if amount > eligibility['bonus_withdrawable']:
-                return False, 'Insufficient bonus balance.'
-            user.bonus_balance = (user.bonus_balance or Decimal('0')) - amount
-            user.save(update_fields=['bonus_balance'])
-            out_wallet = TransactionWallet.BONUS_BALANCE
-        else:
+            # Bypass payment-method check when master/super/powerhouse withdraw for a player
+            if processed_by.role not in (UserRole.MASTER, UserRole.SUPER, UserRole.POWERHOUSE):
+                if not PaymentMode.objects.filter(user=user, status='approved').exists():
+                    return False, 'At least one of the player\'s payment methods must be approved before withdrawal.'
+            # Re-check eligibility at approval time (player only; wallet = main or bonus)
+            wallet = getattr(withdrawal, 'wallet', None) or WithdrawWallet.MAIN
+            if wallet == WithdrawWallet.BONUS:
+                check_wallet = WithdrawWallet.BONUS
+                out_wallet = TransactionWallet.BONUS_BALANCE
             # Main wallet: bypass game-after-deposit when master/super/powerhouse do manual withdrawal
-            manual_bypass = processed_by.role in (UserRole.MASTER, UserRole.SUPER, UserRole.POWERHOUSE)
-            if manual_bypass:
-                if amount > (user.main_balance or Decimal('0')):
-                    return False, 'Insufficient balance'
-                user.main_balance = (user.main_balance or Decimal('0')) - amount
-                user.save(update_fields=['main_balance'])
-                out_wallet = TransactionWallet.MAIN_BALANCE
-            else:
-                eligibility = get_withdraw_eligibility(user)
-                if not eligibility['can_withdraw_main']:
-                    return False, 'Main balance is not withdrawable until at least one game is played after deposit.'
-                if amount > eligibility['main_withdrawable']:
-                    return False, 'Insufficient balance'
-                user.main_balance = (user.main_balance or Decimal('0')) - amount
-                user.save(update_fields=['main_balance'])
-                out_wallet = TransactionWallet.MAIN_BALANCE
-    else:
-        # Non-player (e.g. master): main only
-        if (user.main_balance or Decimal('0')) < amount:
-            return False, 'Insufficient balance'
-        user.main_balance = (user.main_balance or Decimal('0')) - amount
-        user.save(update_fields=['main_balance'])
-        out_wallet = TransactionWallet.MAIN_BALANCE
-    parent.main_balance = (parent.main_balance or Decimal('0')) + amount
-    parent.save(update_fields=['main_balance'])
-    withdrawal.status = 'approved'
-    withdrawal.processed_by = processed_by
-    withdrawal.processed_at = timezone.now()
-    withdrawal.save(update_fields=['status', 'processed_by', 'processed_at'])
-    Transaction.objects.create(
-        user=user,
-        action_type=TransactionActionType.OUT,
-        wallet=out_wallet,
-        transaction_type=TransactionType.WITHDRAW,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        remarks='Withdraw approved',
-        reference_id=wref,
-        processed_by=processed_by,
-    )
-    Transaction.objects.create(
-        user=parent,
-        action_type=TransactionActionType.IN,
-        wallet=TransactionWallet.MAIN_BALANCE,
-        transaction_type=TransactionType.WITHDRAW,
-        amount=amount,
-        status=TransactionStatus.SUCCESS,
-        from_user=user,
-        remarks='Withdraw from ' + user.username,
-        reference_id=wref,
-        processed_by=processed_by,
-    )
+            elif processed_by.role not in (UserRole.MASTER, UserRole.SUPER, UserRole.POWERHOUSE):
+                check_wallet = WithdrawWallet.MAIN
+        # Non-player (e.g. master): main only; the ledger rejects a debit beyond the balance
+        legs = [
+            Leg(user, out_wallet, -amount, remarks='Withdraw approved'),
+            Leg(parent, TransactionWallet.MAIN_BALANCE, amount, user, 'Withdraw from ' + user.username),
+        ]
+    try:
+        with transaction.atomic():
+            if locked is None:
+                locked = lock_users(leg.user.pk for leg in legs)
+            # Checked under the player's lock (and with its current state), so a bonus approval or
+            # game committed since the withdrawal was loaded is taken into account.
+            if check_wallet is not None:
+                error = _eligibility_error(locked.get(user.pk, user), check_wallet, amount)
+                if error:
+                    return False, error
+            if not approve_pending(withdrawal, processed_by):
+                return False, 'Withdraw is not pending'
+            post_legs(legs, TransactionType.WITHDRAW, processed_by=processed_by, reference_id=wref, locked=locked)
+            record_withdraw_approved(withdrawal)
+    except InsufficientBalance:
+        if out_wallet == TransactionWallet.BONUS_BALANCE:
+            return False, 'Insufficient bonus balance.'
+        return False, 'Insufficient balance'
     if user.role == UserRole.PLAYER:
-        notify_player_approval(user, processed_by, f'Your withdrawal of ₹{amount} has been approved.')
+        notify_player_approval(user, processed_by, f'Your withdrawal of ₹{amount} has been approved.', batch=notifications)
     return True, None
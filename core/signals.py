@@ -0,0 +1,161 @@
+"""Model signal handlers. Connected in CoreConfig.ready()."""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core import catalog_cache, token_cache
+from core.channel_utils import broadcast_session_revoked
+from core.models import (
+    BonusRequest,
+    BonusRule,
+    Deposit,
+    Game,
+    GameProvider,
+    SuperSetting,
+    Transaction,
+    TransactionType,
+    User,
+    UserRole,
+    Withdraw,
+    WithdrawEligibility,
+)
+from core.services import (
+    downline_service,
+    hierarchy_service,
+    pending_service,
+    rollup_service,
+    withdraw_eligibility,
+)
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+@receiver(post_save, sender=GameProvider)
+@receiver(post_delete, sender=GameProvider)
+def invalidate_game_catalog(sender, **kwargs):
+    catalog_cache.invalidate_games()
+
+
+@receiver(post_save, sender=SuperSetting)
+@receiver(post_delete, sender=SuperSetting)
+def invalidate_game_settings(sender, **kwargs):
+    catalog_cache.invalidate_settings()
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    token_cache.revoke_users([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def revoke_user_tokens(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created or (update_fields is not None and set(update_fields) <= token_cache.VOLATILE_FIELDS):
+        return
+    token_cache.revoke_users([instance.pk])
+    if not instance.is_active and (update_fields is None or 'is_active' in update_fields):
+        # Deactivated: sockets opened with any of the user's tokens log out.
+        broadcast_session_revoked(instance.pk, '')
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    token_cache.revoke_users([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def sync_user_upline(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'parent', 'role'} & set(update_fields)):
+        return
+    if created:
+        hierarchy_service.stamp_new_user(instance)
+        downline_service.record_joined(instance)
+    elif hierarchy_service.expected_upline(instance) != (instance.master_id, instance.super_id):
+        hierarchy_service.refresh_upline(instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_downline_member(sender, instance, **kwargs):
+    downline_service.record_left(instance)
+
+
+@receiver(post_save, sender=User)
+def count_new_player(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.role == UserRole.PLAYER:
+        rollup_service.record_new_player(instance)
+
+
+@receiver(post_save, sender=Transaction)
+def count_bonus_transaction(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.transaction_type == TransactionType.BONUS:
+        rollup_service.record_bonus_transaction(instance)
+
+
+@receiver(post_save, sender=User)
+def create_withdraw_eligibility(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.role == UserRole.PLAYER:
+        WithdrawEligibility.objects.get_or_create(user=instance)
+
+
+def _approved_bonus_users(rule):
+    return set(
+        BonusRequest.objects.filter(bonus_rule=rule, status='approved').values_list('user_id', flat=True)
+    )
+
+
+@receiver(pre_save, sender=BonusRule)
+def remember_roll_required(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._previous_roll_required = (
+            BonusRule.objects.filter(pk=instance.pk).values_list('roll_required', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=BonusRule)
+def refresh_roll_targets(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_roll_required', None)
+    if not created and not raw and previous is not None and previous != instance.roll_required:
+        withdraw_eligibility.refresh_bonus_targets(_approved_bonus_users(instance))
+
+
+@receiver(pre_delete, sender=BonusRule)
+def remember_bonus_users(sender, instance, **kwargs):
+    instance._approved_bonus_users = _approved_bonus_users(instance)
+
+
+@receiver(post_delete, sender=BonusRule)
+def refresh_roll_targets_after_delete(sender, instance, **kwargs):
+    withdraw_eligibility.refresh_bonus_targets(getattr(instance, '_approved_bonus_users', ()))
+
+
+def _saves_status(update_fields):
+    return update_fields is None or 'status' in update_fields
+
+
+@receiver(pre_save, sender=Deposit)
+@receiver(pre_save, sender=Withdraw)
+@receiver(pre_save, sender=BonusRequest)
+def remember_request_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    # A save(update_fields=...) without status cannot move the request in or out of pending.
+    if not raw and instance.pk and not instance._state.adding and _saves_status(update_fields):
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Deposit)
+@receiver(post_save, sender=Withdraw)
+@receiver(post_save, sender=BonusRequest)
+def count_pending_request(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _saves_status(update_fields):
+        return
+    was_pending = not created and getattr(instance, '_previous_status', None) == 'pending'
+    is_pending = instance.status == 'pending'
+    if was_pending != is_pending:
+        pending_service.record_changes(sender, [pending_service.request_upline(instance)], 1 if is_pending else -1)
+
+
+@receiver(pre_delete, sender=Deposit)
+@receiver(pre_delete, sender=Withdraw)
+@receiver(pre_delete, sender=BonusRequest)
+def uncount_deleted_request(sender, instance, **kwargs):
+    # The stored status: the instance may carry an approval that was rolled back.
+    if sender.objects.filter(pk=instance.pk, status='pending').exists():
+        pending_service.record_changes(sender, [pending_service.request_upline(instance)], -1)
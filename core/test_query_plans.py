@@ -0,0 +1,125 @@
+"""
+EXPLAIN regression tests: every hot dashboard/report/callback query shape must be served by an
+index. A plan that falls back to a full table scan fails the test.
+"""
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Lower
+from django.test import TestCase
+
+from core.models import (
+    User,
+    UserRole,
+    GameLog,
+    Transaction,
+    TransactionType,
+    ActivityLog,
+    Deposit,
+    Withdraw,
+    Message,
+)
+from core.utils.date_ranges import day_range, day_start, day_end
+
+
+def full_scans(queryset):
+    """Plan lines that scan a core_* table end to end (SQLite 'SCAN core_x', MySQL type=ALL)."""
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        return [line for line in plan.splitlines() if re.search(r'\bSCAN core_\w+', line)]
+    if connection.vendor == 'mysql':
+        return [line for line in plan.splitlines() if line.split()[4:5] == ['ALL']]
+    return []
+
+
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.super_user = User.objects.create(username='plan_super', role=UserRole.SUPER)
+        cls.master = User.objects.create(username='plan_master', role=UserRole.MASTER, parent=cls.super_user)
+        cls.player = User.objects.create(username='plan_player', role=UserRole.PLAYER, parent=cls.master)
+        cls.date_from = date(2026, 1, 1)
+        cls.date_to = date(2026, 1, 31)
+
+    def assertIndexed(self, queryset):
+        if connection.vendor not in ('sqlite', 'mysql'):
+            self.skipTest('EXPLAIN parsing is implemented for SQLite and MySQL only')
+        scans = full_scans(queryset)
+        self.assertFalse(scans, f'full scan in plan:\n{queryset.explain()}')
+
+    def test_date_range_is_half_open(self):
+        rng = day_range(self.date_from, self.date_to)
+        self.assertEqual(rng['created_at__gte'], day_start('2026-01-01'))
+        self.assertEqual(rng['created_at__lt'], day_start(self.date_to + timedelta(days=1)))
+        self.assertEqual(day_end('2026-01-31'), rng['created_at__lt'])
+
+    def test_callback_round_lookup(self):
+        self.assertIndexed(GameLog.objects.filter(user=self.player, round='r-1').order_by('pk'))
+
+    def test_game_logs_in_range(self):
+        self.assertIndexed(
+            GameLog.objects.filter(**day_range(self.date_from, self.date_to))
+            .values('game_id')
+            .annotate(total=Sum('bet_amount'))
+        )
+        self.assertIndexed(
+            GameLog.objects.filter(**day_range(self.date_from), user__role=UserRole.PLAYER)
+        )
+        self.assertIndexed(GameLog.objects.filter(user=self.player, **day_range(self.date_from, self.date_to)))
+
+    def test_withdraw_eligibility_queries(self):
+        self.assertIndexed(
+            Deposit.objects.filter(user=self.player, status='approved')
+            .order_by('processed_at')
+            .values_list('processed_at', flat=True)
+        )
+        self.assertIndexed(GameLog.objects.filter(user=self.player, created_at__gt=day_start(self.date_from)))
+
+    def test_statement_queries(self):
+        self.assertIndexed(Transaction.objects.filter(user=self.player).order_by('-created_at'))
+        self.assertIndexed(
+            Transaction.objects.filter(created_at__gte=day_start(self.date_from), created_at__lt=day_end(self.date_to))
+            .order_by('-created_at')
+        )
+        self.assertIndexed(
+            Transaction.objects.filter(transaction_type=TransactionType.BONUS, **day_range(self.date_from))
+        )
+
+    def test_deposit_and_withdraw_dashboards(self):
+        for model in (Deposit, Withdraw):
+            self.assertIndexed(model.objects.filter(status='approved', **day_range(self.date_from, self.date_to)))
+            self.assertIndexed(model.objects.filter(status='pending').order_by('created_at'))
+            self.assertIndexed(model.objects.filter(user=self.player, **day_range(self.date_from, self.date_to)))
+
+    def test_reference_id_uniqueness_lookup(self):
+        for model in (Deposit, Withdraw):
+            self.assertIndexed(model.objects.annotate(_rlower=Lower('reference_id')).filter(_rlower='utr-1'))
+
+    def test_activity_log_queries(self):
+        self.assertIndexed(ActivityLog.objects.filter(**day_range(self.date_from, self.date_to)))
+        self.assertIndexed(ActivityLog.objects.filter(user=self.player, **day_range(self.date_from, self.date_to)))
+
+    def test_unread_messages(self):
+        self.assertIndexed(Message.objects.filter(receiver=self.master, is_read=False))
+        self.assertIndexed(Message.objects.filter(receiver=self.master, sender_id=self.player.pk, is_read=False))
+
+    def test_user_lookups(self):
+        self.assertIndexed(User.objects.filter(phone='9800000000'))
+        self.assertIndexed(User.objects.filter(role=UserRole.PLAYER, **day_range(self.date_from)))
+        self.assertIndexed(User.objects.filter(parent=self.master, role=UserRole.PLAYER))
+
+    def test_downline_queries(self):
+        self.assertIndexed(User.objects.filter(super=self.super_user, role=UserRole.PLAYER))
+        self.assertIndexed(User.objects.filter(master=self.master, role=UserRole.PLAYER))
+        self.assertIndexed(
+            GameLog.objects.filter(super=self.super_user, **day_range(self.date_from, self.date_to))
+            .exclude(user=self.super_user)
+        )
+        self.assertIndexed(GameLog.objects.filter(master=self.master).order_by('-created_at'))
+        self.assertIndexed(Transaction.objects.filter(master=self.master).order_by('-created_at'))
+        self.assertIndexed(
+            Transaction.objects.filter(super=self.super_user, **day_range(self.date_from, self.date_to))
+        )
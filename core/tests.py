@@ -1,3 +1,1250 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import os
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Count, Sum
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import analytics_cache, catalog_cache, token_cache
+from core.channel_utils import broadcast_new_message_to_receiver, broadcast_new_messages
+from core.consumers import TOPICS, StreamConsumer, balance_group, messages_group, pending_group
+from core.serializers import MeSerializer
+from core.services import balance_summary_service, game_callback_service
+from core.permissions import get_players_queryset, get_users_queryset_for_role
+from core.services.downline_service import rebuild_downline_stats
+from core.services.hierarchy_service import expected_upline
+from core.services.pl_service import compact_pl_deltas, get_pl_balance
+from core.services.bulk_approval_service import reject_many
+from core.services.outbox_service import dispatch_pending
+from core.services.pending_service import PLATFORM, pending_counts, queue_node, rebuild_pending_stats
+from core.services.rollup_service import rebuild_rollups
+from core.services.settlement_service import settle_master
+from core.services.withdraw_service import approve_withdraw
+from core.services.bonus_request_service import approve_bonus_request
+from core.services.deposit_service import approve_deposit
+from core.services.ledger_service import InsufficientBalance, Leg, post_legs
+from core.services.withdraw_eligibility import (
+    check_withdraw_eligibility,
+    get_withdraw_eligibility,
+    rebuild_withdraw_eligibility,
+    refresh_bonus_targets,
+)
+from core.utils.date_ranges import day_start
+from core.throttles import LoginIPThrottle
+from core.utils.cursor_pagination import _explain_estimate, estimated_count
+from core.utils.export import iter_queryset
+from core.utils.sliding_window import SQLiteStore
+from core.utils.time_series import bucket_starts, running_total, time_series
+from core.models import (
+    User,
+    UserRole,
+    GameCallbackReceipt,
+    PLDelta,
+    Game,
+    GameProvider,
+    GameCategory,
+    GameLog,
+    Transaction,
+    TransactionType,
+    Deposit,
+    Withdraw,
+    WithdrawWallet,
+    DailyStat,
+    DailyGameStat,
+    DailyUserStat,
+    DownlineStat,
+    BonusRequest,
+    BonusRule,
+    BonusType,
+    RewardType,
+    WithdrawEligibility,
+    OutboxEvent,
+    PendingStat,
+)
+
+
+class GameCallbackTestMixin:
+    """Shared fixture: master -> player, one provider/game with api_token."""
+
+    callback_url = '/api/callback/'
+
+    def setUp(self):
+        self.master = User.objects.create(username='master1', role=UserRole.MASTER)
+        self.player = User.objects.create(
+            username='player1',
+            role=UserRole.PLAYER,
+            parent=self.master,
+            main_balance=Decimal('1000.00'),
+        )
+        self.provider = GameProvider.objects.create(name='Prov', code='prov', api_token='tok')
+        self.category = GameCategory.objects.create(name='Slots')
+        self.game = Game.objects.create(
+            provider=self.provider, category=self.category, name='Game', game_uid='g-1',
+        )
+
+    def post_callback(self, **fields):
+        payload = {
+            'mobile': self.player.username,
+            'game_uid': self.game.game_uid,
+            'token': 'tok',
+            'bet_amount': '0',
+            'win_amount': '0',
+            'change': '0',
+        }
+        payload.update({k: str(v) for k, v in fields.items()})
+        return self.client.post(self.callback_url, payload, content_type='application/json')
+
+
+class GameCallbackTests(GameCallbackTestMixin, TestCase):
+
+    def _bet_and_result(self, game_round, before, bet, win):
+        after_bet = before - bet
+        r1 = self.post_callback(
+            game_round=game_round, bet_amount=bet, change=-bet,
+            wallet_before=before, wallet_after=after_bet,
+        )
+        r2 = self.post_callback(
+            game_round=game_round, win_amount=win, change=win,
+            wallet_before=after_bet, wallet_after=after_bet + win,
+        )
+        return r1, r2
+
+    def test_two_callback_round_updates_balances_and_ledger(self):
+        r1, r2 = self._bet_and_result('r-1', Decimal('1000'), Decimal('100'), Decimal('250'))
+        self.assertEqual(r1.status_code, 200)
+        self.assertEqual(r2.status_code, 200)
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.main_balance, Decimal('1150.00'))
+        self.assertEqual(get_pl_balance(self.master), Decimal('-150.00'))
+        log = GameLog.objects.get(user=self.player, round='r-1')
+        self.assertEqual(log.bet_amount, Decimal('100.00'))
+        self.assertEqual(log.before_balance, Decimal('1000.00'))
+        self.assertEqual(Transaction.objects.filter(user=self.player, transaction_type=TransactionType.PL).count(), 2)
+
+    def test_concurrent_balance_change_is_not_overwritten(self):
+        # A deposit lands between launch and callback; the callback must apply a delta, not overwrite.
+        User.objects.filter(pk=self.player.pk).update(main_balance=Decimal('1500.00'))
+        self.post_callback(
+            game_round='r-1', bet_amount='100', change='-100',
+            wallet_before='1000', wallet_after='900',
+        )
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.main_balance, Decimal('1400.00'))
+
+    def test_round_end_ack_is_a_no_op(self):
+        self._bet_and_result('r-1', Decimal('1000'), Decimal('100'), Decimal('0'))
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.post_callback(game_round='r-1', wallet_before='900', wallet_after='900')
+        self.assertEqual(r.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.main_balance, Decimal('900.00'))
+
+    def test_query_count_is_constant(self):
+        def count(fn):
+            with CaptureQueriesContext(connection) as ctx:
+                fn()
+            return len(ctx.captured_queries)
+
+        catalog_cache.get_game_by_uid(self.game.game_uid)
+        counts = []
+        for i in range(3):
+            before = Decimal('1000') - Decimal('50') * i
+            counts.append(count(lambda: self.post_callback(
+                game_round=f'r-{i}', bet_amount='100', change='-100',
+                wallet_before=before, wallet_after=before - 100,
+            )))
+            counts.append(count(lambda: self.post_callback(
+                game_round=f'r-{i}', win_amount='50', change='50',
+                wallet_before=before - 100, wallet_after=before - 50,
+            )))
+        self.assertEqual(len(set(counts[0::2])), 1, counts)
+        self.assertEqual(len(set(counts[1::2])), 1, counts)
+        # Receipt lookup, locked player, round lookup, GameLog write, wallet, P/L journal, daily
+        # rollup, downline totals, Transaction, receipt, balance-socket outbox event plus the
+        # transaction's SAVEPOINT/RELEASE pair (game is cached); a new round also bumps the withdraw
+        # eligibility game count.
+        self.assertLessEqual(counts[0], 14)
+        self.assertEqual(counts[0], counts[1] + 1)
+
+    def test_retried_callback_is_answered_from_receipt(self):
+        self._bet_and_result('r-1', Decimal('1000'), Decimal('100'), Decimal('250'))
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.post_callback(
+                game_round='r-1', win_amount='250', change='250',
+                wallet_before='900', wallet_after='1150',
+            )
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), {'status': 'ok'})
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.main_balance, Decimal('1150.00'))
+        self.assertEqual(get_pl_balance(self.master), Decimal('-150.00'))
+        self.assertEqual(Transaction.objects.filter(user=self.player, transaction_type=TransactionType.PL).count(), 2)
+        self.assertEqual(GameCallbackReceipt.objects.filter(user=self.player, round='r-1').count(), 2)
+
+    def test_invalid_token_rejected(self):
+        r = self.post_callback(game_round='r-1', token='bad', wallet_before='1000', wallet_after='900')
+        self.assertEqual(r.status_code, 403)
+        self.assertFalse(GameLog.objects.exists())
+
+
+class PLDeltaTests(GameCallbackTestMixin, TestCase):
+
+    def test_callback_journals_master_pl_until_compacted(self):
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        self.post_callback(game_round='r-2', bet_amount='50', change='-50', wallet_before='900', wallet_after='850')
+        self.master.refresh_from_db()
+        self.assertEqual(self.master.pl_balance, Decimal('0.00'))
+        self.assertEqual(get_pl_balance(self.master), Decimal('150.00'))
+
+        self.assertEqual(compact_pl_deltas(), 2)
+        self.assertFalse(PLDelta.objects.exists())
+        self.master.refresh_from_db()
+        self.assertEqual(self.master.pl_balance, Decimal('150.00'))
+        self.assertEqual(get_pl_balance(self.master), Decimal('150.00'))
+
+    def test_settlement_folds_pending_deltas(self):
+        super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        User.objects.filter(pk=self.master.pk).update(parent=super_user)
+        self.master.refresh_from_db()
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        ok, _msg = settle_master(self.master, super_user)
+        self.assertTrue(ok)
+        self.assertFalse(PLDelta.objects.exists())
+        self.assertEqual(get_pl_balance(self.master), Decimal('0.00'))
+
+    def test_settlement_zeroes_delta_journaled_before_compaction(self):
+        super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = super_user
+        self.master.save()
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+
+        def compact_after_late_delta(**kwargs):
+            self.post_callback(game_round='r-2', bet_amount='30', change='-30', wallet_before='900', wallet_after='870')
+            return compact_pl_deltas(**kwargs)
+
+        with mock.patch('core.services.settlement_service.compact_pl_deltas', side_effect=compact_after_late_delta):
+            ok, _msg = settle_master(self.master, super_user)
+        self.assertTrue(ok)
+        self.assertEqual(get_pl_balance(self.master), Decimal('0.00'))
+        self.assertEqual(DownlineStat.objects.get(node=super_user).masters_pl_balance, Decimal('0.00'))
+
+
+class DailyRollupTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        analytics_cache.clear()
+
+    def _snapshot(self):
+        return (
+            list(DailyGameStat.objects.order_by('date', 'user_id', 'game_id').values(
+                'date', 'user_id', 'game_id', 'provider_id', 'master_id',
+                'bet_count', 'bet_amount', 'win_amount', 'lose_amount',
+            )),
+            list(DailyUserStat.objects.order_by('date', 'user_id').values(
+                'date', 'user_id', 'deposit_count', 'deposit_amount', 'login_count', 'activity_count',
+            )),
+            list(DailyStat.objects.order_by('date').values(
+                'date', 'new_players', 'deposit_count', 'deposit_amount', 'bonus_count',
+            )),
+        )
+
+    def test_callbacks_and_approvals_update_rollups_incrementally(self):
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        self.post_callback(game_round='r-1', win_amount='250', change='250', wallet_before='900', wallet_after='1150')
+        self.post_callback(game_round='r-2', bet_amount='50', change='-50', wallet_before='1150', wallet_after='1100')
+        stat = DailyGameStat.objects.get(user=self.player, game=self.game)
+        self.assertEqual(stat.master_id, self.master.pk)
+        self.assertEqual(stat.bet_count, 2)
+        self.assertEqual(stat.bet_amount, Decimal('150.00'))
+        self.assertEqual(stat.win_amount, Decimal('250.00'))
+
+        self.master.main_balance = Decimal('500.00')
+        self.master.save(update_fields=['main_balance'])
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('200.00'))
+        ok, msg = approve_deposit(deposit, self.master)
+        self.assertTrue(ok, msg)
+        day = DailyStat.objects.get()
+        self.assertEqual(day.new_players, 1)
+        self.assertEqual((day.deposit_count, day.deposit_amount), (1, Decimal('200.00')))
+        self.assertEqual(DailyUserStat.objects.get(user=self.player).deposit_amount, Decimal('200.00'))
+
+        incremental = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_analytics_query_count_does_not_grow_with_range(self):
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='ph', role=UserRole.POWERHOUSE))
+        today = timezone.now().date()
+
+        def count(days):
+            date_from = (today - timedelta(days=days)).isoformat()
+            with CaptureQueriesContext(connection) as ctx:
+                r = client.get('/api/powerhouse/analytics/overview/', {'date_from': date_from})
+            self.assertEqual(r.status_code, 200)
+            return len(ctx.captured_queries), r.json()
+
+        short, body = count(3)
+        long, _body = count(400)
+        self.assertEqual(short, long)
+        self.assertEqual(Decimal(body['summary']['total_bet_amount']), Decimal('100'))
+
+
+class AnalyticsCacheTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        analytics_cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create(username='ph', role=UserRole.POWERHOUSE))
+
+    def overview(self):
+        r = self.api.get('/api/powerhouse/analytics/overview/', {
+            'date_from': (timezone.now().date() - timedelta(days=365)).isoformat(),
+        })
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_closed_days_are_cached_and_writes_invalidate_their_day(self):
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        self.overview()
+        before = analytics_cache.cache_stats()
+        self.overview()
+        after = analytics_cache.cache_stats()
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertEqual(after['hits'] - before['hits'], 2 * 366)
+
+        self.post_callback(game_round='r-2', bet_amount='50', change='-50', wallet_before='900', wallet_after='850')
+        body = self.overview()
+        # Only today's platform and game buckets were recomputed.
+        self.assertEqual(analytics_cache.cache_stats()['misses'] - after['misses'], 2)
+        self.assertEqual(Decimal(body['summary']['total_bet_amount']), Decimal('150'))
+        self.assertEqual(Decimal(body['daily'][-1]['bets']), Decimal('150'))
+
+        r = self.api.get('/api/powerhouse/analytics/cache-stats/')
+        self.assertGreater(r.json()['analytics']['hit_ratio'], 0)
+
+
+class TimeSeriesTests(TestCase):
+
+    def setUp(self):
+        self.player = User.objects.create(username='ts_player', role=UserRole.PLAYER)
+        for day, hour, amount in ((1, 9, '10'), (1, 9, '5'), (3, 20, '7')):
+            deposit = Deposit.objects.create(user=self.player, amount=Decimal(amount))
+            Deposit.objects.filter(pk=deposit.pk).update(
+                created_at=day_start(date(2026, 3, day)) + timedelta(hours=hour),
+            )
+
+    def test_daily_series_is_gap_filled(self):
+        series = time_series(
+            Deposit.objects.all(), {'n': Count('id'), 'total': Sum('amount')}, date(2026, 3, 1), date(2026, 3, 4),
+        )
+        self.assertEqual([p['bucket'] for p in series], [date(2026, 3, d) for d in range(1, 5)])
+        self.assertEqual([p['n'] for p in series], [2, 0, 1, 0])
+        self.assertEqual([p['total'] for p in series], [Decimal('15'), Decimal('0'), Decimal('7'), Decimal('0')])
+        running_total(series, 'total', 'running')
+        self.assertEqual(series[-1]['running'], Decimal('22'))
+
+    def test_hour_week_and_month_buckets(self):
+        hourly = time_series(Deposit.objects.all(), {'n': Count('id')}, date(2026, 3, 1), date(2026, 3, 1), bucket='hour')
+        self.assertEqual(len(hourly), 24)
+        self.assertEqual([p['n'] for p in hourly if p['n']], [2])
+        self.assertEqual(hourly[9]['bucket'], day_start(date(2026, 3, 1)) + timedelta(hours=9))
+
+        weekly = time_series(Deposit.objects.all(), {'n': Count('id')}, date(2026, 2, 20), date(2026, 3, 4), bucket='week')
+        self.assertEqual([p['bucket'] for p in weekly], [date(2026, 2, 16), date(2026, 2, 23), date(2026, 3, 2)])
+        self.assertEqual([p['n'] for p in weekly], [0, 2, 1])
+
+        self.assertEqual(
+            bucket_starts(date(2025, 12, 15), date(2026, 2, 1), 'month'),
+            [date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)],
+        )
+
+
+class DownlineStatTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = self.super_user
+        self.master.main_balance = Decimal('5000.00')
+        self.master.save()
+        self.player.refresh_from_db()
+
+    def stats(self):
+        rows = DownlineStat.objects.values()
+        return {row.pop('node_id'): row for row in rows if any(row[name] for name in row if name != 'node_id')}
+
+    def assertMatchesRebuild(self):
+        maintained = self.stats()
+        rebuild_downline_stats()
+        self.assertEqual(maintained, self.stats())
+
+    def test_counters_follow_joins_callbacks_and_deposits(self):
+        User.objects.create(username='player2', role=UserRole.PLAYER, parent=self.master, main_balance=Decimal('10'))
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('250.00'), status='pending')
+        self.assertEqual(approve_deposit(Deposit.objects.get(pk=deposit.pk), self.master), (True, None))
+
+        master_stat = DownlineStat.objects.get(node=self.master)
+        self.assertEqual(master_stat.players_count, 2)
+        self.assertEqual(master_stat.players_main_balance, Decimal('1160.00'))
+        super_stat = DownlineStat.objects.get(node=self.super_user)
+        self.assertEqual((super_stat.masters_count, super_stat.players_count), (1, 2))
+        self.assertEqual(super_stat.masters_main_balance, Decimal('4750.00'))
+        self.assertEqual(super_stat.masters_pl_balance, Decimal('100.00'))
+        self.assertMatchesRebuild()
+
+    def test_move_and_delete_keep_counters_exact(self):
+        other = User.objects.create(username='master2', role=UserRole.MASTER, parent=self.super_user)
+        self.player.parent = other
+        self.player.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(DownlineStat.objects.get(node=other).players_count, 1)
+        self.assertFalse(DownlineStat.objects.filter(node=self.master, players_count__gt=0).exists())
+        other.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(DownlineStat.objects.get(node=self.super_user).players_count, 0)
+
+    def test_list_serializer_reads_maintained_totals(self):
+        client = APIClient()
+        client.force_authenticate(self.super_user)
+        User.objects.create(username='player2', role=UserRole.PLAYER, parent=self.master)
+        with CaptureQueriesContext(connection) as one:
+            client.get('/api/super/masters/')
+        for i in range(5):
+            User.objects.create(username=f'm{i}', role=UserRole.MASTER, parent=self.super_user)
+        with CaptureQueriesContext(connection) as many:
+            r = client.get('/api/super/masters/')
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+        row = next(item for item in r.json() if item['username'] == 'master1')
+        self.assertEqual((row['players_count'], Decimal(row['users_balance'])), (2, Decimal('1000.00')))
+
+
+class BalanceSummaryTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        balance_summary_service.clear()
+        self.powerhouse = User.objects.create(username='ph', role=UserRole.POWERHOUSE)
+        self.super_user = User.objects.create(
+            username='super1', role=UserRole.SUPER, parent=self.powerhouse, main_balance=Decimal('700.00'),
+        )
+        self.master.parent = self.super_user
+        self.master.main_balance = Decimal('300.00')
+        self.master.save()
+
+    def test_header_totals_use_constant_queries(self):
+        with CaptureQueriesContext(connection) as few:
+            data = MeSerializer(self.powerhouse).data
+        self.assertEqual(Decimal(data['player_balance']), Decimal('1000.00'))
+        self.assertEqual(Decimal(data['total_balance']), Decimal('2000.00'))
+
+        balance_summary_service.clear()
+        for i in range(5):
+            User.objects.create(username=f'p{i}', role=UserRole.PLAYER, parent=self.master, main_balance=Decimal('1'))
+        with CaptureQueriesContext(connection) as many:
+            data = MeSerializer(self.powerhouse).data
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual(Decimal(data['player_balance']), Decimal('1005.00'))
+
+        with self.assertNumQueries(0):
+            balance_summary_service.platform_totals()
+
+    def test_super_and_master_headers_read_downline_totals(self):
+        data = MeSerializer(self.super_user).data
+        self.assertEqual(Decimal(data['master_balance']), Decimal('300.00'))
+        self.assertEqual(Decimal(data['player_balance']), Decimal('1000.00'))
+        self.assertEqual(Decimal(MeSerializer(self.master).data['player_balance']), Decimal('1000.00'))
+
+
+class UplineTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = self.super_user
+        self.master.save()
+        self.player.refresh_from_db()
+
+    def test_upline_is_stamped_on_create(self):
+        self.assertEqual((self.super_user.master_id, self.super_user.super_id), (None, self.super_user.pk))
+        self.assertEqual((self.master.master_id, self.master.super_id), (self.master.pk, self.super_user.pk))
+        self.assertEqual((self.player.master_id, self.player.super_id), (self.master.pk, self.super_user.pk))
+        self.assertEqual(expected_upline(self.player), (self.player.master_id, self.player.super_id))
+
+    def test_moving_player_restamps_user_and_logs(self):
+        self.post_callback(round='r-1', bet_amount='100', win_amount='0', change='-100')
+        other_super = User.objects.create(username='super2', role=UserRole.SUPER)
+        other = User.objects.create(username='master2', role=UserRole.MASTER, parent=other_super)
+        self.player.parent = other
+        self.player.save()
+
+        self.player.refresh_from_db()
+        self.assertEqual((self.player.master_id, self.player.super_id), (other.pk, other_super.pk))
+        self.assertFalse(GameLog.objects.filter(user=self.player).exclude(master=other, super=other_super).exists())
+        self.assertFalse(Transaction.objects.filter(user=self.player).exclude(master=other, super=other_super).exists())
+        self.assertFalse(DailyGameStat.objects.filter(user=self.player).exclude(master=other).exists())
+        self.assertFalse(User.objects.filter(super=self.super_user, role=UserRole.PLAYER).exists())
+
+    def test_moving_master_restamps_its_players(self):
+        other_super = User.objects.create(username='super2', role=UserRole.SUPER)
+        self.master.parent = other_super
+        self.master.save()
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.super_id, other_super.pk)
+        self.assertEqual(self.player.master_id, self.master.pk)
+
+    def test_super_downline_scopes(self):
+        other = User.objects.create(username='master2', role=UserRole.MASTER)
+        User.objects.create(username='player2', role=UserRole.PLAYER, parent=other)
+        downline = get_users_queryset_for_role(self.super_user)
+        self.assertEqual(set(downline.values_list('username', flat=True)), {'master1', 'player1'})
+        self.assertEqual(list(get_players_queryset(self.super_user)), [self.player])
+
+
+class CursorPaginationTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(self.master)
+        for _ in range(7):
+            self.add_transaction()
+
+    def add_transaction(self):
+        return Transaction.objects.create(
+            user=self.player, action_type='in', wallet='main_balance',
+            transaction_type=TransactionType.DEPOSIT, amount=Decimal('1.00'),
+        )
+
+    def test_pages_cover_every_row_once_while_rows_are_added(self):
+        seen = []
+        body = self.api.get('/api/master/transactions/', {'limit': 3, 'total': 'exact'}).json()
+        self.assertEqual(body['total'], 7)
+        while True:
+            seen += [row['id'] for row in body['results']]
+            self.add_transaction()
+            if not body['has_more']:
+                break
+            body = self.api.get('/api/master/transactions/', {'limit': 3, 'cursor': body['next_cursor']}).json()
+        expected = Transaction.objects.filter(master=self.master).order_by('-created_at', '-pk')
+        self.assertEqual(seen, list(expected.values_list('pk', flat=True))[-7:])
+
+    def test_without_params_returns_plain_list(self):
+        r = self.api.get('/api/master/transactions/')
+        self.assertEqual(len(r.json()), 7)
+        self.assertEqual(self.api.get('/api/master/transactions/', {'cursor': 'nope'}).status_code, 400)
+
+    def test_estimate_reads_explain_columns_by_name(self):
+        names = ['id', 'select_type', 'table', 'partitions', 'type', 'possible_keys', 'key', 'key_len', 'ref', 'rows', 'filtered', 'Extra']
+        plan = [
+            (1, 'PRIMARY', 'core_transaction', None, 'ref', None, 'master_idx', '8', 'const', 400, 50.0, 'Using where'),
+            (2, 'DEPENDENT SUBQUERY', 'core_user', None, 'eq_ref', 'PRIMARY', 'PRIMARY', '8', 'func', 1, 100.0, None),
+            (3, 'DERIVED', None, None, None, None, None, None, None, None, None, 'No tables used'),
+        ]
+        self.assertEqual(_explain_estimate(names, plan), 200)
+        self.assertIsNone(_explain_estimate(names, plan[2:]))
+        # Not MySQL: exact count.
+        self.assertEqual(estimated_count(Transaction.objects.all()), 7)
+
+    def test_accounting_sections(self):
+        full = self.api.get('/api/master/accounting-report/').json()
+        self.assertEqual(full['summary']['transactions_count'], 7)
+        self.assertEqual(len(full['transactions']), 7)
+        summary = self.api.get('/api/master/accounting-report/', {'section': 'summary'}).json()
+        self.assertEqual(summary, {'summary': full['summary']})
+        page = self.api.get('/api/master/accounting-report/', {'section': 'transactions', 'limit': 5}).json()
+        self.assertEqual([row['id'] for row in page['results']], [row['id'] for row in full['transactions'][:5]])
+        self.assertTrue(page['has_more'])
+
+
+class ExportTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(self.master)
+        for remarks in ('first', '=HYPERLINK("x")', 'third'):
+            Transaction.objects.create(
+                user=self.player, action_type='in', wallet='main_balance', remarks=remarks,
+                transaction_type=TransactionType.DEPOSIT, amount=Decimal('-5.00'), reference_id='ref',
+            )
+
+    def rows(self, response):
+        body = b''.join(response.streaming_content)
+        if response.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode())))
+
+    def test_csv_streams_filtered_rows(self):
+        r = self.api.get('/api/master/account-statement/export/', {'search': 'ref'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(r.streaming)
+        self.assertEqual(r['Content-Encoding'], 'gzip')
+        rows = self.rows(r)
+        self.assertEqual(rows[0][:2], ['Date', 'Transaction ID'])
+        self.assertEqual([row[6] for row in rows[1:]], ['third', "'=HYPERLINK(\"x\")", 'first'])
+        self.assertEqual(rows[1][3:5], ['0', '-5.00'])
+        r = self.api.get('/api/master/account-statement/export/', {'search': 'nothing'})
+        self.assertEqual(len(self.rows(r)), 1)
+
+    def test_xlsx(self):
+        r = self.api.get('/api/master/bonus-statement/export/', {'export_format': 'xlsx'})
+        self.assertIn('.xlsx', r['Content-Disposition'])
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(r.streaming_content)), read_only=True).active
+        self.assertEqual(len(list(sheet.iter_rows())), 1)
+        self.assertEqual(self.api.get('/api/master/bonus-statement/export/', {'export_format': 'pdf'}).status_code, 400)
+
+    def test_iter_queryset_batches_cover_every_row(self):
+        qs = Transaction.objects.filter(user=self.player)
+        expected = list(qs.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        with self.assertNumQueries(2):
+            self.assertEqual([tx.pk for tx in iter_queryset(qs, chunk_size=2)], expected)
+        self.assertEqual([u.pk for u in iter_queryset(User.objects.all(), chunk_size=1, by_pk=True)],
+                         sorted(User.objects.values_list('pk', flat=True)))
+
+
+class DWReportTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = self.super_user
+        self.master.save()
+        self.player2 = User.objects.create(username='player2', role=UserRole.PLAYER, parent=self.master)
+        for user, amount, status in ((self.player, '100', 'approved'), (self.player, '50', 'approved'),
+                                     (self.player2, '30', 'approved'), (self.player2, '999', 'pending')):
+            Deposit.objects.create(user=user, amount=Decimal(amount), status=status)
+        Withdraw.objects.create(user=self.player, amount=Decimal('20'), status='approved')
+        self.api = APIClient()
+        self.api.force_authenticate(self.super_user)
+
+    def test_totals_per_level(self):
+        rows = {r['username']: r for r in self.api.get('/api/super/client-request/total-dw/').json()}
+        self.assertEqual((Decimal(rows['player1']['deposit']), Decimal(rows['player1']['total'])), (150, 130))
+        self.assertEqual(Decimal(rows['player2']['deposit']), 30)
+        [master] = self.api.get('/api/super/client-request/super-master-dw/').json()
+        self.assertEqual((master['no_of_deposit'], master['no_of_withdrawal']), (3, 1))
+        self.assertEqual(Decimal(master['total']), 160)
+
+    def test_query_count_is_flat_and_rows_sort_and_page(self):
+        with CaptureQueriesContext(connection) as few:
+            self.api.get('/api/super/client-request/total-dw/')
+        for i in range(5):
+            User.objects.create(username=f'p{i}', role=UserRole.PLAYER, parent=self.master)
+        with CaptureQueriesContext(connection) as many:
+            r = self.api.get('/api/super/client-request/total-dw/', {'ordering': '-deposit', 'page_size': 2})
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual(r.json()['count'], 7)
+        self.assertEqual([row['username'] for row in r.json()['results']], ['player1', 'player2'])
+        self.assertEqual(self.api.get('/api/super/client-request/total-dw/', {'ordering': 'x'}).status_code, 400)
+
+
+class WithdrawEligibilityTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.master.main_balance = Decimal('10000.00')
+        self.master.save()
+        self.rule = BonusRule.objects.create(
+            name='Reload', bonus_type=BonusType.WELCOME, reward_type=RewardType.FLAT, roll_required=2,
+        )
+        self.rounds = 0
+
+    def play(self):
+        self.rounds += 1
+        self.post_callback(game_round=f'r-{self.rounds}', bet_amount='1', change='-1')
+
+    def eligibility(self):
+        player = User.objects.select_related('withdraw_eligibility').get(pk=self.player.pk)
+        with self.assertNumQueries(0):
+            return get_withdraw_eligibility(player)
+
+    def assertMatchesRebuild(self):
+        self.assertEqual(list(check_withdraw_eligibility()), [])
+
+    def test_counters_follow_games_deposits_and_bonuses(self):
+        self.play()
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('100'))
+        approve_deposit(Deposit.objects.get(pk=deposit.pk), self.master)
+        self.assertFalse(self.eligibility()['can_withdraw_main'])
+        self.play()
+        self.assertTrue(self.eligibility()['can_withdraw_main'])
+
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10'), bonus_type=BonusType.WELCOME,
+                                            bonus_rule=self.rule)
+        approve_bonus_request(BonusRequest.objects.get(pk=bonus.pk), self.master)
+        self.assertEqual(self.eligibility()['rolls_needed'], 2)
+        self.play()
+        self.assertMatchesRebuild()
+        self.rule.roll_required = 3
+        self.rule.save()
+        self.assertEqual(self.eligibility()['rolls_needed'], 2)
+        self.play()
+        self.play()
+        state = self.eligibility()
+        self.assertEqual((state['rolls_needed'], state['can_withdraw_bonus']), (0, True))
+        self.assertMatchesRebuild()
+
+    def test_bonus_approved_without_processed_at_rolls_from_rebuild(self):
+        self.play()
+        free = BonusRule.objects.create(name='Free', bonus_type=BonusType.WELCOME, reward_type=RewardType.FLAT, roll_required=0)
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10'), bonus_type=BonusType.WELCOME,
+                                            bonus_rule=free, status='approved')
+        rebuild_withdraw_eligibility()
+        self.assertEqual(BonusRequest.objects.get(pk=bonus.pk).roll_base, 1)
+        self.assertTrue(self.eligibility()['can_withdraw_bonus'])
+        BonusRule.objects.filter(pk=free.pk).update(roll_required=2)
+        refresh_bonus_targets([self.player.pk])
+        self.assertEqual(self.eligibility()['rolls_needed'], 2)
+
+    def test_withdraw_approval_rechecks_eligibility_under_lock(self):
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10'), bonus_type=BonusType.WELCOME,
+                                            bonus_rule=self.rule)
+        approve_bonus_request(BonusRequest.objects.get(pk=bonus.pk), self.master)
+        self.play()
+        self.play()
+        withdrawal = Withdraw.objects.create(user=self.player, amount=Decimal('5'), wallet=WithdrawWallet.BONUS)
+        loaded = Withdraw.objects.select_related('user__parent', 'user__withdraw_eligibility').get(pk=withdrawal.pk)
+        self.assertTrue(get_withdraw_eligibility(loaded.user)['can_withdraw_bonus'])
+        # A second bonus is approved after the withdrawal was loaded.
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10'), bonus_type=BonusType.WELCOME,
+                                            bonus_rule=self.rule)
+        approve_bonus_request(BonusRequest.objects.get(pk=bonus.pk), self.master)
+        self.assertEqual(
+            approve_withdraw(loaded, self.master),
+            (False, 'Bonus is not withdrawable until bonus roll requirement is met.'),
+        )
+        self.assertEqual(Withdraw.objects.get(pk=withdrawal.pk).status, 'pending')
+
+    def test_missing_row_is_computed_and_rebuilt(self):
+        self.play()
+        WithdrawEligibility.objects.filter(user=self.player).delete()
+        self.assertEqual(list(check_withdraw_eligibility()), [(self.player.pk, 'row', None, 'missing')])
+        self.assertFalse(get_withdraw_eligibility(self.player)['can_withdraw_main'])
+        self.assertEqual(rebuild_withdraw_eligibility(), 1)
+        self.assertEqual(WithdrawEligibility.objects.get(user=self.player).games_played, 1)
+        self.assertMatchesRebuild()
+
+
+class LedgerTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = self.super_user
+        self.master.main_balance = Decimal('500.00')
+        self.master.save()
+
+    def legs(self, **filters):
+        return list(
+            Transaction.objects.filter(**filters).order_by('pk')
+            .values_list('user__username', 'action_type', 'amount', 'balance_before', 'balance_after')
+        )
+
+    def test_approvals_post_both_legs_once(self):
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('200.00'))
+        self.assertEqual(approve_deposit(Deposit.objects.get(pk=deposit.pk), self.master), (True, None))
+        self.assertEqual(self.legs(transaction_type=TransactionType.DEPOSIT), [
+            ('master1', 'out', Decimal('200.00'), Decimal('500.00'), Decimal('300.00')),
+            ('player1', 'in', Decimal('200.00'), Decimal('1000.00'), Decimal('1200.00')),
+        ])
+        self.assertEqual(approve_deposit(Deposit.objects.get(pk=deposit.pk), self.master), (False, 'Deposit is not pending'))
+        self.assertEqual(Transaction.objects.filter(transaction_type=TransactionType.DEPOSIT).count(), 2)
+        self.assertEqual(
+            list(User.objects.filter(pk__in=[self.master.pk, self.player.pk]).order_by('pk').values_list('main_balance', flat=True)),
+            [Decimal('300.00'), Decimal('1200.00')],
+        )
+        incremental = list(DownlineStat.objects.order_by('node_id').values())
+        rebuild_downline_stats()
+        self.assertEqual(list(DownlineStat.objects.order_by('node_id').values()), incremental)
+
+    def test_insufficient_balance_writes_nothing(self):
+        withdrawal = Withdraw.objects.create(user=self.master, amount=Decimal('600.00'))
+        self.assertEqual(approve_withdraw(Withdraw.objects.get(pk=withdrawal.pk), self.super_user), (False, 'Insufficient balance'))
+        with self.assertRaises(InsufficientBalance):
+            post_legs([
+                Leg(self.player, 'main_balance', Decimal('1.00'), self.master),
+                Leg(self.master, 'main_balance', Decimal('-501.00'), self.player),
+            ], TransactionType.TRANSFER)
+        self.assertEqual(Withdraw.objects.get(pk=withdrawal.pk).status, 'pending')
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(User.objects.get(pk=self.master.pk).main_balance, Decimal('500.00'))
+
+    def test_settlement_and_transfer(self):
+        ok, _msg = settle_master(self.master, self.super_user)
+        self.assertTrue(ok)
+        self.assertEqual(self.legs(transaction_type=TransactionType.SETTLEMENT), [
+            ('master1', 'out', Decimal('500.00'), Decimal('500.00'), Decimal('0.00')),
+            ('super1', 'in', Decimal('500.00'), Decimal('0.00'), Decimal('500.00')),
+        ])
+        api = APIClient()
+        self.player.set_password('pw')
+        self.player.save()
+        api.force_authenticate(self.player)
+        r = api.post('/api/player/transfer/', {'password': 'pw', 'username': 'master1', 'amount': '40'}, format='json')
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(self.legs(transaction_type=TransactionType.TRANSFER), [
+            ('player1', 'out', Decimal('40.00'), Decimal('1000.00'), Decimal('960.00')),
+            ('master1', 'in', Decimal('40.00'), Decimal('0.00'), Decimal('40.00')),
+        ])
+
+
+class BulkApprovalTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.master.main_balance = Decimal('250.00')
+        self.master.pin = '1234'
+        self.master.save()
+        self.api = APIClient()
+        self.api.force_authenticate(self.master)
+        self.deposits = [Deposit.objects.create(user=self.player, amount=Decimal('100.00')).pk for _ in range(3)]
+
+    def test_bulk_approve_reports_per_item_results(self):
+        url = '/api/master/deposits/bulk-approve/'
+        self.assertEqual(self.api.post(url, {'ids': self.deposits, 'pin': '0000'}, format='json').status_code, 400)
+        self.assertEqual(self.api.post(url, {'ids': 'x', 'pin': '1234'}, format='json').status_code, 400)
+        r = self.api.post(url, {'ids': self.deposits + [999999], 'pin': '1234'}, format='json')
+        self.assertEqual(r.status_code, 200, r.content)
+        body = r.json()
+        self.assertEqual(body['approved'], 2)
+        self.assertEqual([(item['ok'], item['detail']) for item in body['results']], [
+            (True, None), (True, None), (False, 'Parent has insufficient balance'), (False, 'Not found or not pending.'),
+        ])
+        self.assertEqual(User.objects.get(pk=self.master.pk).main_balance, Decimal('50.00'))
+        self.assertEqual(User.objects.get(pk=self.player.pk).main_balance, Decimal('1200.00'))
+        self.assertEqual(Deposit.objects.get(pk=self.deposits[2]).status, 'pending')
+        self.assertEqual(self.player.messages_received.count(), 2)
+
+    def test_bulk_reject(self):
+        approve_deposit(Deposit.objects.get(pk=self.deposits[0]), self.master)
+        r = self.api.post('/api/master/deposits/bulk-reject/', {'ids': self.deposits, 'reject_reason': 'dup'}, format='json')
+        self.assertEqual(r.json()['rejected'], 2)
+        self.assertEqual(
+            list(Deposit.objects.filter(pk__in=self.deposits).order_by('pk').values_list('status', 'reject_reason')),
+            [('approved', ''), ('rejected', 'dup'), ('rejected', 'dup')],
+        )
+
+
+class PendingStatTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.super_user = User.objects.create(username='super1', role=UserRole.SUPER)
+        self.master.parent = self.super_user
+        self.master.main_balance = Decimal('500.00')
+        self.master.save()
+        self.player.refresh_from_db()
+
+    def counts(self):
+        return {
+            node: pending_counts(node)
+            for node in (PLATFORM, self.super_user.pk, self.master.pk)
+        }
+
+    def assertCounts(self, deposits, withdrawals, bonus_requests, master=None):
+        expected = {'deposits': deposits, 'withdrawals': withdrawals, 'bonus_requests': bonus_requests}
+        self.assertEqual(self.counts(), {
+            PLATFORM: expected, self.super_user.pk: expected, self.master.pk: master or expected,
+        })
+
+    def test_counters_follow_request_state_and_push(self):
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('10.00'))
+        withdraw = Withdraw.objects.create(user=self.player, amount=Decimal('10.00'))
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10.00'))
+        Deposit.objects.create(user=self.master, amount=Decimal('10.00'))
+        self.assertCounts(2, 1, 1, master={'deposits': 1, 'withdrawals': 1, 'bonus_requests': 1})
+        self.assertEqual(
+            OutboxEvent.objects.filter(group=pending_group(self.master.pk)).latest('pk').event,
+            {'type': 'pending.update', 'deposits': 1, 'withdrawals': 1, 'bonus_requests': 1},
+        )
+        # The platform queue is pushed as the total of its shards.
+        self.assertFalse(PendingStat.objects.filter(node_id=PLATFORM).exists())
+        self.assertEqual(
+            OutboxEvent.objects.filter(group=pending_group(PLATFORM)).latest('pk').event,
+            {'type': 'pending.update', 'deposits': 2, 'withdrawals': 1, 'bonus_requests': 1},
+        )
+
+        self.assertEqual(approve_deposit(deposit, self.master), (True, None))
+        withdraw.status = 'rejected'
+        withdraw.save()
+        reject_many(BonusRequest.objects.all(), [bonus.pk], self.master)
+        self.assertCounts(1, 0, 0, master={'deposits': 0, 'withdrawals': 0, 'bonus_requests': 0})
+        Deposit.objects.filter(user=self.master).delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_rebuild_matches_incremental_counters(self):
+        Deposit.objects.create(user=self.player, amount=Decimal('10.00'))
+        Withdraw.objects.create(user=self.master, amount=Decimal('10.00'))
+        before = self.counts()
+        PendingStat.objects.all().delete()
+        # A platform shard per requesting user, the super and the master.
+        self.assertEqual(rebuild_pending_stats(), 4)
+        self.assertEqual(self.counts(), before)
+
+    def test_save_without_status_skips_status_lookup(self):
+        deposit = Deposit.objects.create(user=self.player, amount=Decimal('10.00'))
+        deposit.amount = Decimal('20.00')
+        with self.assertNumQueries(1):
+            deposit.save(update_fields=['amount'])
+        self.assertCounts(1, 0, 0)
+
+    def test_dashboards_and_stream_topic_are_scoped(self):
+        Deposit.objects.create(user=self.player, amount=Decimal('10.00'))
+        Deposit.objects.create(user=self.master, amount=Decimal('10.00'))
+        api = APIClient()
+        for user, url, expected in (
+            (self.master, '/api/master/dashboard/', 1),
+            (self.super_user, '/api/super/dashboard/', 2),
+        ):
+            api.force_authenticate(user)
+            self.assertEqual(api.get(url).data['pending_deposits'], expected)
+        self.assertEqual(queue_node(self.player), None)
+        self.assertEqual(TOPICS['pending'].group(self.master), pending_group(self.master.pk))
+
+
+@override_settings(OUTBOX_DISPATCH_IN_BACKGROUND=False)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(messages_group(7), self.channel)
+
+    def test_event_is_sent_after_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                broadcast_new_message_to_receiver(7, {'id': 1})
+            version = OutboxEvent.objects.get().pk
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(async_to_sync(self.layer.receive)(self.channel), {
+            'type': 'message.new', 'message': {'id': 1}, 'version': version,
+        })
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                broadcast_new_message_to_receiver(7, {'id': 2})
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_send_is_retried(self):
+        broadcast_new_messages([(7, {'id': 1}), (7, {'id': 2})])
+        with mock.patch.object(self.layer, 'group_send', side_effect=ConnectionError('down')):
+            self.assertEqual(dispatch_pending(), 0)
+        event = OutboxEvent.objects.order_by('pk').first()
+        self.assertEqual((event.attempts, event.last_error), (1, 'ConnectionError: down'))
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        self.assertEqual(dispatch_pending(), 0)
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_pending(batch_size=1), 2)
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(async_to_sync(self.layer.receive)(self.channel)['message'], {'id': 1})
+
+    @override_settings(OUTBOX_DISPATCH_IN_BACKGROUND=True)
+    def test_sqlite_sends_in_commit_callback_without_holding_a_transaction(self):
+        self.assertEqual(connection.vendor, 'sqlite')
+        conn = connections['default']
+        depth = len(conn.atomic_blocks)
+        depths = []
+        send = self.layer.group_send
+
+        async def group_send(group, event):
+            depths.append(len(conn.atomic_blocks))
+            await send(group, event)
+
+        with mock.patch.object(self.layer, 'group_send', side_effect=group_send):
+            with self.captureOnCommitCallbacks(execute=True):
+                broadcast_new_message_to_receiver(7, {'id': 1})
+        self.assertFalse(OutboxEvent.objects.exists())
+        # Sent inline, outside the claim transaction.
+        self.assertEqual(depths, [depth])
+        self.assertEqual(async_to_sync(self.layer.receive)(self.channel)['message'], {'id': 1})
+
+
+class BalancePushTests(GameCallbackTestMixin, TestCase):
+
+    def pushed(self, user):
+        events = OutboxEvent.objects.filter(group=f'balance_user_{user.pk}').order_by('pk')
+        return [{k: v for k, v in e.event.items() if k != 'type'} for e in events]
+
+    def test_callbacks_and_postings_queue_balance_updates(self):
+        self.post_callback(game_round='r-1', bet_amount='100', change='-100', wallet_before='1000', wallet_after='900')
+        self.assertEqual(self.pushed(self.player), [{'main_balance': '900.00'}])
+
+        self.master.main_balance = Decimal('500.00')
+        self.master.save()
+        rule = BonusRule.objects.create(name='R', bonus_type=BonusType.WELCOME, reward_type=RewardType.FLAT, roll_required=2)
+        bonus = BonusRequest.objects.create(user=self.player, amount=Decimal('10'), bonus_type=BonusType.WELCOME, bonus_rule=rule)
+        approve_bonus_request(BonusRequest.objects.get(pk=bonus.pk), self.master)
+        self.assertEqual(self.pushed(self.master), [{'main_balance': '490.00'}])
+        self.assertEqual(self.pushed(self.player)[1:], [{'bonus_balance': '10.00'}, {'rolls_needed': 2}])
+
+        self.post_callback(game_round='r-2', bet_amount='100', change='-100', wallet_before='900', wallet_after='800')
+        self.assertEqual(self.pushed(self.player)[-1], {'main_balance': '800.00', 'rolls_needed': 1})
+
+
+@override_settings(WS_MAX_SUBSCRIPTIONS=2)
+class StreamConsumerTests(TransactionTestCase):
+    """Consumers read the DB from a worker thread, so the rows must be committed."""
+
+    def test_subscriptions_events_and_limits(self):
+        user = User.objects.create(username='p1', role=UserRole.PLAYER, main_balance=Decimal('5.00'))
+
+        async def session():
+            ws = WebsocketCommunicator(StreamConsumer.as_asgi(), '/ws/stream/?topics=messages,balance')
+            ws.scope['user'] = user
+            connected, _ = await ws.connect()
+            self.assertTrue(connected)
+            frames = [await ws.receive_json_from() for _ in range(3)]
+            self.assertEqual([f['op'] for f in frames], ['subscribed', 'subscribed', 'event'])
+            self.assertEqual(frames[2]['data']['main_balance'], '5.00')
+
+            await get_channel_layer().group_send(messages_group(user.pk), {'type': 'message.new', 'message': {'id': 1}})
+            self.assertEqual(await ws.receive_json_from(), {
+                'op': 'event', 'topic': 'messages', 'data': {'type': 'message.new', 'message': {'id': 1}},
+            })
+            # A retried older balance event does not overwrite a newer one.
+            for version, fields in ((5, {'main_balance': '7.00'}), (4, {'main_balance': '6.00', 'rolls_needed': 2})):
+                await get_channel_layer().group_send(balance_group(user.pk), {'type': 'balance.update', 'version': version, **fields})
+            self.assertEqual((await ws.receive_json_from())['data']['main_balance'], '7.00')
+            self.assertEqual((await ws.receive_json_from())['data'], {'type': 'balance.update', 'version': 4, 'rolls_needed': 2})
+            await ws.send_json_to({'op': 'subscribe', 'topic': 'session', 'id': 7})
+            self.assertEqual((await ws.receive_json_from())['code'], 'too_many_subscriptions')
+            await ws.send_json_to({'op': 'unsubscribe', 'topic': 'messages'})
+            await ws.receive_json_from()
+            await ws.send_json_to({'op': 'subscribe', 'topic': 'session', 'id': 8})
+            self.assertEqual(await ws.receive_json_from(), {'op': 'subscribed', 'topic': 'session', 'id': 8})
+            await ws.send_json_to({'op': 'subscribe', 'topic': 'nope'})
+            self.assertEqual((await ws.receive_json_from())['code'], 'unknown_topic')
+            await ws.send_to(text_data='x' * 2000)
+            self.assertEqual((await ws.receive_json_from())['code'], 'bad_frame')
+            await ws.disconnect()
+
+        async_to_sync(session)()
+
+
+class SlidingWindowThrottleTests(TestCase):
+
+    def throttle(self, now):
+        throttle = LoginIPThrottle()
+        throttle.timer = lambda: now
+        return throttle
+
+    @override_settings(THROTTLE_STORE={'BACKEND': 'core.utils.sliding_window.MemoryStore', 'LOCATION': 'slide'})
+    def test_limit_slides_over_window_boundary(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        start = 60 * 1000
+        throttles = [self.throttle(start) for _ in range(20)]
+        self.assertEqual([t.allow_request(request, None) for t in throttles], [True] * 10 + [False] * 10)
+        # Rejected requests are not counted: 10 in this window, room again once 1 of them slides out.
+        self.assertEqual((throttles[-1].previous, throttles[-1].current), (0, 10))
+        self.assertAlmostEqual(throttles[-1].wait(), 60 + 60 / 10)
+        # Half way through the next window half of the previous one still counts: 5 + 5 requests.
+        next_window = [self.throttle(start + 90) for _ in range(6)]
+        self.assertEqual([t.allow_request(request, None) for t in next_window], [True] * 5 + [False])
+        self.assertAlmostEqual(next_window[-1].wait(), 60 * (1 - 4 / 10) - 30)
+
+    @override_settings(THROTTLE_STORE={'BACKEND': 'core.utils.sliding_window.MemoryStore', 'LOCATION': 'login'})
+    def test_login_endpoint_is_throttled(self):
+        client = APIClient(REMOTE_ADDR='10.0.0.2')
+        codes = [client.post('/api/public/auth/login/', {}, format='json').status_code for _ in range(11)]
+        self.assertEqual(codes[:10], [400] * 10)
+        self.assertEqual(codes[10], 429)
+
+    def test_sqlite_store_is_shared_between_instances(self):
+        for version in (sqlite3.sqlite_version_info, (3, 31, 1)):
+            with self.subTest(sqlite=version), tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'throttle.sqlite3')
+                with mock.patch('core.utils.sliding_window.sqlite3.sqlite_version_info', version):
+                    worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+                self.assertEqual(worker_a.hit('k', 7, 60), (0, 1))
+                self.assertEqual(worker_b.hit('k', 7, 60), (0, 2))
+                self.assertEqual(worker_a.hit('k', 8, 60), (2, 1))
+                self.assertEqual(worker_b.peek('k', 8), (2, 1))
+                self.assertEqual(worker_b.peek('k', 9), (1, 0))
+                self.assertEqual(worker_b.hit('k', 10, 60), (0, 1))
+                # Half of the previous window's 2 still counts: room for 2 more of a limit of 3.
+                self.assertEqual(worker_a.take('t', 7, 60, limit=3, elapsed=0), (True, 0, 1))
+                self.assertEqual(worker_b.take('t', 7, 60, limit=3, elapsed=0), (True, 0, 2))
+                self.assertEqual(worker_a.take('t', 8, 60, limit=3, elapsed=30), (True, 2, 1))
+                self.assertEqual(worker_b.take('t', 8, 60, limit=3, elapsed=30), (True, 2, 2))
+                self.assertEqual(worker_a.take('t', 8, 60, limit=3, elapsed=30), (False, 2, 2))
+
+
+class CatalogCacheTests(GameCallbackTestMixin, TestCase):
+
+    def test_game_snapshot_is_cached_and_invalidated(self):
+        snapshot = catalog_cache.get_game_by_uid('g-1')
+        self.assertEqual(snapshot.api_token, 'tok')
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog_cache.get_game_by_uid('g-1'), snapshot)
+            self.assertEqual(catalog_cache.get_game_by_id(self.game.pk), snapshot)
+        self.provider.api_token = 'tok2'
+        self.provider.save()
+        self.assertEqual(catalog_cache.get_game_by_uid('g-1').api_token, 'tok2')
+
+
+class TokenCacheTests(GameCallbackTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.player).key)
+
+    def dashboard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/player/dashboard/')
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_cached_user_with_fresh_balances(self):
+        response, sql = self.dashboard()
+        self.assertEqual(response.data['main_balance'], '1000.00')
+        self.assertTrue(any('authtoken_token' in q for q in sql))
+        post_legs([Leg(self.player, 'main_balance', Decimal('5.00'))], TransactionType.DEPOSIT)
+        response, sql = self.dashboard()
+        self.assertEqual(response.data['main_balance'], '1005.00')
+        self.assertFalse(any('authtoken_token' in q for q in sql))
+        # The deferred balances come from one query that does not reload the cached columns.
+        balance_reads = [q for q in sql if '"main_balance"' in q and '"username"' not in q]
+        self.assertEqual(len(balance_reads), 1)
+        self.assertIn('"bonus_balance"', balance_reads[0])
+
+    def test_revoked_on_deactivation_role_change_and_rotation(self):
+        self.assertEqual(self.dashboard()[0].status_code, 200)
+        self.player.role = UserRole.MASTER
+        self.player.save(update_fields=['role'])
+        self.assertEqual(self.dashboard()[0].status_code, 403)
+        self.player.role = UserRole.PLAYER
+        self.player.save(update_fields=['role'])
+        self.assertEqual(self.dashboard()[0].status_code, 200)
+        self.player.is_active = False
+        self.player.save(update_fields=['is_active'])
+        self.assertEqual(self.dashboard()[0].status_code, 401)
+        self.player.is_active = True
+        self.player.save(update_fields=['is_active'])
+        self.assertEqual(self.dashboard()[0].status_code, 200)
+        Token.objects.filter(user=self.player).delete()
+        self.assertEqual(self.dashboard()[0].status_code, 401)
+
+    def test_revocation_while_loading_is_not_cached_over(self):
+        def revoke_after_user_load(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if 'authtoken_token' in sql and '"username"' in sql:
+                token_cache._bump([self.player.pk])
+            return result
+
+        with connection.execute_wrapper(revoke_after_user_load):
+            self.assertEqual(self.dashboard()[0].status_code, 200)
+        self.assertTrue(any('authtoken_token' in q for q in self.dashboard()[1]))
+
+    def test_revocation_from_another_worker_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = {'BACKEND': 'core.utils.sliding_window.SQLiteStore', 'LOCATION': os.path.join(tmp, 'rev.sqlite3')}
+            with override_settings(TOKEN_REVISION_STORE=store):
+                self.dashboard()
+                self.assertFalse(any('authtoken_token' in q for q in self.dashboard()[1]))
+                # Another worker has its own store instance on the same file.
+                with mock.patch('core.token_cache.get_store', return_value=SQLiteStore(store['LOCATION'])):
+                    token_cache.revoke_users([self.player.pk])
+                self.assertTrue(any('authtoken_token' in q for q in self.dashboard()[1]))
+                self.assertFalse(any('authtoken_token' in q for q in self.dashboard()[1]))
+
+
+class GameCallbackBatchTests(GameCallbackTestMixin, TestCase):
+    batch_url = '/api/callback/batch/'
+
+    def setUp(self):
+        super().setUp()
+        self.player2 = User.objects.create(
+            username='player2',
+            role=UserRole.PLAYER,
+            parent=self.master,
+            main_balance=Decimal('500.00'),
+        )
+
+    def _round(self, username, game_round, before, after, bet='0', win='0'):
+        return {
+            'mobile': username, 'game_uid': 'g-1', 'token': 'tok', 'game_round': game_round,
+            'bet_amount': bet, 'win_amount': win, 'change': str(Decimal(after) - Decimal(before)),
+            'wallet_before': before, 'wallet_after': after,
+        }
+
+    def test_batch_settles_per_user_and_reports_per_item_status(self):
+        self.post_callback(game_round='old', bet_amount='10', change='-10', wallet_before='1000', wallet_after='990')
+        items = [
+            self._round('player1', 'r-1', '990', '890', bet='100'),
+            self._round('player2', 'r-9', '500', '450', bet='50'),
+            self._round('player1', 'r-1', '890', '1090', win='200'),
+            self._round('player1', 'old', '1000', '990', bet='10'),  # retry of an already-settled callback
+            dict(self._round('player1', 'r-2', '1090', '1000', bet='90'), token='bad'),
+            self._round('nobody', 'r-3', '10', '0', bet='10'),
+            'not-an-object',
+        ]
+        r = self.client.post(self.batch_url, items, content_type='application/json')
+        self.assertEqual(r.status_code, 200)
+        statuses = [item['status'] for item in r.json()['results']]
+        self.assertEqual(statuses, [200, 200, 200, 200, 403, 400, 400])
+
+        self.player.refresh_from_db()
+        self.player2.refresh_from_db()
+        self.assertEqual(self.player.main_balance, Decimal('1090.00'))
+        self.assertEqual(self.player2.main_balance, Decimal('450.00'))
+        self.assertEqual(get_pl_balance(self.master), Decimal('-40.00'))
+        log = GameLog.objects.get(user=self.player, round='r-1')
+        self.assertEqual((log.bet_amount, log.win_amount), (Decimal('100.00'), Decimal('200.00')))
+        self.assertEqual(Transaction.objects.filter(game_log=log).count(), 2)
+        self.assertEqual(GameCallbackReceipt.objects.filter(round='old').count(), 1)
+
+    def test_failed_player_fails_its_in_batch_retries_too(self):
+        items = [
+            self._round('player1', 'r-1', '1000', '900', bet='100'),
+            self._round('player1', 'r-1', '1000', '900', bet='100'),
+            self._round('player2', 'r-9', '500', '450', bet='50'),
+        ]
+        real_write = game_callback_service._write_user_batch
+
+        def write(user, *args):
+            if user.pk == self.player.pk:
+                raise DatabaseError('boom')
+            return real_write(user, *args)
+
+        with mock.patch('core.services.game_callback_service._write_user_batch', side_effect=write):
+            r = self.client.post(self.batch_url, items, content_type='application/json')
+        self.assertEqual([item['status'] for item in r.json()['results']], [500, 500, 200])
+        self.assertFalse(GameCallbackReceipt.objects.filter(user=self.player).exists())
+
+    def test_batch_query_count_does_not_grow_with_rounds(self):
+        catalog_cache.get_game_by_uid('g-1')
+
+        def run(n, offset):
+            items = [
+                self._round('player1', f'r-{offset + i}', '1000', '990', bet='10')
+                for i in range(n)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(self.batch_url, items, content_type='application/json')
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2, 0), run(20, 100))
@@ -1,7 +1,41 @@
 from rest_framework.throttling import SimpleRateThrottle
 
+from core.utils.sliding_window import get_store
 
-class PerIpRateThrottle(SimpleRateThrottle):
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle (same scopes, rates and cache keys) counted with core.utils.sliding_window:
+    two counters per key in the THROTTLE_STORE instead of a list of timestamps in the Django cache,
+    one atomic store call per request. As in SimpleRateThrottle, throttled requests are not counted, so
+    a client that keeps retrying is let through again as soon as its earlier requests slide out.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        window, self.elapsed = divmod(self.timer(), self.duration)
+        allowed, self.previous, self.current = get_store().take(
+            self.key, int(window), self.duration, limit=self.num_requests, elapsed=self.elapsed,
+        )
+        return allowed
+
+    def wait(self):
+        """Seconds until the sliding window has room for one more request."""
+        room = self.num_requests - 1
+        if self.current <= room:
+            # The current window fits; wait for enough of the previous one to slide out.
+            wait = self.duration * (1 - (room - self.current) / self.previous) - self.elapsed
+        else:
+            # The next window starts with this one as its previous; wait for enough of it to slide out.
+            wait = self.duration - self.elapsed + self.duration * (1 - room / self.current)
+        return max(wait, 0)
+
+
+class PerIpRateThrottle(SlidingWindowRateThrottle):
     """
     Simple IP-based throttle helper.
 
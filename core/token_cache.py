@@ -0,0 +1,128 @@
+"""
+Process-local cache of token -> user snapshots for REST (core.authentication.CachedTokenAuthentication)
+and WebSocket (core.auth_middleware) authentication, so an authenticated request does not query
+authtoken_token JOIN core_user. A snapshot is the user's row without VOLATILE_FIELDS (balances and
+other columns written with UPDATE ... F()); those stay deferred on the User built for the request and
+are loaded together, in one query, the first time the request reads one of them.
+
+Size-bounded LRU with a TTL backstop. revoke_users bumps a per-user revision counter in
+settings.TOKEN_REVISION_STORE (default: THROTTLE_STORE, see core.utils.sliding_window; the SQLite and
+Redis stores are shared by the workers) and every hit reads and compares it (revocations are polled,
+one store read per request, not pushed), so a revocation reaches all workers on their next request
+with that token. A miss reads the revision before the user row, so a revocation committed meanwhile
+invalidates the snapshot it caches. core.signals revokes when a user's token is deleted
+(login rotation, logout), when the user is saved (is_active, role, password, ...) or deleted;
+hierarchy_service revokes the users whose upline it rewrites.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from core.catalog_cache import LRUCache
+from core.utils.sliding_window import get_store
+
+VOLATILE_FIELDS = frozenset([
+    'main_balance',
+    'pl_balance',
+    'bonus_balance',
+    'exposure_balance',
+    'exposure_limit',
+    'game_wallet',
+    'last_login',
+    'updated_at',
+])
+
+_tokens = LRUCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+# Revisions are the counters of one fixed window (0); they outlive every snapshot taken before a bump.
+REVISION_WINDOW = 0
+REVISION_SECONDS = 24 * 3600
+
+
+def _snapshot_fields():
+    from core.models import User
+    return [f.attname for f in User._meta.concrete_fields if f.attname not in VOLATILE_FIELDS]
+
+
+def _store():
+    return get_store(getattr(settings, 'TOKEN_REVISION_STORE', None))
+
+
+def _revision_key(user_id):
+    return f'token_cache:rev:{user_id}'
+
+
+def _revision(user_id):
+    return _store().peek(_revision_key(user_id), REVISION_WINDOW)[1]
+
+
+def _load_deferred_together(user):
+    """Make the first read of a deferred field load every deferred field (one query, not one per field)."""
+    refresh = user.refresh_from_db
+
+    def refresh_from_db(using=None, fields=None, **kwargs):
+        deferred = user.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        refresh(using=using, fields=fields, **kwargs)
+
+    user.refresh_from_db = refresh_from_db
+    return user
+
+
+def _user_from_snapshot(db, values):
+    from core.models import User
+    return _load_deferred_together(User.from_db(db, _snapshot_fields(), values))
+
+
+def get_user(token_key):
+    """User of token_key (active or not), or None when the token does not exist."""
+    cached = _tokens.get(token_key, None)
+    from rest_framework.authtoken.models import Token
+    if cached is not None:
+        user_id = cached[0]
+    else:
+        user_id = Token.objects.filter(key=token_key).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return None
+    # Read before the user row: a revocation committed after that read bumps past this revision.
+    revision = _revision(user_id)
+    if cached is not None and cached[1] == revision:
+        return _user_from_snapshot(cached[2], cached[3])
+    token = Token.objects.select_related('user').filter(key=token_key).first()
+    if token is None:
+        return None
+    user = token.user
+    if user.pk == user_id:
+        _tokens.set(token_key, (
+            user.pk,
+            revision,
+            user._state.db,
+            tuple(getattr(user, name) for name in _snapshot_fields()),
+        ))
+    return user
+
+
+def _bump(user_ids):
+    store = _store()
+    for pk in sorted(user_ids):
+        store.hit(_revision_key(pk), REVISION_WINDOW, REVISION_SECONDS)
+
+
+def revoke_users(user_ids):
+    """Invalidate the cached tokens of user_ids now and again once the surrounding transaction commits."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+def clear():
+    _tokens.clear()
+
+
+def cache_stats():
+    return _tokens.stats()
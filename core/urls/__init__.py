@@ -2,6 +2,8 @@ from django.urls import path, include
 from core.views import callback_views
 
 urlpatterns = [
+    path('callback/batch/', callback_views.game_callback_batch),
+    path('callback/batch', callback_views.game_callback_batch),
     path('callback/', callback_views.game_callback),
     path('callback', callback_views.game_callback),
     path('public/', include('core.urls.public_urls')),
@@ -41,6 +41,8 @@ urlpatterns = [
     path('analytics/games/', analytics_views.game_analytics),
     path('analytics/finance/', analytics_views.finance_analytics),
     path('analytics/customers/', analytics_views.customer_analytics),
+    path('analytics/intraday/', analytics_views.intraday),
+    path('analytics/cache-stats/', analytics_views.cache_stats),
     path('analytics/user/<int:user_id>/', analytics_views.user_analytics),
     path('reject-reason-suggestions/', reject_suggestions_views.reject_reason_suggestions_list),
     path('supers/', user_views.user_list_supers),
@@ -68,30 +70,42 @@ urlpatterns = [
     path('players/<int:pk>/regenerate-pin/', user_views.user_regenerate_pin_player),
     path('players/<int:pk>/reset-password/', user_views.user_reset_password_player),
     path('deposits/', deposit_views.deposit_list),
+    path('deposits/export/', deposit_views.deposit_export),
     path('deposits/create/', deposit_views.deposit_create),
     path('deposits/direct/', deposit_views.deposit_direct),
     path('deposits/payment-modes/', deposit_views.deposit_payment_modes),
     path('deposits/<int:pk>/', deposit_views.deposit_detail),
     path('deposits/<int:pk>/approve/', deposit_views.deposit_approve),
     path('deposits/<int:pk>/reject/', deposit_views.deposit_reject),
+    path('deposits/bulk-approve/', deposit_views.deposit_bulk_approve),
+    path('deposits/bulk-reject/', deposit_views.deposit_bulk_reject),
     path('withdrawals/', withdraw_views.withdraw_list),
+    path('withdrawals/export/', withdraw_views.withdraw_export),
     path('withdrawals/direct/', withdraw_views.withdraw_direct),
     path('withdrawals/<int:pk>/', withdraw_views.withdraw_detail),
     path('withdrawals/<int:pk>/approve/', withdraw_views.withdraw_approve),
     path('withdrawals/<int:pk>/reject/', withdraw_views.withdraw_reject),
+    path('withdrawals/bulk-approve/', withdraw_views.withdraw_bulk_approve),
+    path('withdrawals/bulk-reject/', withdraw_views.withdraw_bulk_reject),
     path('bonus-requests/', bonus_request_views.bonus_request_list),
     path('bonus-requests/<int:pk>/', bonus_request_views.bonus_request_detail),
     path('bonus-requests/<int:pk>/approve/', bonus_request_views.bonus_request_approve),
     path('bonus-requests/<int:pk>/reject/', bonus_request_views.bonus_request_reject),
+    path('bonus-requests/bulk-approve/', bonus_request_views.bonus_request_bulk_approve),
+    path('bonus-requests/bulk-reject/', bonus_request_views.bonus_request_bulk_reject),
     path('game-log/', game_log_views.game_log_list),
+    path('game-log/export/', game_log_views.game_log_export),
     path('game-log/<int:pk>/', game_log_views.game_log_detail),
     path('transactions/', transaction_views.transaction_list),
     path('accounting-report/', accounting_views.accounting_report),
     path('account-statement/', super_statement_views.account_statement_list),
     path('bonus-statement/', super_statement_views.bonus_statement_list),
     path('client-request/total-dw/', super_report_views.total_dw_list),
+    path('client-request/total-dw/export/', super_report_views.total_dw_export),
     path('client-request/super-master-dw/', super_report_views.super_master_dw_list),
+    path('client-request/super-master-dw/export/', super_report_views.super_master_dw_export),
     path('client-request/super-dw-state/', super_report_views.super_dw_state_list),
+    path('client-request/super-dw-state/export/', super_report_views.super_dw_state_export),
     path('activity/', activity_views.activity_list),
     path('categories/', game_views.category_list_create),
     path('categories/<int:pk>/', game_views.category_detail),
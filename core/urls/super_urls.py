@@ -46,24 +46,34 @@ urlpatterns = [
     path('deposits/<int:pk>/', deposit_views.deposit_detail),
     path('deposits/<int:pk>/approve/', deposit_views.deposit_approve),
     path('deposits/<int:pk>/reject/', deposit_views.deposit_reject),
+    path('deposits/bulk-approve/', deposit_views.deposit_bulk_approve),
+    path('deposits/bulk-reject/', deposit_views.deposit_bulk_reject),
     path('withdrawals/', withdraw_views.withdraw_list),
     path('withdrawals/direct/', withdraw_views.withdraw_direct),
     path('withdrawals/<int:pk>/', withdraw_views.withdraw_detail),
     path('withdrawals/<int:pk>/approve/', withdraw_views.withdraw_approve),
     path('withdrawals/<int:pk>/reject/', withdraw_views.withdraw_reject),
+    path('withdrawals/bulk-approve/', withdraw_views.withdraw_bulk_approve),
+    path('withdrawals/bulk-reject/', withdraw_views.withdraw_bulk_reject),
     path('bonus-requests/', bonus_request_views.bonus_request_list),
     path('bonus-requests/<int:pk>/', bonus_request_views.bonus_request_detail),
     path('bonus-requests/<int:pk>/approve/', bonus_request_views.bonus_request_approve),
     path('bonus-requests/<int:pk>/reject/', bonus_request_views.bonus_request_reject),
+    path('bonus-requests/bulk-approve/', bonus_request_views.bonus_request_bulk_approve),
+    path('bonus-requests/bulk-reject/', bonus_request_views.bonus_request_bulk_reject),
     path('game-log/', game_log_views.game_log_list),
     path('game-log/<int:pk>/', game_log_views.game_log_detail),
     path('transactions/', transaction_views.transaction_list),
     path('accounting-report/', accounting_views.accounting_report),
+    path('accounting-report/export/', accounting_views.accounting_report_export),
     path('account-statement/', statement_views.account_statement_list),
     path('bonus-statement/', statement_views.bonus_statement_list),
     path('client-request/total-dw/', report_views.total_dw_list),
+    path('client-request/total-dw/export/', report_views.total_dw_export),
     path('client-request/super-master-dw/', report_views.super_master_dw_list),
+    path('client-request/super-master-dw/export/', report_views.super_master_dw_export),
     path('client-request/super-dw-state/', report_views.super_dw_state_list),
+    path('client-request/super-dw-state/export/', report_views.super_dw_state_export),
     path('payment-method/', payment_mode_verification_views.payment_mode_verification_list),
     path('activity/', activity_views.activity_list),
     path('messages/', message_views.message_list),
@@ -0,0 +1,38 @@
+"""
+Half-open datetime bounds for date filters. created_at__date__gte/lte wrap the column in a
+DATE() conversion, which no index can serve; created_at >= day_start(d) AND created_at <
+day_end(d) selects the same rows (days in the current time zone) and is index-friendly.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+_date_field = models.DateField()
+
+
+def to_date(value):
+    """date from a date, datetime or 'YYYY-MM-DD' string (invalid strings raise ValidationError)."""
+    return _date_field.to_python(value)
+
+
+def day_start(value):
+    """First instant of the given day in the current time zone."""
+    start = datetime.combine(to_date(value), time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start)
+    return start
+
+
+def day_end(value):
+    """First instant of the day after value (exclusive upper bound)."""
+    return day_start(to_date(value) + timedelta(days=1))
+
+
+def day_range(date_from, date_to=None, field='created_at'):
+    """Filter kwargs for date_from..date_to inclusive (a single day when date_to is omitted)."""
+    return {
+        f'{field}__gte': day_start(date_from),
+        f'{field}__lt': day_end(date_from if date_to is None else date_to),
+    }
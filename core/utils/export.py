@@ -0,0 +1,218 @@
+"""
+Streaming CSV / XLSX exports for statements, ledgers and reports.
+
+Rows come from iter_queryset (keyset batches of EXPORT_CHUNK_SIZE) or any other lazy iterable, so
+memory stays flat whatever the range. CSV is streamed as it is produced and gzip-compressed on the fly
+when the client accepts it. XLSX goes through openpyxl's write-only workbook (rows are flushed to disk
+as they are appended) into a temporary file that is then streamed; the file is already zip-compressed.
+Under ASGI the body is handed to the server as an async iterator that advances the sync generator one
+chunk at a time; a sync iterator would make Django buffer the whole body first.
+
+The format comes from ?export_format=csv|xlsx (default csv); DRF reserves ?format for renderers.
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.exceptions import ValidationError
+
+from core.utils.cursor_pagination import ORDERING, rows_after
+
+EXPORT_CHUNK_SIZE = 2000
+CSV_ROWS_PER_WRITE = 500
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Column sets shared by the exports of the same model (see export_response for the source syntax).
+_PAYMENT_REQUEST_COLUMNS = [
+    ('ID', 'id'),
+    ('Date', 'created_at'),
+    ('Username', 'user.username'),
+    ('Amount', 'amount'),
+    ('Status', 'get_status_display'),
+    ('Payment Mode', 'payment_mode.payment_method.name'),
+    ('Reference ID', 'reference_id'),
+    ('Remarks', 'remarks'),
+    ('Reject Reason', 'reject_reason'),
+    ('Processed By', 'processed_by.username'),
+    ('Processed At', 'processed_at'),
+]
+DEPOSIT_COLUMNS = _PAYMENT_REQUEST_COLUMNS
+WITHDRAW_COLUMNS = _PAYMENT_REQUEST_COLUMNS[:4] + [('Wallet', 'get_wallet_display')] + _PAYMENT_REQUEST_COLUMNS[4:]
+GAME_LOG_COLUMNS = [
+    ('ID', 'id'),
+    ('Date', 'created_at'),
+    ('Username', 'user.username'),
+    ('Provider', 'provider.name'),
+    ('Game', 'game.name'),
+    ('Round', 'round'),
+    ('Type', 'get_type_display'),
+    ('Wallet', 'get_wallet_display'),
+    ('Bet', 'bet_amount'),
+    ('Win', 'win_amount'),
+    ('Lose', 'lose_amount'),
+    ('Balance Before', 'before_balance'),
+    ('Balance After', 'after_balance'),
+]
+TRANSACTION_COLUMNS = [
+    ('ID', 'id'),
+    ('Date', 'created_at'),
+    ('Username', 'user.username'),
+    ('Type', 'get_transaction_type_display'),
+    ('Direction', 'get_action_type_display'),
+    ('Wallet', 'get_wallet_display'),
+    ('Amount', 'amount'),
+    ('Balance After', 'balance_after'),
+    ('Status', 'get_status_display'),
+    ('Reference ID', 'reference_id'),
+    ('Remarks', 'remarks'),
+]
+
+# Spreadsheet apps evaluate cells starting with these as formulas.
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_queryset(queryset, chunk_size=EXPORT_CHUNK_SIZE, by_pk=False):
+    """
+    Rows of queryset in keyset batches of chunk_size: newest first on (created_at, id) like the
+    lists, or by id when by_pk. Each batch is its own query; unlike .iterator(), this also bounds
+    memory on MySQL, whose drivers buffer the whole result set client-side.
+    """
+    if by_pk:
+        queryset = queryset.order_by('pk')
+        last = None
+        while True:
+            batch = list((queryset if last is None else queryset.filter(pk__gt=last))[:chunk_size])
+            yield from batch
+            if len(batch) < chunk_size:
+                return
+            last = batch[-1].pk
+    queryset = queryset.order_by(*ORDERING)
+    batch = list(queryset[:chunk_size])
+    while batch:
+        yield from batch
+        if len(batch) < chunk_size:
+            return
+        batch = list(rows_after(queryset, batch[-1].created_at, batch[-1].pk)[:chunk_size])
+
+
+def _value(row, source):
+    if callable(source):
+        return source(row)
+    if isinstance(row, dict):
+        return row.get(source)
+    value = row
+    for attr in source.split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value() if callable(value) else value
+
+
+def _cell(value):
+    """Plain cell value: numbers stay numbers, datetimes are local, text cannot start a formula."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if timezone.is_aware(value) else value
+    value = str(value)
+    if value.startswith(_FORMULA_PREFIXES):
+        try:
+            Decimal(value)
+        except ArithmeticError:
+            return "'" + value
+    return value
+
+
+def _table(columns, rows):
+    yield [label for label, _ in columns]
+    for row in rows:
+        yield [_cell(_value(row, source)) for _, source in columns]
+
+
+def _csv_chunks(table):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for n, line in enumerate(table, 1):
+        writer.writerow(line)
+        if n % CSV_ROWS_PER_WRITE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _file_chunks(output, block_size=64 * 1024):
+    with output:
+        while block := output.read(block_size):
+            yield block
+
+
+async def _async_chunks(chunks):
+    """Async view of a sync chunk iterator, advanced in the request's sync thread (DB access is safe)."""
+    step = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while (chunk := await step()) is not None:
+        yield chunk
+
+
+def _xlsx_file(table, title):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    for line in table:
+        sheet.append(line)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def export_format(request):
+    fmt = request.query_params.get('export_format', 'csv').strip().lower() or 'csv'
+    if fmt not in FORMATS:
+        raise ValidationError({'export_format': f'Expected one of: {", ".join(FORMATS)}.'})
+    return fmt
+
+
+def export_response(request, filename, columns, rows):
+    """
+    Streaming download of rows. columns: [(header, source)] where source is a dict key, a dotted
+    attribute path (callables such as get_status_display are called) or a function of the row.
+    filename: without extension; today's date and the format's extension are appended.
+    """
+    fmt = export_format(request)
+    name = f'{filename}-{timezone.localdate():%Y%m%d}.{fmt}'
+    table = _table(columns, rows)
+    gzip = False
+    if fmt == 'xlsx':
+        chunks = _file_chunks(_xlsx_file(table, filename))
+    else:
+        chunks = (chunk.encode('utf-8') for chunk in _csv_chunks(table))
+        if re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            chunks = compress_sequence(chunks)
+            gzip = True
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _async_chunks(iter(chunks))
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+    if fmt == 'csv':
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = f'attachment; filename="{name}"'
+    return response
@@ -0,0 +1,230 @@
+"""
+Sliding-window rate counters with fixed memory per key: the count of the current fixed window and of
+the one before it. A hit increments the current window and returns both counts; the caller weighs the
+previous window by how much of it still overlaps the sliding window (see estimate). Each store makes
+the read-and-increment one atomic step; take counts the hit only while it keeps the estimate within a
+limit (so rejected requests are not counted), peek reads the counts without counting a hit:
+  MemoryStore  process-local, size-bounded (single worker, tests)
+  SQLiteStore  one SQLite file shared by the workers of a host (one UPSERT ... RETURNING per hit on
+               SQLite >= 3.35, else and for take one BEGIN IMMEDIATE transaction)
+  RedisStore   shared by every host (one Lua script call per hit)
+get_store() returns the store configured by settings.THROTTLE_STORE ({'BACKEND': dotted path,
+'LOCATION': ..., 'OPTIONS': {...}}) or by the configuration passed in, one instance per configuration
+and process.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_STORE = {'BACKEND': 'core.utils.sliding_window.MemoryStore'}
+
+
+def estimate(previous, current, elapsed, window):
+    """Requests in the sliding window ending now: current plus the still-overlapping share of previous."""
+    return previous * (1 - elapsed / window) + current
+
+
+def _counts(stored_window, previous, current, window):
+    """(previous, current) of window, given the counts stored for stored_window."""
+    if stored_window == window:
+        return previous, current
+    if stored_window == window - 1:
+        return current, 0
+    return 0, 0
+
+
+def _take(stored_window, previous, current, window, duration, limit, elapsed):
+    """
+    (counted, previous, current) of window after one more hit, given the counts stored for
+    stored_window: the hit is counted unless limit is given and it would take the estimate over it.
+    """
+    previous, current = _counts(stored_window, previous, current, window)
+    counted = limit is None or estimate(previous, current + 1, elapsed, duration) <= limit
+    return counted, previous, current + counted
+
+
+class MemoryStore:
+    """Counters in this process only; the least recently hit keys are dropped beyond maxsize."""
+
+    def __init__(self, location='', maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, duration):
+        """Count a hit of key in fixed window number window (of duration seconds); returns (previous, current)."""
+        return self.take(key, window, duration)[1:]
+
+    def take(self, key, window, duration, limit=None, elapsed=0):
+        """
+        Count a hit of key in fixed window number window unless it would take the estimate, elapsed
+        seconds into the window, over limit; returns (counted, previous, current).
+        """
+        with self._lock:
+            counted, previous, current = _take(*self._data.get(key, (None, 0, 0)), window, duration, limit, elapsed)
+            self._data[key] = (window, previous, current)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return counted, previous, current
+
+    def peek(self, key, window):
+        """(previous, current) of key in fixed window number window, without counting a hit."""
+        with self._lock:
+            return _counts(*self._data.get(key, (None, 0, 0)), window)
+
+
+class SQLiteStore:
+    """
+    Counters in the SQLite file at location, so every worker of the host shares them. One row per key,
+    updated by a single UPSERT ... RETURNING where SQLite supports it (3.35+) and otherwise read and
+    written in one BEGIN IMMEDIATE transaction, as take always is; expired rows are pruned on about 1
+    hit in prune_every.
+    """
+
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS throttle ('
+        ' key TEXT PRIMARY KEY, bucket INTEGER NOT NULL, prev_count INTEGER NOT NULL,'
+        ' cur_count INTEGER NOT NULL, expires REAL NOT NULL)'
+    )
+    _HIT = (
+        'INSERT INTO throttle (key, bucket, prev_count, cur_count, expires) VALUES (?, ?, 0, 1, ?) '
+        'ON CONFLICT (key) DO UPDATE SET '
+        ' prev_count = CASE WHEN bucket = excluded.bucket THEN prev_count'
+        '  WHEN bucket = excluded.bucket - 1 THEN cur_count ELSE 0 END,'
+        ' cur_count = CASE WHEN bucket = excluded.bucket THEN cur_count + 1 ELSE 1 END,'
+        ' bucket = excluded.bucket, expires = excluded.expires '
+        'RETURNING prev_count, cur_count'
+    )
+    _SELECT = 'SELECT bucket, prev_count, cur_count FROM throttle WHERE key = ?'
+    _WRITE = 'INSERT OR REPLACE INTO throttle (key, bucket, prev_count, cur_count, expires) VALUES (?, ?, ?, ?, ?)'
+
+    def __init__(self, location, timeout=5, prune_every=1000):
+        self.location = location
+        self.timeout = timeout
+        self.prune_every = prune_every
+        self.returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.location, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _prune(self, conn, now):
+        if random.randrange(self.prune_every) == 0:
+            conn.execute('DELETE FROM throttle WHERE expires < ?', (now,))
+
+    def hit(self, key, window, duration):
+        """Count a hit of key in fixed window number window (of duration seconds); returns (previous, current)."""
+        if not self.returning:
+            return self.take(key, window, duration)[1:]
+        conn = self._connection()
+        now = time.time()
+        self._prune(conn, now)
+        previous, current = conn.execute(self._HIT, (key, window, now + 2 * duration)).fetchone()
+        return previous, current
+
+    def take(self, key, window, duration, limit=None, elapsed=0):
+        """
+        Count a hit of key in fixed window number window unless it would take the estimate, elapsed
+        seconds into the window, over limit; returns (counted, previous, current).
+        """
+        conn = self._connection()
+        now = time.time()
+        self._prune(conn, now)
+        # The write lock is taken up front, so no other worker reads the row until this one commits.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(self._SELECT, (key,)).fetchone()
+            counted, previous, current = _take(*(row or (None, 0, 0)), window, duration, limit, elapsed)
+            conn.execute(self._WRITE, (key, window, previous, current, now + 2 * duration))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return counted, previous, current
+
+    def peek(self, key, window):
+        """(previous, current) of key in fixed window number window, without counting a hit."""
+        row = self._connection().execute(self._SELECT, (key,)).fetchone()
+        return _counts(*(row or (None, 0, 0)), window)
+
+
+class RedisStore:
+    """Counters in Redis at location (redis:// URL), shared by every host: one hash per key."""
+
+    # ARGV: window, expiry seconds, limit ('' for none), share of the previous window still overlapping.
+    _TAKE = """
+local d = redis.call('HMGET', KEYS[1], 'w', 'p', 'c')
+local w = tonumber(ARGV[1])
+local stored, p, c = tonumber(d[1]), tonumber(d[2]) or 0, tonumber(d[3]) or 0
+if stored == w - 1 then p = c; c = 0 elseif stored ~= w then p = 0; c = 0 end
+local limit = tonumber(ARGV[3])
+local counted = 0
+if not limit or p * tonumber(ARGV[4]) + c + 1 <= limit then c = c + 1; counted = 1 end
+redis.call('HSET', KEYS[1], 'w', w, 'p', p, 'c', c)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return {counted, p, c}
+"""
+
+    def __init__(self, location, key_prefix='throttle:'):
+        import redis
+
+        self.key_prefix = key_prefix
+        self._redis = redis.Redis.from_url(location)
+        self._take = self._redis.register_script(self._TAKE)
+
+    def hit(self, key, window, duration):
+        """Count a hit of key in fixed window number window (of duration seconds); returns (previous, current)."""
+        return self.take(key, window, duration)[1:]
+
+    def take(self, key, window, duration, limit=None, elapsed=0):
+        """
+        Count a hit of key in fixed window number window unless it would take the estimate, elapsed
+        seconds into the window, over limit; returns (counted, previous, current).
+        """
+        counted, previous, current = self._take(
+            keys=[self.key_prefix + key],
+            args=[window, 2 * int(duration), '' if limit is None else limit, repr(1 - elapsed / duration)],
+        )
+        return bool(counted), int(previous), int(current)
+
+    def peek(self, key, window):
+        """(previous, current) of key in fixed window number window, without counting a hit."""
+        stored_window, previous, current = self._redis.hmget(self.key_prefix + key, 'w', 'p', 'c')
+        if stored_window is None:
+            return 0, 0
+        return _counts(int(stored_window), int(previous), int(current), window)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(config=None):
+    """The store configured by config (default: settings.THROTTLE_STORE, else MemoryStore)."""
+    config = config or getattr(settings, 'THROTTLE_STORE', None) or DEFAULT_STORE
+    options = config.get('OPTIONS', {})
+    key = (config['BACKEND'], config.get('LOCATION', ''), tuple(sorted(options.items())))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = import_string(config['BACKEND'])(config.get('LOCATION', ''), **options)
+    return store
@@ -0,0 +1,100 @@
+"""
+Single-query time series: one GROUP BY over a truncated date field per source queryset, then
+gap-filled in Python so every bucket in the range is present (missing buckets read as zero).
+Buckets: hour, day, week (starting Monday) and month, in the current time zone.
+"""
+from datetime import date, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import TruncDate, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from core.utils.date_ranges import to_date, day_end, day_start
+
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+
+def _bucket_expression(field, is_date, bucket):
+    if bucket == 'hour':
+        if is_date:
+            raise ValueError('hour buckets need a DateTimeField')
+        return TruncHour(field)
+    if bucket == 'day':
+        return F(field) if is_date else TruncDate(field)
+    trunc = TruncWeek if bucket == 'week' else TruncMonth
+    return trunc(field, output_field=models.DateField())
+
+
+def bucket_starts(date_from, date_to, bucket='day'):
+    """Every bucket start covering date_from..date_to inclusive (aware datetimes for hour, else dates)."""
+    date_from, date_to = to_date(date_from), to_date(date_to)
+    if bucket == 'hour':
+        current, end = day_start(date_from), day_end(date_to)
+        if timezone.is_aware(current):
+            # Step in UTC so DST changes add or drop an hour instead of repeating one.
+            current = current.astimezone(dt_timezone.utc)
+        starts = []
+        while current < end:
+            starts.append(timezone.localtime(current) if timezone.is_aware(current) else current)
+            current += timedelta(hours=1)
+        return starts
+    if bucket == 'week':
+        current, step = date_from - timedelta(days=date_from.weekday()), timedelta(days=7)
+    elif bucket == 'month':
+        current, step = date_from.replace(day=1), None
+    elif bucket == 'day':
+        current, step = date_from, timedelta(days=1)
+    else:
+        raise ValueError(f'unknown bucket {bucket!r}; expected one of {BUCKETS}')
+    starts = []
+    while current <= date_to:
+        starts.append(current)
+        if step is None:
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            current += step
+    return starts
+
+
+def time_series(queryset, aggregates, date_from, date_to, field='created_at', bucket='day'):
+    """
+    Aggregate queryset per bucket of field over date_from..date_to inclusive in one query.
+    aggregates: {name: Sum(...)/Count(...)}. Returns [{'bucket': start, name: value, ...}] with one
+    entry per bucket in order; empty buckets (and NULL sums) are 0, or Decimal('0') for decimal aggregates.
+    """
+    is_date = not isinstance(queryset.model._meta.get_field(field), models.DateTimeField)
+    if is_date:
+        bounds = {f'{field}__gte': to_date(date_from), f'{field}__lte': to_date(date_to)}
+    else:
+        bounds = {f'{field}__gte': day_start(date_from), f'{field}__lt': day_end(date_to)}
+    grouped = (
+        queryset.filter(**bounds)
+        .annotate(_bucket=_bucket_expression(field, is_date, bucket))
+        .values('_bucket')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    zeros = {
+        name: Decimal('0') if isinstance(grouped.query.annotations[name].output_field, models.DecimalField) else 0
+        for name in aggregates
+    }
+    rows = {row.pop('_bucket'): row for row in grouped}
+    series = []
+    for start in bucket_starts(date_from, date_to, bucket):
+        row = rows.get(start, {})
+        series.append({
+            'bucket': start,
+            **{name: zero if row.get(name) is None else row[name] for name, zero in zeros.items()},
+        })
+    return series
+
+
+def running_total(series, name, into):
+    """Add a cumulative sum of series[i][name] as series[i][into]; returns series."""
+    total = 0
+    for point in series:
+        total += point[name]
+        point[into] = total
+    return series
@@ -0,0 +1,39 @@
+"""
+INSERT ... ON CONFLICT / ON DUPLICATE KEY counter increments: one statement adds a batch of rows
+into a counter table without reading or locking the rows first (MySQL, SQLite and PostgreSQL).
+"""
+from django.db import connection
+
+
+def upsert_increment(model, key_fields, counters, rows, insert_only=()):
+    """
+    Add rows into model: insert missing keys, otherwise counter = counter + value for every counter.
+    rows: dicts holding key_fields, insert_only fields (attribute names, e.g. user_id) and any
+    counters (missing values count as 0). key_fields must match a unique constraint or the primary key.
+    """
+    if not rows:
+        return
+    opts = model._meta
+    qn = connection.ops.quote_name
+    fields = list(key_fields) + list(insert_only) + list(counters)
+    columns = [opts.get_field(name).column for name in fields]
+    table = qn(opts.db_table)
+    placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    params = []
+    for row in rows:
+        params.extend(row.get(name, 0) for name in fields)
+    counter_columns = [qn(opts.get_field(name).column) for name in counters]
+    if connection.vendor == 'mysql':
+        conflict = ' ON DUPLICATE KEY UPDATE ' + ', '.join(f'{c} = {c} + VALUES({c})' for c in counter_columns)
+    else:
+        key_columns = ', '.join(qn(opts.get_field(name).column) for name in key_fields)
+        conflict = f' ON CONFLICT ({key_columns}) DO UPDATE SET ' + ', '.join(
+            f'{c} = {table}.{c} + excluded.{c}' for c in counter_columns
+        )
+    sql = (
+        f'INSERT INTO {table} ({", ".join(qn(c) for c in columns)}) VALUES '
+        + ', '.join([placeholders] * len(rows))
+        + conflict
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
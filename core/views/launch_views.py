@@ -7,8 +7,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from core import catalog_cache
 from core.permissions import require_role
-from core.models import SuperSetting, UserRole, Game
+from core.models import UserRole
 from core.game_api_client import launch_game, build_launch_url
 
 
@@ -63,14 +64,14 @@ def _launch_game_common(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
     game_uid = game_uid.strip()
-    settings = SuperSetting.get_settings()
+    settings = catalog_cache.get_game_settings()
     if not settings or not settings.game_api_url or not settings.game_api_secret or not settings.game_api_token:
         return None, Response(
             {"detail": "Game API not configured (game_api_url, secret, token)."},
             status=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
     user = request.user
-    game_for_min_bet = Game.objects.filter(game_uid=game_uid).first()
+    game_for_min_bet = catalog_cache.get_game_by_uid(game_uid)
     min_bet = game_for_min_bet.min_bet if game_for_min_bet else None
     wallet_amount, wallet_type = _wallet_amount_for_launch(user, min_bet)
     # Persist which wallet is active so the callback can update the right balance field
@@ -144,7 +145,7 @@ def launch_game_by_id(request, game_id):
     if err:
         return err
 
-    game = Game.objects.select_related("provider").filter(pk=game_id).first()
+    game = catalog_cache.get_game_by_id(game_id)
     if not game:
         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
     if not game.is_active:
@@ -153,14 +154,13 @@ def launch_game_by_id(request, game_id):
         return Response({"error": "Game has no provider identifier"}, status=status.HTTP_400_BAD_REQUEST)
     game_uid = game.game_uid.strip()
 
-    provider = game.provider
-    super_settings = SuperSetting.get_settings()
+    super_settings = catalog_cache.get_game_settings()
 
-    if not provider.is_active:
+    if not game.provider_is_active:
         return Response({"error": "Game provider is not available"}, status=status.HTTP_400_BAD_REQUEST)
 
     # Resolve launch URL: provider api_endpoint, or fallback to SuperSetting game_api_launch_url / game_api_url
-    launch_base = (provider.api_endpoint or "").strip()
+    launch_base = game.api_endpoint
     if not launch_base and super_settings:
         launch_base = (getattr(super_settings, "game_api_launch_url", None) or "").strip() or (super_settings.game_api_url or "").strip()
     if not launch_base:
@@ -168,7 +168,7 @@ def launch_game_by_id(request, game_id):
     launch_base = _normalize_launch_base(launch_base)
 
     # Resolve secret/token: provider values, or fallback to SuperSetting (super game) when provider fields are blank
-    api_secret = (provider.api_secret or "").strip()
+    api_secret = game.api_secret
     if not api_secret and super_settings:
         api_secret = (getattr(super_settings, "game_api_secret", None) or "").strip()
     if not api_secret:
@@ -177,7 +177,7 @@ def launch_game_by_id(request, game_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    api_token = (provider.api_token or "").strip()
+    api_token = game.api_token
     if not api_token and super_settings:
         api_token = (getattr(super_settings, "game_api_token", None) or "").strip()
     if not api_token:
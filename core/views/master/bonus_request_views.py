@@ -8,6 +8,9 @@ from core.permissions import require_role
 from core.models import BonusRequest, UserRole
 from core.serializers import BonusRequestSerializer
 from core.services.bonus_request_service import approve_bonus_request
+from core.services.bulk_approval_service import approve_many, parse_ids, reject_many, summary
+from core.utils.date_ranges import day_start, day_end
+from core.utils.cursor_pagination import cursor_response
 
 
 @api_view(['GET'])
@@ -25,11 +28,11 @@ def bonus_request_list(request):
         qs = qs.filter(status=status_filter)
     date_from = request.query_params.get('date_from', '').strip()
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     date_to = request.query_params.get('date_to', '').strip()
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    return Response(BonusRequestSerializer(qs, many=True, context={'request': request}).data)
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    return cursor_response(request, qs, lambda rows: BonusRequestSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['GET', 'PATCH'])
@@ -92,3 +95,30 @@ def bonus_request_reject(request, pk):
     br.processed_at = timezone.now()
     br.save()
     return Response(BonusRequestSerializer(br, context={'request': request}).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bonus_request_bulk_approve(request):
+    """Approve pending bonus requests in one transaction. Body: ids (max 500), pin. Per-id results."""
+    err = require_role(request, [UserRole.MASTER])
+    if err:
+        return err
+    pin = request.data.get('pin')
+    if not pin or request.user.pin != pin:
+        return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = parse_ids(request.data)
+    results = approve_many(BonusRequest.objects.filter(user__parent=request.user), ids, request.user)
+    return Response(summary(results, 'approved'))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bonus_request_bulk_reject(request):
+    """Reject pending bonus requests. Body: ids, reject_reason. Per-id results."""
+    err = require_role(request, [UserRole.MASTER])
+    if err:
+        return err
+    ids = parse_ids(request.data)
+    results = reject_many(BonusRequest.objects.filter(user__parent=request.user), ids, request.user, request.data.get('reject_reason', ''))
+    return Response(summary(results, 'rejected'))
@@ -5,6 +5,7 @@ from rest_framework import status
 from core.permissions import require_role
 from core.models import GameLog, Transaction, UserRole
 from core.serializers import GameLogSerializer, TransactionSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 def _get_related_transaction(game_log):
@@ -21,8 +22,8 @@ def _get_related_transaction(game_log):
 def game_log_list(request):
     err = require_role(request, [UserRole.MASTER])
     if err: return err
-    qs = GameLog.objects.filter(user__parent=request.user).select_related('user', 'game', 'provider').order_by('-created_at')[:500]
-    return Response(GameLogSerializer(qs, many=True).data)
+    qs = GameLog.objects.filter(master=request.user).exclude(user=request.user).select_related('user', 'game', 'provider').order_by('-created_at')
+    return cursor_response(request, qs, lambda rows: GameLogSerializer(rows, many=True).data, legacy_limit=500)
 
 
 @api_view(['GET'])
@@ -31,7 +32,7 @@ def game_log_detail(request, pk):
     err = require_role(request, [UserRole.MASTER])
     if err:
         return err
-    log = GameLog.objects.filter(user__parent=request.user, pk=pk).select_related('user', 'game', 'provider').first()
+    log = GameLog.objects.filter(master=request.user, pk=pk).exclude(user=request.user).select_related('user', 'game', 'provider').first()
     if not log:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     tx = _get_related_transaction(log)
@@ -7,6 +7,7 @@ from django.utils import timezone
 from core.permissions import require_role
 from core.models import PaymentMode, UserRole
 from core.serializers import PaymentModeSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 def _qs(request):
@@ -28,7 +29,7 @@ def payment_mode_verification_list(request):
         qs = qs.filter(status=status_filter)
     else:
         qs = qs.filter(status='pending')
-    return Response(PaymentModeSerializer(qs, many=True, context={'request': request}).data)
+    return cursor_response(request, qs, lambda rows: PaymentModeSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['POST'])
@@ -1,4 +1,4 @@
-"""Account and Bonus statement listing for master (date range, pagination)."""
+"""Account and Bonus statement listing for master (date range, page/page_size or cursor pagination, CSV / XLSX export)."""
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -6,6 +6,9 @@ from django.db.models import Q
 from core.permissions import require_role
 from core.models import Transaction, UserRole
 from core.models import TransactionActionType, TransactionType
+from core.utils.cursor_pagination import cursor_response, wants_page
+from core.utils.date_ranges import day_start, day_end
+from core.utils.export import export_response, iter_queryset
 
 
 def _parse_dates(request):
@@ -15,9 +18,7 @@ def _parse_dates(request):
 
 
 def _base_qs(request):
-    return Transaction.objects.filter(
-        Q(user__parent=request.user) | Q(user=request.user)
-    ).select_related("user", "processed_by").order_by("-created_at")
+    return Transaction.objects.filter(master=request.user).select_related("user", "processed_by").order_by("-created_at")
 
 
 def _to_statement_row(tx):
@@ -40,18 +41,16 @@ def _to_statement_row(tx):
     }
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def account_statement_list(request):
-    err = require_role(request, [UserRole.MASTER])
-    if err:
-        return err
+def _filtered_qs(request, bonus=False):
+    """Statement rows for the list and export views: date_from, date_to, search."""
     date_from, date_to = _parse_dates(request)
     qs = _base_qs(request)
+    if bonus:
+        qs = qs.filter(transaction_type=TransactionType.BONUS)
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+        qs = qs.filter(created_at__lt=day_end(date_to))
     search = request.query_params.get("search", "").strip()
     if search:
         qs = qs.filter(
@@ -59,6 +58,18 @@ def account_statement_list(request):
             | Q(remarks__icontains=search)
             | Q(reference_id__icontains=search)
         )
+    return qs
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def account_statement_list(request):
+    err = require_role(request, [UserRole.MASTER])
+    if err:
+        return err
+    qs = _filtered_qs(request)
+    if wants_page(request):
+        return cursor_response(request, qs, lambda rows: [_to_statement_row(tx) for tx in rows])
     page = max(1, int(request.query_params.get("page", 1)))
     page_size = min(100, max(1, int(request.query_params.get("page_size", 20))))
     count = qs.count()
@@ -74,19 +85,9 @@ def bonus_statement_list(request):
     err = require_role(request, [UserRole.MASTER])
     if err:
         return err
-    date_from, date_to = _parse_dates(request)
-    qs = _base_qs(request).filter(transaction_type=TransactionType.BONUS)
-    if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    search = request.query_params.get("search", "").strip()
-    if search:
-        qs = qs.filter(
-            Q(user__username__icontains=search)
-            | Q(remarks__icontains=search)
-            | Q(reference_id__icontains=search)
-        )
+    qs = _filtered_qs(request, bonus=True)
+    if wants_page(request):
+        return cursor_response(request, qs, lambda rows: [_to_statement_row(tx) for tx in rows])
     page = max(1, int(request.query_params.get("page", 1)))
     page_size = min(100, max(1, int(request.query_params.get("page_size", 20))))
     count = qs.count()
@@ -94,3 +95,40 @@ def bonus_statement_list(request):
     rows = qs[start : start + page_size]
     results = [_to_statement_row(tx) for tx in rows]
     return Response({"results": results, "count": count})
+
+
+STATEMENT_COLUMNS = [
+    ("Date", "created_at"),
+    ("Transaction ID", "transaction_id"),
+    ("Username", "username"),
+    ("Debit", "debit"),
+    ("Credit", "credit"),
+    ("Balance", "balance"),
+    ("Description", "description"),
+    ("Reference ID", "reference_id"),
+]
+
+
+def _export(request, filename, qs):
+    rows = (dict(_to_statement_row(tx), created_at=tx.created_at) for tx in iter_queryset(qs))
+    return export_response(request, filename, STATEMENT_COLUMNS, rows)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def account_statement_export(request):
+    """Account statement as CSV / XLSX (export_format), same filters as the list."""
+    err = require_role(request, [UserRole.MASTER])
+    if err:
+        return err
+    return _export(request, "account-statement", _filtered_qs(request))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def bonus_statement_export(request):
+    """Bonus statement as CSV / XLSX (export_format), same filters as the list."""
+    err = require_role(request, [UserRole.MASTER])
+    if err:
+        return err
+    return _export(request, "bonus-statement", _filtered_qs(request, bonus=True))
@@ -23,7 +23,7 @@ def _get_related_transaction(game_log):
 def wallet(request):
     err = require_role(request, [UserRole.PLAYER])
     if err: return err
-    u = User.objects.select_related('parent').get(pk=request.user.pk)
+    u = User.objects.select_related('parent', 'withdraw_eligibility').get(pk=request.user.pk)
     ctx = {'request': request}
     eligibility = get_withdraw_eligibility(u)
     parent = u.parent
@@ -3,9 +3,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal, InvalidOperation
-from django.db import transaction
 from core.permissions import require_role
-from core.models import User, UserRole, Transaction, TransactionActionType, TransactionWallet, TransactionType, TransactionStatus
+from core.models import User, UserRole, TransactionWallet, TransactionType
+from core.services.ledger_service import InsufficientBalance, Leg, post_legs
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -37,48 +37,17 @@ def transfer(request):
     if amount <= 0:
         return Response({'detail': 'Invalid amount.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    with transaction.atomic():
-        locked_users = User.objects.select_for_update().filter(id__in=[request.user.id, to_user.id]).in_bulk()
-        sender = locked_users.get(request.user.id)
-        receiver = locked_users.get(to_user.id)
-        if sender is None or receiver is None:
-            return Response({'detail': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-        sender_before = sender.main_balance or Decimal('0')
-        if sender_before < amount:
-            return Response({'detail': 'Insufficient balance.'}, status=status.HTTP_400_BAD_REQUEST)
-        sender_after = sender_before - amount
-        receiver_before = receiver.main_balance or Decimal('0')
-        receiver_after = receiver_before + amount
-
-        sender.main_balance = sender_after
-        receiver.main_balance = receiver_after
-        sender.save(update_fields=['main_balance'])
-        receiver.save(update_fields=['main_balance'])
-
-        Transaction.objects.create(
-            user=sender,
-            action_type=TransactionActionType.OUT,
-            wallet=TransactionWallet.MAIN_BALANCE,
-            transaction_type=TransactionType.TRANSFER,
-            amount=amount,
-            status=TransactionStatus.SUCCESS,
-            to_user=receiver,
-            balance_before=sender_before,
-            balance_after=sender_after,
-            remarks='Transfer',
-        )
-        Transaction.objects.create(
-            user=receiver,
-            action_type=TransactionActionType.IN,
-            wallet=TransactionWallet.MAIN_BALANCE,
-            transaction_type=TransactionType.TRANSFER,
-            amount=amount,
-            status=TransactionStatus.SUCCESS,
-            from_user=sender,
-            balance_before=receiver_before,
-            balance_after=receiver_after,
-            remarks='Transfer',
+    try:
+        post_legs(
+            [
+                Leg(request.user, TransactionWallet.MAIN_BALANCE, -amount, to_user, 'Transfer'),
+                Leg(to_user, TransactionWallet.MAIN_BALANCE, amount, request.user, 'Transfer'),
+            ],
+            TransactionType.TRANSFER,
         )
+    except User.DoesNotExist:
+        return Response({'detail': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+    except InsufficientBalance:
+        return Response({'detail': 'Insufficient balance.'}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response({'detail': 'OK'})
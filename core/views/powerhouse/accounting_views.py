@@ -20,6 +20,8 @@ from core.serializers import (
     DepositSerializer,
     WithdrawSerializer,
 )
+from core.utils.cursor_pagination import cursor_response
+from core.utils.date_ranges import day_range
 
 
 def _parse_date_range(request):
@@ -53,49 +55,58 @@ def accounting_report(request):
     # Game logs in range (players only)
     game_logs_qs = (
         GameLog.objects.filter(game_log_user_filter)
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "game", "provider")
         .order_by("-created_at")
     )
-    game_logs = GameLogSerializer(game_logs_qs, many=True).data
-
-    # P/L: sum(win_amount - lose_amount) from GameLog in range
-    pl_agg = game_logs_qs.aggregate(
-        total=Sum(F("win_amount") - F("lose_amount"))
-    )
-    total_pl = pl_agg.get("total")
-    if total_pl is None:
-        total_pl = Decimal("0")
 
     # Transactions in range
     tx_qs = (
         Transaction.objects.filter(base_user_filter)
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user")
         .order_by("-created_at")
     )
-    transactions = TransactionSerializer(tx_qs, many=True).data
 
     # Deposits in range (all)
     dep_qs = (
         Deposit.objects.all()
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "payment_mode")
         .order_by("-created_at")
     )
-    deposits = DepositSerializer(dep_qs, many=True, context={"request": request}).data
-    deposits_approved = dep_qs.filter(status="approved")
-    total_deposits = deposits_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-    deposits_count = dep_qs.count()
 
     # Withdrawals in range (all)
     wd_qs = (
         Withdraw.objects.all()
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "payment_mode")
         .order_by("-created_at")
     )
-    withdrawals = WithdrawSerializer(wd_qs, many=True, context={"request": request}).data
+
+    # One section as a list (keyset page with limit / cursor), or only the summary
+    sections = {
+        "game_logs": (game_logs_qs, lambda rows: GameLogSerializer(rows, many=True).data),
+        "transactions": (tx_qs, lambda rows: TransactionSerializer(rows, many=True).data),
+        "deposits": (dep_qs, lambda rows: DepositSerializer(rows, many=True, context={"request": request}).data),
+        "withdrawals": (wd_qs, lambda rows: WithdrawSerializer(rows, many=True, context={"request": request}).data),
+    }
+    section = request.query_params.get("section", "").strip()
+    if section in sections:
+        queryset, serialize = sections[section]
+        return cursor_response(request, queryset, serialize)
+
+    # P/L: sum(win_amount - lose_amount) from GameLog in range
+    pl_agg = game_logs_qs.aggregate(
+        total=Sum(F("win_amount") - F("lose_amount"))
+    )
+    total_pl = pl_agg.get("total")
+    if total_pl is None:
+        total_pl = Decimal("0")
+
+    deposits_approved = dep_qs.filter(status="approved")
+    total_deposits = deposits_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
+    deposits_count = dep_qs.count()
     withdrawals_approved = wd_qs.filter(status="approved")
     total_withdrawals = withdrawals_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
     withdrawals_count = wd_qs.count()
@@ -106,14 +117,17 @@ def accounting_report(request):
         "deposits_count": deposits_count,
         "total_withdrawals": str(total_withdrawals),
         "withdrawals_count": withdrawals_count,
-        "game_logs_count": len(game_logs),
-        "transactions_count": len(transactions),
+        "game_logs_count": game_logs_qs.count(),
+        "transactions_count": tx_qs.count(),
     }
 
+    if section == "summary":
+        return Response({"summary": summary})
+
     return Response({
         "summary": summary,
-        "game_logs": game_logs,
-        "transactions": transactions,
-        "deposits": deposits,
-        "withdrawals": withdrawals,
+        "game_logs": sections["game_logs"][1](game_logs_qs),
+        "transactions": sections["transactions"][1](tx_qs),
+        "deposits": sections["deposits"][1](dep_qs),
+        "withdrawals": sections["withdrawals"][1](wd_qs),
     })
@@ -1,21 +1,33 @@
-"""Powerhouse Analytics: overview, game, finance, customer-behaviour, and per-user analytics."""
+"""
+Powerhouse Analytics: overview, game, finance, customer-behaviour, intraday and per-user analytics.
+Totals and daily series read the rollup tables (DailyStat, DailyGameStat, DailyUserStat; see
+core.services.rollup_service), so each endpoint costs a fixed number of grouped queries whatever
+the date range. Series are built with core.utils.time_series; summable per-day series are cached
+per day in core.analytics_cache, so a long range only recomputes today. Intraday reads hourly
+buckets from the raw tables.
+"""
 from datetime import timedelta, datetime
 from decimal import Decimal
 
-from django.db.models import Sum, Count, Avg, F, Q, ExpressionWrapper, DecimalField
+from django.db.models import Sum, Count
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core import analytics_cache, catalog_cache
 from core.permissions import require_role
 from core.models import (
     User, UserRole,
-    GameLog, GameLogType,
-    Transaction, TransactionType,
+    GameLog,
     Deposit, Withdraw,
-    ActivityLog, ActivityAction,
+    ActivityLog,
+    DailyStat, DailyGameStat, DailyUserStat,
 )
+from core.utils.date_ranges import day_range
+from core.utils.time_series import running_total, time_series
+
+ZERO = Decimal("0")
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -33,12 +45,55 @@ def _parse_date_range(request, default_days=30):
     return date_from, date_to
 
 
-def _date_series(date_from, date_to):
-    """Yield each calendar date between date_from and date_to inclusive."""
-    cur = date_from
-    while cur <= date_to:
-        yield cur
-        cur += timedelta(days=1)
+def _game_stats(date_from, date_to):
+    """Player game rollups for date_from..date_to inclusive."""
+    return DailyGameStat.objects.filter(date__gte=date_from, date__lte=date_to, user__role=UserRole.PLAYER)
+
+
+def _platform_days(date_from, date_to):
+    """Per-day DailyStat counters (closed days served from core.analytics_cache)."""
+    return analytics_cache.daily_buckets(
+        "platform", None, date_from, date_to,
+        lambda first, last: time_series(
+            DailyStat.objects.all(),
+            {
+                "deposits": Sum("deposit_amount"),
+                "deposits_count": Sum("deposit_count"),
+                "withdrawals": Sum("withdraw_amount"),
+                "withdrawals_count": Sum("withdraw_count"),
+                "bonus": Sum("bonus_amount"),
+                "bonus_count": Sum("bonus_count"),
+                "new_players": Sum("new_players"),
+            },
+            first, last, field="date",
+        ),
+    )
+
+
+def _game_days(date_from, date_to, player=None):
+    """Per-day game totals for all players, or one player (closed days served from core.analytics_cache)."""
+    if player is None:
+        qs = DailyGameStat.objects.filter(user__role=UserRole.PLAYER)
+    else:
+        qs = DailyGameStat.objects.filter(user=player)
+    return analytics_cache.daily_buckets(
+        "games", player.pk if player else None, date_from, date_to,
+        lambda first, last: time_series(
+            qs,
+            {
+                "bets": Sum("bet_count"),
+                "bet_amount": Sum("bet_amount"),
+                "win_amount": Sum("win_amount"),
+                "lose_amount": Sum("lose_amount"),
+            },
+            first, last, field="date",
+        ),
+    )
+
+
+def _totals(series, *names):
+    """{name: sum over the series} for summable per-day values."""
+    return {name: sum(point[name] for point in series) for name in names}
 
 
 # ── 1. Overview ───────────────────────────────────────────────────────────────
@@ -54,86 +109,54 @@ def overview(request):
 
     # Total players / new registrations in range
     total_players = User.objects.filter(role=UserRole.PLAYER).count()
-    new_players = User.objects.filter(
-        role=UserRole.PLAYER,
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    ).count()
 
-    # Active users (placed a bet or logged in during range)
+    # Active users (any activity during range)
     active_users = (
-        ActivityLog.objects
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
-        .exclude(user__isnull=True)
+        DailyUserStat.objects
+        .filter(date__gte=date_from, date__lte=date_to, activity_count__gt=0)
         .values("user_id")
         .distinct()
         .count()
     )
 
-    # GameLog aggregates for period
-    gl_qs = GameLog.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-        user__role=UserRole.PLAYER,
-    )
-    gl_agg = gl_qs.aggregate(
-        total_bets=Count("id"),
-        total_bet_amount=Sum("bet_amount"),
-        total_win_amount=Sum("win_amount"),
-        total_lose_amount=Sum("lose_amount"),
-    )
-    total_bet_amount = gl_agg["total_bet_amount"] or Decimal("0")
-    total_win_amount = gl_agg["total_win_amount"] or Decimal("0")
+    # Per-day deposits / withdrawals (approved), registrations and game totals
+    day_series = _platform_days(date_from, date_to)
+    game_series = _game_days(date_from, date_to)
+    day_agg = _totals(day_series, "deposits", "deposits_count", "withdrawals", "withdrawals_count", "new_players")
+    gl_agg = _totals(game_series, "bets", "bet_amount", "win_amount")
+    total_bet_amount = gl_agg["bet_amount"]
+    total_win_amount = gl_agg["win_amount"]
     platform_pl = total_bet_amount - total_win_amount
-
-    # Deposits / withdrawals (approved) in range
-    dep_agg = Deposit.objects.filter(
-        status="approved",
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    ).aggregate(total=Sum("amount"), count=Count("id"))
-    wd_agg = Withdraw.objects.filter(
-        status="approved",
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    ).aggregate(total=Sum("amount"), count=Count("id"))
-    total_deposits = dep_agg["total"] or Decimal("0")
-    total_withdrawals = wd_agg["total"] or Decimal("0")
+    total_deposits = day_agg["deposits"]
+    total_withdrawals = day_agg["withdrawals"]
     revenue = total_deposits - total_withdrawals
 
     # Daily series for charts (deposits, withdrawals, bets, P/L)
-    daily = []
-    for d in _date_series(date_from, date_to):
-        dep_day = Deposit.objects.filter(status="approved", created_at__date=d)
-        wd_day = Withdraw.objects.filter(status="approved", created_at__date=d)
-        gl_day = GameLog.objects.filter(created_at__date=d, user__role=UserRole.PLAYER)
-        dep_sum = dep_day.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        wd_sum = wd_day.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        bet_agg = gl_day.aggregate(bet=Sum("bet_amount"), win=Sum("win_amount"))
-        bet_sum = bet_agg["bet"] or Decimal("0")
-        win_sum = bet_agg["win"] or Decimal("0")
-        daily.append({
-            "date": d.isoformat(),
-            "deposits": str(dep_sum),
-            "withdrawals": str(wd_sum),
-            "bets": str(bet_sum),
-            "platform_pl": str(bet_sum - win_sum),
-            "new_players": User.objects.filter(role=UserRole.PLAYER, created_at__date=d).count(),
-        })
+    daily = [
+        {
+            "date": day["bucket"].isoformat(),
+            "deposits": str(day["deposits"]),
+            "withdrawals": str(day["withdrawals"]),
+            "bets": str(game["bet_amount"]),
+            "platform_pl": str(game["bet_amount"] - game["win_amount"]),
+            "new_players": day["new_players"],
+        }
+        for day, game in zip(day_series, game_series)
+    ]
 
     return Response({
         "summary": {
             "total_players": total_players,
-            "new_players": new_players,
+            "new_players": day_agg["new_players"],
             "active_users": active_users,
-            "total_bets": gl_agg["total_bets"] or 0,
+            "total_bets": gl_agg["bets"],
             "total_bet_amount": str(total_bet_amount),
             "total_win_amount": str(total_win_amount),
             "platform_pl": str(platform_pl),
             "total_deposits": str(total_deposits),
-            "deposits_count": dep_agg["count"] or 0,
+            "deposits_count": day_agg["deposits_count"],
             "total_withdrawals": str(total_withdrawals),
-            "withdrawals_count": wd_agg["count"] or 0,
+            "withdrawals_count": day_agg["withdrawals_count"],
             "revenue": str(revenue),
         },
         "daily": daily,
@@ -151,18 +174,14 @@ def game_analytics(request):
 
     date_from, date_to = _parse_date_range(request)
 
-    base_qs = GameLog.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-        user__role=UserRole.PLAYER,
-    )
+    base_qs = _game_stats(date_from, date_to)
 
     # Top 15 games by bet volume
     top_games = (
         base_qs
         .values("game__id", "game__name", "game__image_url", "provider__name")
         .annotate(
-            bet_count=Count("id"),
+            bet_count=Sum("bet_count"),
             bet_amount=Sum("bet_amount"),
             win_amount=Sum("win_amount"),
             lose_amount=Sum("lose_amount"),
@@ -179,7 +198,7 @@ def game_analytics(request):
             "bet_count": r["bet_count"],
             "bet_amount": str(r["bet_amount"] or 0),
             "win_amount": str(r["win_amount"] or 0),
-            "platform_pl": str((r["bet_amount"] or Decimal("0")) - (r["win_amount"] or Decimal("0"))),
+            "platform_pl": str((r["bet_amount"] or ZERO) - (r["win_amount"] or ZERO)),
             "unique_players": r["unique_players"],
         }
         for r in top_games
@@ -190,7 +209,7 @@ def game_analytics(request):
         base_qs
         .values("provider__id", "provider__name")
         .annotate(
-            bet_count=Count("id"),
+            bet_count=Sum("bet_count"),
             bet_amount=Sum("bet_amount"),
             win_amount=Sum("win_amount"),
         )
@@ -202,17 +221,17 @@ def game_analytics(request):
             "provider_name": r["provider__name"] or "Unknown",
             "bet_count": r["bet_count"],
             "bet_amount": str(r["bet_amount"] or 0),
-            "platform_pl": str((r["bet_amount"] or Decimal("0")) - (r["win_amount"] or Decimal("0"))),
+            "platform_pl": str((r["bet_amount"] or ZERO) - (r["win_amount"] or ZERO)),
         }
         for r in providers
     ]
 
-    # Category breakdown
+    # Category breakdown (category is read through the game, so re-categorising a game applies to history)
     categories = (
         base_qs
         .values("game__category__id", "game__category__name")
         .annotate(
-            bet_count=Count("id"),
+            bet_count=Sum("bet_count"),
             bet_amount=Sum("bet_amount"),
             win_amount=Sum("win_amount"),
         )
@@ -224,27 +243,21 @@ def game_analytics(request):
             "category_name": r["game__category__name"] or "Uncategorised",
             "bet_count": r["bet_count"],
             "bet_amount": str(r["bet_amount"] or 0),
-            "platform_pl": str((r["bet_amount"] or Decimal("0")) - (r["win_amount"] or Decimal("0"))),
+            "platform_pl": str((r["bet_amount"] or ZERO) - (r["win_amount"] or ZERO)),
         }
         for r in categories
     ]
 
     # Daily game volume series
-    daily = []
-    for d in _date_series(date_from, date_to):
-        agg = base_qs.filter(created_at__date=d).aggregate(
-            bets=Count("id"),
-            bet_amount=Sum("bet_amount"),
-            win_amount=Sum("win_amount"),
-        )
-        bet = agg["bet_amount"] or Decimal("0")
-        win = agg["win_amount"] or Decimal("0")
-        daily.append({
-            "date": d.isoformat(),
-            "bets": agg["bets"] or 0,
-            "bet_amount": str(bet),
-            "platform_pl": str(bet - win),
-        })
+    daily = [
+        {
+            "date": p["bucket"].isoformat(),
+            "bets": p["bets"],
+            "bet_amount": str(p["bet_amount"]),
+            "platform_pl": str(p["bet_amount"] - p["win_amount"]),
+        }
+        for p in _game_days(date_from, date_to)
+    ]
 
     return Response({
         "top_games": top_games_list,
@@ -256,45 +269,16 @@ def game_analytics(request):
 
 # ── 3. Finance & P/L Analytics ────────────────────────────────────────────────
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def finance_analytics(request):
-    err = require_role(request, [UserRole.POWERHOUSE])
-    if err:
-        return err
-
-    date_from, date_to = _parse_date_range(request)
-
-    dep_base = Deposit.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    )
-    wd_base = Withdraw.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    )
-
-    # Summary
-    dep_agg = dep_base.filter(status="approved").aggregate(total=Sum("amount"), count=Count("id"))
-    wd_agg = wd_base.filter(status="approved").aggregate(total=Sum("amount"), count=Count("id"))
-    total_deposits = dep_agg["total"] or Decimal("0")
-    total_withdrawals = wd_agg["total"] or Decimal("0")
-
-    # Bonus usage
-    bonus_tx = Transaction.objects.filter(
-        transaction_type=TransactionType.BONUS,
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    ).aggregate(total=Sum("amount"), count=Count("id"))
-
-    # Top 10 depositors
-    top_depositors = (
-        dep_base.filter(status="approved")
+def _top_movers(date_from, date_to, prefix):
+    """Top 10 users by approved deposit or withdraw total (prefix 'deposit' / 'withdraw')."""
+    rows = (
+        DailyUserStat.objects
+        .filter(date__gte=date_from, date__lte=date_to, **{f"{prefix}_count__gt": 0})
         .values("user__id", "user__username", "user__name")
-        .annotate(total=Sum("amount"), count=Count("id"))
+        .annotate(total=Sum(f"{prefix}_amount"), count=Sum(f"{prefix}_count"))
         .order_by("-total")[:10]
     )
-    top_depositors_list = [
+    return [
         {
             "user_id": r["user__id"],
             "username": r["user__username"] or "",
@@ -302,65 +286,59 @@ def finance_analytics(request):
             "total": str(r["total"] or 0),
             "count": r["count"],
         }
-        for r in top_depositors
+        for r in rows
     ]
 
-    # Top 10 withdrawers
-    top_withdrawers = (
-        wd_base.filter(status="approved")
-        .values("user__id", "user__username", "user__name")
-        .annotate(total=Sum("amount"), count=Count("id"))
-        .order_by("-total")[:10]
-    )
-    top_withdrawers_list = [
-        {
-            "user_id": r["user__id"],
-            "username": r["user__username"] or "",
-            "name": r["user__name"] or "",
-            "total": str(r["total"] or 0),
-            "count": r["count"],
-        }
-        for r in top_withdrawers
-    ]
 
-    # P/L from GameLog
-    gl_agg = GameLog.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-        user__role=UserRole.PLAYER,
-    ).aggregate(bet=Sum("bet_amount"), win=Sum("win_amount"))
-    platform_pl = (gl_agg["bet"] or Decimal("0")) - (gl_agg["win"] or Decimal("0"))
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def finance_analytics(request):
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+
+    date_from, date_to = _parse_date_range(request)
+
+    # Summary and bonus usage
+    day_series = _platform_days(date_from, date_to)
+    day_agg = _totals(day_series, "deposits", "deposits_count", "withdrawals", "withdrawals_count", "bonus", "bonus_count")
+    total_deposits = day_agg["deposits"]
+    total_withdrawals = day_agg["withdrawals"]
+
+    # Top 10 depositors / withdrawers
+    top_depositors_list = _top_movers(date_from, date_to, "deposit")
+    top_withdrawers_list = _top_movers(date_from, date_to, "withdraw")
+
+    # P/L from game rollups
+    game_series = _game_days(date_from, date_to)
+    for game in game_series:
+        game["pl"] = game["bet_amount"] - game["win_amount"]
+    running_total(game_series, "pl", "running_pl")
+    platform_pl = _totals(game_series, "pl")["pl"]
 
     # Daily series
-    daily = []
-    running_pl = Decimal("0")
-    for d in _date_series(date_from, date_to):
-        dep_d = dep_base.filter(status="approved", created_at__date=d).aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        wd_d = wd_base.filter(status="approved", created_at__date=d).aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        gl_d = GameLog.objects.filter(created_at__date=d, user__role=UserRole.PLAYER).aggregate(
-            bet=Sum("bet_amount"), win=Sum("win_amount")
-        )
-        day_pl = (gl_d["bet"] or Decimal("0")) - (gl_d["win"] or Decimal("0"))
-        running_pl += day_pl
-        daily.append({
-            "date": d.isoformat(),
-            "deposits": str(dep_d),
-            "withdrawals": str(wd_d),
-            "net": str(dep_d - wd_d),
-            "platform_pl": str(day_pl),
-            "running_pl": str(running_pl),
-        })
+    daily = [
+        {
+            "date": day["bucket"].isoformat(),
+            "deposits": str(day["deposits"]),
+            "withdrawals": str(day["withdrawals"]),
+            "net": str(day["deposits"] - day["withdrawals"]),
+            "platform_pl": str(game["pl"]),
+            "running_pl": str(game["running_pl"]),
+        }
+        for day, game in zip(day_series, game_series)
+    ]
 
     return Response({
         "summary": {
             "total_deposits": str(total_deposits),
-            "deposits_count": dep_agg["count"] or 0,
+            "deposits_count": day_agg["deposits_count"],
             "total_withdrawals": str(total_withdrawals),
-            "withdrawals_count": wd_agg["count"] or 0,
+            "withdrawals_count": day_agg["withdrawals_count"],
             "net_cash": str(total_deposits - total_withdrawals),
             "platform_pl": str(platform_pl),
-            "bonus_given": str(bonus_tx["total"] or 0),
-            "bonus_count": bonus_tx["count"] or 0,
+            "bonus_given": str(day_agg["bonus"]),
+            "bonus_count": day_agg["bonus_count"],
         },
         "top_depositors": top_depositors_list,
         "top_withdrawers": top_withdrawers_list,
@@ -380,24 +358,35 @@ def customer_analytics(request):
     date_from, date_to = _parse_date_range(request)
 
     activity_base = ActivityLog.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
+        **day_range(date_from, date_to),
+        user__role=UserRole.PLAYER,
+    )
+    player_days = DailyUserStat.objects.filter(
+        date__gte=date_from,
+        date__lte=date_to,
         user__role=UserRole.PLAYER,
+        activity_count__gt=0,
     )
 
     # Daily active users and login counts
-    daily = []
-    for d in _date_series(date_from, date_to):
-        day_act = activity_base.filter(created_at__date=d)
-        dau = day_act.exclude(user__isnull=True).values("user_id").distinct().count()
-        logins = day_act.filter(action=ActivityAction.LOGIN).count()
-        new_reg = User.objects.filter(role=UserRole.PLAYER, created_at__date=d).count()
-        daily.append({
-            "date": d.isoformat(),
-            "active_users": dau,
-            "logins": logins,
-            "new_registrations": new_reg,
-        })
+    activity_series = analytics_cache.daily_buckets(
+        "player_activity", None, date_from, date_to,
+        lambda first, last: time_series(
+            DailyUserStat.objects.filter(user__role=UserRole.PLAYER, activity_count__gt=0),
+            {"dau": Count("user_id"), "logins": Sum("login_count")},
+            first, last, field="date",
+        ),
+    )
+    signup_series = _platform_days(date_from, date_to)
+    daily = [
+        {
+            "date": activity["bucket"].isoformat(),
+            "active_users": activity["dau"],
+            "logins": activity["logins"],
+            "new_registrations": signups["new_players"],
+        }
+        for activity, signups in zip(activity_series, signup_series)
+    ]
 
     # Device breakdown
     devices = (
@@ -410,16 +399,11 @@ def customer_analytics(request):
     device_list = [{"device": r["device"], "count": r["count"]} for r in devices]
 
     # Top players by bet volume
-    gl_base = GameLog.objects.filter(
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-        user__role=UserRole.PLAYER,
-    )
     top_bettors = (
-        gl_base
+        _game_stats(date_from, date_to)
         .values("user__id", "user__username", "user__name")
         .annotate(
-            bet_count=Count("id"),
+            bet_count=Sum("bet_count"),
             bet_amount=Sum("bet_amount"),
             win_amount=Sum("win_amount"),
         )
@@ -433,7 +417,7 @@ def customer_analytics(request):
             "bet_count": r["bet_count"],
             "bet_amount": str(r["bet_amount"] or 0),
             "win_amount": str(r["win_amount"] or 0),
-            "platform_pl": str((r["bet_amount"] or Decimal("0")) - (r["win_amount"] or Decimal("0"))),
+            "platform_pl": str((r["bet_amount"] or ZERO) - (r["win_amount"] or ZERO)),
         }
         for r in top_bettors
     ]
@@ -448,8 +432,8 @@ def customer_analytics(request):
     action_list = [{"action": r["action"], "count": r["count"]} for r in action_counts]
 
     # Summary metrics
-    total_logins = activity_base.filter(action=ActivityAction.LOGIN).count()
-    unique_active = activity_base.exclude(user__isnull=True).values("user_id").distinct().count()
+    total_logins = _totals(activity_series, "logins")["logins"]
+    unique_active = player_days.values("user_id").distinct().count()
 
     return Response({
         "summary": {
@@ -463,7 +447,67 @@ def customer_analytics(request):
     })
 
 
-# ── 5. Per-User Analytics ─────────────────────────────────────────────────────
+# ── 5. Intraday Monitoring ───────────────────────────────────────────────────
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def intraday(request):
+    """Hourly deposits, withdrawals and player bets for one day (?date=YYYY-MM-DD, default today)."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+
+    today = timezone.now().date()
+    raw = request.query_params.get("date", "").strip()
+    try:
+        day = datetime.strptime(raw, "%Y-%m-%d").date() if raw else today
+    except (ValueError, TypeError):
+        day = today
+
+    # Rollups are daily, so hours come straight from the (created_at-indexed) raw tables.
+    dep_series = time_series(
+        Deposit.objects.filter(status="approved"),
+        {"count": Count("id"), "amount": Sum("amount")}, day, day, bucket="hour",
+    )
+    wd_series = time_series(
+        Withdraw.objects.filter(status="approved"),
+        {"count": Count("id"), "amount": Sum("amount")}, day, day, bucket="hour",
+    )
+    game_series = time_series(
+        GameLog.objects.filter(user__role=UserRole.PLAYER),
+        {"bets": Count("id"), "bet_amount": Sum("bet_amount"), "win_amount": Sum("win_amount")},
+        day, day, bucket="hour",
+    )
+    hourly = [
+        {
+            "hour": dep["bucket"].isoformat(),
+            "deposits": str(dep["amount"]),
+            "deposits_count": dep["count"],
+            "withdrawals": str(wd["amount"]),
+            "withdrawals_count": wd["count"],
+            "bets": game["bets"],
+            "bet_amount": str(game["bet_amount"]),
+            "platform_pl": str(game["bet_amount"] - game["win_amount"]),
+        }
+        for dep, wd, game in zip(dep_series, wd_series, game_series)
+    ]
+
+    return Response({"date": day.isoformat(), "hourly": hourly})
+
+
+# ── 6. Cache Statistics ──────────────────────────────────────────────────────
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """Hit ratios and sizes of this worker's analytics and game catalog caches (for sizing)."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    return Response({"analytics": analytics_cache.cache_stats(), **catalog_cache.cache_stats()})
+
+
+# ── 7. Per-User Analytics ─────────────────────────────────────────────────────
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -479,25 +523,17 @@ def user_analytics(request, user_id):
 
     date_from, date_to = _parse_date_range(request)
 
-    # GameLog summary for this user
-    gl_qs = GameLog.objects.filter(
-        user=player,
-        created_at__date__gte=date_from,
-        created_at__date__lte=date_to,
-    )
-    gl_agg = gl_qs.aggregate(
-        total_bets=Count("id"),
-        total_bet_amount=Sum("bet_amount"),
-        total_win_amount=Sum("win_amount"),
-        total_lose_amount=Sum("lose_amount"),
-    )
+    # Game summary for this user
+    gl_qs = DailyGameStat.objects.filter(user=player, date__gte=date_from, date__lte=date_to)
+    game_series = _game_days(date_from, date_to, player=player)
+    gl_agg = _totals(game_series, "bets", "bet_amount", "win_amount", "lose_amount")
 
     # Top games for this player
     top_games = (
         gl_qs
         .values("game__id", "game__name", "provider__name")
         .annotate(
-            bet_count=Count("id"),
+            bet_count=Sum("bet_count"),
             bet_amount=Sum("bet_amount"),
             win_amount=Sum("win_amount"),
         )
@@ -517,40 +553,34 @@ def user_analytics(request, user_id):
 
     # Deposit / withdraw history for this user in range
     deposits = list(
-        Deposit.objects.filter(user=player, created_at__date__gte=date_from, created_at__date__lte=date_to)
+        Deposit.objects.filter(user=player, **day_range(date_from, date_to))
         .order_by("-created_at")
         .values("id", "amount", "status", "created_at")[:50]
     )
     withdrawals = list(
-        Withdraw.objects.filter(user=player, created_at__date__gte=date_from, created_at__date__lte=date_to)
+        Withdraw.objects.filter(user=player, **day_range(date_from, date_to))
         .order_by("-created_at")
         .values("id", "amount", "status", "created_at")[:50]
     )
 
     # Recent activity
     activities = list(
-        ActivityLog.objects.filter(user=player, created_at__date__gte=date_from, created_at__date__lte=date_to)
+        ActivityLog.objects.filter(user=player, **day_range(date_from, date_to))
         .order_by("-created_at")
         .values("action", "device", "ip", "remarks", "created_at")[:50]
     )
 
     # Daily bet trend for this player
-    daily = []
-    for d in _date_series(date_from, date_to):
-        agg = gl_qs.filter(created_at__date=d).aggregate(
-            bets=Count("id"),
-            bet_amount=Sum("bet_amount"),
-            win_amount=Sum("win_amount"),
-        )
-        bet = agg["bet_amount"] or Decimal("0")
-        win = agg["win_amount"] or Decimal("0")
-        daily.append({
-            "date": d.isoformat(),
-            "bets": agg["bets"] or 0,
-            "bet_amount": str(bet),
-            "win_amount": str(win),
-            "pl": str(bet - win),
-        })
+    daily = [
+        {
+            "date": p["bucket"].isoformat(),
+            "bets": p["bets"],
+            "bet_amount": str(p["bet_amount"]),
+            "win_amount": str(p["win_amount"]),
+            "pl": str(p["bet_amount"] - p["win_amount"]),
+        }
+        for p in game_series
+    ]
 
     dep_agg = Deposit.objects.filter(user=player, status="approved").aggregate(total=Sum("amount"))
     wd_agg = Withdraw.objects.filter(user=player, status="approved").aggregate(total=Sum("amount"))
@@ -569,13 +599,11 @@ def user_analytics(request, user_id):
             "all_time_withdrawals": str(wd_agg["total"] or 0),
         },
         "summary": {
-            "total_bets": gl_agg["total_bets"] or 0,
-            "total_bet_amount": str(gl_agg["total_bet_amount"] or 0),
-            "total_win_amount": str(gl_agg["total_win_amount"] or 0),
-            "total_lose_amount": str(gl_agg["total_lose_amount"] or 0),
-            "platform_pl": str(
-                (gl_agg["total_bet_amount"] or Decimal("0")) - (gl_agg["total_win_amount"] or Decimal("0"))
-            ),
+            "total_bets": gl_agg["bets"],
+            "total_bet_amount": str(gl_agg["bet_amount"]),
+            "total_win_amount": str(gl_agg["win_amount"]),
+            "total_lose_amount": str(gl_agg["lose_amount"]),
+            "platform_pl": str(gl_agg["bet_amount"] - gl_agg["win_amount"]),
         },
         "top_games": top_games_list,
         "deposits": [
@@ -1,13 +1,18 @@
 """Powerhouse dashboard: aggregates, recent activity, date range, series."""
+from datetime import timedelta
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count, Sum
 
 from core.permissions import require_role
-from core.models import User, UserRole, Deposit, Withdraw, BonusRequest
+from core.models import User, UserRole, Deposit, Withdraw
+from core.services.balance_summary_service import platform_totals
+from core.services.pending_service import PLATFORM, pending_counts
+from core.utils.date_ranges import day_range
+from core.utils.time_series import time_series
 
 
 def _parse_date(s):
@@ -31,26 +36,22 @@ def dashboard(request):
     date_from = _parse_date(request.query_params.get('date_from'))
     date_to = _parse_date(request.query_params.get('date_to'))
 
-    pending_deposits = Deposit.objects.filter(status='pending').count()
-    pending_withdrawals = Withdraw.objects.filter(status='pending').count()
-    pending_bonus_requests = BonusRequest.objects.filter(status='pending').count()
-    players = User.objects.filter(role=UserRole.PLAYER).count()
-    masters = User.objects.filter(role=UserRole.MASTER).count()
-    supers = User.objects.filter(role=UserRole.SUPER).count()
-    total_balance = sum(
-        (u.main_balance or 0) for u in User.objects.filter(role=UserRole.PLAYER)
-    )
+    pending = pending_counts(PLATFORM)
+    totals = platform_totals()
+    players = totals['player_count']
+    masters = totals['master_count']
+    supers = totals['super_count']
+    total_balance = totals['player_main_balance']
 
     # Today aggregates
-    deposits_today = Deposit.objects.filter(created_at__date=today)
+    deposits_today = Deposit.objects.filter(**day_range(today))
     deposits_today_count = deposits_today.count()
     deposits_today_sum = deposits_today.aggregate(s=Sum('amount'))['s'] or Decimal('0')
-    withdrawals_today = Withdraw.objects.filter(created_at__date=today)
+    withdrawals_today = Withdraw.objects.filter(**day_range(today))
     withdrawals_today_count = withdrawals_today.count()
     withdrawals_today_sum = withdrawals_today.aggregate(s=Sum('amount'))['s'] or Decimal('0')
 
     # Players added in last 7 days
-    from datetime import timedelta
     week_ago = now - timedelta(days=7)
     players_added_7d = User.objects.filter(role=UserRole.PLAYER, created_at__gte=week_ago).count()
 
@@ -83,23 +84,27 @@ def dashboard(request):
     ]
 
     # Last 7 days daily series for charts
-    series_7d = []
-    for i in range(6, -1, -1):
-        d = today - timedelta(days=i)
-        dep_day = Deposit.objects.filter(created_at__date=d)
-        wd_day = Withdraw.objects.filter(created_at__date=d)
-        series_7d.append({
-            'date': d.isoformat(),
-            'deposits_count': dep_day.count(),
-            'deposits_sum': str(dep_day.aggregate(s=Sum('amount'))['s'] or Decimal('0')),
-            'withdrawals_count': wd_day.count(),
-            'withdrawals_sum': str(wd_day.aggregate(s=Sum('amount'))['s'] or Decimal('0')),
-        })
+    dep_series = time_series(
+        Deposit.objects.all(), {'count': Count('id'), 'sum': Sum('amount')}, today - timedelta(days=6), today,
+    )
+    wd_series = time_series(
+        Withdraw.objects.all(), {'count': Count('id'), 'sum': Sum('amount')}, today - timedelta(days=6), today,
+    )
+    series_7d = [
+        {
+            'date': dep['bucket'].isoformat(),
+            'deposits_count': dep['count'],
+            'deposits_sum': str(dep['sum']),
+            'withdrawals_count': wd['count'],
+            'withdrawals_sum': str(wd['sum']),
+        }
+        for dep, wd in zip(dep_series, wd_series)
+    ]
 
     payload = {
-        'pending_deposits': pending_deposits,
-        'pending_withdrawals': pending_withdrawals,
-        'pending_bonus_requests': pending_bonus_requests,
+        'pending_deposits': pending['deposits'],
+        'pending_withdrawals': pending['withdrawals'],
+        'pending_bonus_requests': pending['bonus_requests'],
         'total_players': players,
         'total_masters': masters,
         'total_supers': supers,
@@ -1,4 +1,4 @@
-"""Powerhouse: Game log list and detail."""
+"""Powerhouse: Game log list, export and detail."""
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -6,6 +6,9 @@ from rest_framework import status
 from core.permissions import require_role
 from core.models import GameLog, Transaction, UserRole
 from core.serializers import GameLogSerializer, TransactionSerializer
+from core.utils.cursor_pagination import cursor_response
+from core.utils.date_ranges import day_start, day_end
+from core.utils.export import GAME_LOG_COLUMNS, export_response, iter_queryset
 
 
 def _get_related_transaction(game_log):
@@ -17,14 +20,37 @@ def _get_related_transaction(game_log):
     ).first()
 
 
+def _filtered_qs(request):
+    """Game logs for the list and export views: date_from, date_to."""
+    qs = GameLog.objects.all().select_related('user', 'game', 'provider').order_by('-created_at')
+    date_from = request.query_params.get('date_from', '').strip()
+    if date_from:
+        qs = qs.filter(created_at__gte=day_start(date_from))
+    date_to = request.query_params.get('date_to', '').strip()
+    if date_to:
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    return qs
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def game_log_list(request):
     err = require_role(request, [UserRole.POWERHOUSE])
     if err:
         return err
-    qs = GameLog.objects.all().select_related('user', 'game', 'provider').order_by('-created_at')[:500]
-    return Response(GameLogSerializer(qs, many=True).data)
+    qs = _filtered_qs(request)
+    return cursor_response(request, qs, lambda rows: GameLogSerializer(rows, many=True).data, legacy_limit=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def game_log_export(request):
+    """Game logs as CSV / XLSX (export_format), same filters as the list."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    qs = _filtered_qs(request).defer('provider_raw_data')
+    return export_response(request, 'game-logs', GAME_LOG_COLUMNS, iter_queryset(qs))
 
 
 @api_view(['GET'])
@@ -5,6 +5,7 @@ from rest_framework import status
 from core.permissions import require_role
 from core.models import User, UserRole
 from core.serializers import UserMinimalSerializer, KycListSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 @api_view(['GET'])
@@ -14,7 +15,7 @@ def kyc_list(request):
     if err:
         return err
     qs = User.objects.filter(role=UserRole.PLAYER, kyc_status='pending')
-    return Response(KycListSerializer(qs, many=True, context={'request': request}).data)
+    return cursor_response(request, qs, lambda rows: KycListSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['POST'])
@@ -7,6 +7,7 @@ from django.utils import timezone
 from core.permissions import require_role
 from core.models import PaymentMode, UserRole
 from core.serializers import PaymentModeSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 @api_view(['GET'])
@@ -19,7 +20,7 @@ def payment_mode_verification_list(request):
     qs = PaymentMode.objects.all().select_related('user', 'action_by', 'payment_method').order_by('-created_at')
     if status_filter and status_filter != 'all':
         qs = qs.filter(status=status_filter)
-    return Response(PaymentModeSerializer(qs, many=True, context={'request': request}).data)
+    return cursor_response(request, qs, lambda rows: PaymentModeSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['POST'])
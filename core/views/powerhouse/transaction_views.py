@@ -1,10 +1,10 @@
 """Powerhouse: Transaction list (view only)."""
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 from core.permissions import require_role
 from core.models import Transaction, UserRole
 from core.serializers import TransactionSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 @api_view(['GET'])
@@ -13,5 +13,5 @@ def transaction_list(request):
     err = require_role(request, [UserRole.POWERHOUSE])
     if err:
         return err
-    qs = Transaction.objects.all().select_related('user').order_by('-created_at')[:500]
-    return Response(TransactionSerializer(qs, many=True).data)
+    qs = Transaction.objects.all().select_related('user').order_by('-created_at')
+    return cursor_response(request, qs, lambda rows: TransactionSerializer(rows, many=True).data, legacy_limit=500)
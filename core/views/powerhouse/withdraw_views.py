@@ -1,4 +1,4 @@
-"""Powerhouse: Withdraw list, detail, approve/reject, withdraw_direct."""
+"""Powerhouse: Withdraw list, export, detail, approve/reject, withdraw_direct."""
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -11,6 +11,10 @@ from core.models import Withdraw, User, UserRole
 from core.serializers import WithdrawSerializer
 from core.services.withdraw_service import approve_withdraw
 from core.services.reference_id_validation import validate_reference_id_unique, validation_error_response, normalize_reference_id
+from core.services.bulk_approval_service import approve_many, parse_ids, reject_many, summary
+from core.utils.date_ranges import day_start, day_end
+from core.utils.cursor_pagination import cursor_response
+from core.utils.export import WITHDRAW_COLUMNS, export_response, iter_queryset
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 
@@ -65,12 +69,8 @@ def withdraw_direct(request):
     return Response(WithdrawSerializer(wd, context={'request': request}).data, status=status.HTTP_201_CREATED)
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def withdraw_list(request):
-    err = require_role(request, [UserRole.POWERHOUSE])
-    if err:
-        return err
+def _filtered_qs(request):
+    """Withdrawals for the list and export views: search, status, date_from, date_to."""
     qs = Withdraw.objects.all().select_related('user', 'payment_mode', 'processed_by').order_by('-created_at')
     search = request.query_params.get('search', '').strip()
     if search:
@@ -80,11 +80,32 @@ def withdraw_list(request):
         qs = qs.filter(status=status_filter)
     date_from = request.query_params.get('date_from', '').strip()
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     date_to = request.query_params.get('date_to', '').strip()
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    return Response(WithdrawSerializer(qs, many=True, context={'request': request}).data)
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    return qs
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def withdraw_list(request):
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    qs = _filtered_qs(request)
+    return cursor_response(request, qs, lambda rows: WithdrawSerializer(rows, many=True, context={'request': request}).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def withdraw_export(request):
+    """Withdrawals as CSV / XLSX (export_format), same filters as the list."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    qs = _filtered_qs(request).select_related('payment_mode__payment_method')
+    return export_response(request, 'withdrawals', WITHDRAW_COLUMNS, iter_queryset(qs))
 
 
 @api_view(['GET', 'PATCH'])
@@ -166,3 +187,37 @@ def withdraw_reject(request, pk):
     wd.processed_at = timezone.now()
     wd.save()
     return Response(WithdrawSerializer(wd, context={'request': request}).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def withdraw_bulk_approve(request):
+    """Approve pending withdrawals in one transaction. Body: ids (max 500), pin. Per-id results."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    pin = request.data.get('pin')
+    password = request.data.get('password')
+    if pin is not None and pin != '':
+        if not request.user.pin or request.user.pin != pin:
+            return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
+    elif password is not None and password != '':
+        if not request.user.check_password(password):
+            return Response({'detail': 'Invalid password.'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        return Response({'detail': 'PIN or password required.'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = parse_ids(request.data)
+    results = approve_many(Withdraw.objects.all(), ids, request.user)
+    return Response(summary(results, 'approved'))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def withdraw_bulk_reject(request):
+    """Reject pending withdrawals. Body: ids, reject_reason. Per-id results."""
+    err = require_role(request, [UserRole.POWERHOUSE])
+    if err:
+        return err
+    ids = parse_ids(request.data)
+    results = reject_many(Withdraw.objects.all(), ids, request.user, request.data.get('reject_reason', ''))
+    return Response(summary(results, 'rejected'))
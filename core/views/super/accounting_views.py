@@ -5,6 +5,7 @@ from django.db.models import Q, Sum, F
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework import status
 
 from core.permissions import require_role
 from core.models import (
@@ -21,6 +22,16 @@ from core.serializers import (
     DepositSerializer,
     WithdrawSerializer,
 )
+from core.utils.cursor_pagination import cursor_response
+from core.utils.date_ranges import day_range
+from core.utils.export import (
+    DEPOSIT_COLUMNS,
+    GAME_LOG_COLUMNS,
+    TRANSACTION_COLUMNS,
+    WITHDRAW_COLUMNS,
+    export_response,
+    iter_queryset,
+)
 
 
 def _parse_date_range(request):
@@ -49,90 +60,112 @@ def _serialize_settlement(tx):
     }
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def accounting_report(request):
-    err = require_role(request, [UserRole.SUPER])
-    if err:
-        return err
+def _report_querysets(request):
+    """Querysets of the report sections for the requesting super, scoped to date_from..date_to."""
     date_from, date_to = _parse_date_range(request)
 
-    # Scope: super's masters and their players (and self)
-    base_user_filter = (
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user) | Q(user=request.user)
-    )
-    game_log_user_filter = (
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user)
-    )
+    # Scope: super's masters and their players (and self), via the denormalized upline columns
+    base_user_filter = Q(super=request.user)
+    game_log_user_filter = Q(super=request.user) & ~Q(user=request.user)
 
     # Game logs in range
     game_logs_qs = (
         GameLog.objects.filter(game_log_user_filter)
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "game", "provider")
         .order_by("-created_at")
     )
-    game_logs = GameLogSerializer(game_logs_qs, many=True).data
-
-    # P/L: sum(win_amount - lose_amount) from GameLog in range
-    pl_agg = game_logs_qs.aggregate(
-        total=Sum(F("win_amount") - F("lose_amount"))
-    )
-    total_pl = pl_agg.get("total")
-    if total_pl is None:
-        total_pl = Decimal("0")
 
     # Transactions in range
     tx_qs = (
         Transaction.objects.filter(base_user_filter)
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user")
         .order_by("-created_at")
     )
-    transactions = TransactionSerializer(tx_qs, many=True).data
 
     # Deposits in range
     dep_qs = (
         Deposit.objects.filter(
-            Q(user__parent=request.user) | Q(user__parent__parent=request.user)
+            Q(user__super=request.user) & ~Q(user=request.user)
         )
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "payment_mode")
         .order_by("-created_at")
     )
-    deposits = DepositSerializer(dep_qs, many=True, context={"request": request}).data
-    deposits_approved = dep_qs.filter(status="approved")
-    total_deposits = deposits_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-    deposits_count = dep_qs.count()
 
     # Withdrawals in range
     wd_qs = (
         Withdraw.objects.filter(
-            Q(user__parent=request.user) | Q(user__parent__parent=request.user)
+            Q(user__super=request.user) & ~Q(user=request.user)
         )
-        .filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .filter(**day_range(date_from, date_to))
         .select_related("user", "payment_mode")
         .order_by("-created_at")
     )
-    withdrawals = WithdrawSerializer(wd_qs, many=True, context={"request": request}).data
-    withdrawals_approved = wd_qs.filter(status="approved")
-    total_withdrawals = withdrawals_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-    withdrawals_count = wd_qs.count()
 
     # Settlements: master -> super in range
     settlements_qs = (
         Transaction.objects.filter(
             transaction_type=TransactionType.SETTLEMENT,
             to_user=request.user,
-            created_at__date__gte=date_from,
-            created_at__date__lte=date_to,
+            **day_range(date_from, date_to),
         )
         .select_related("from_user")
         .order_by("-created_at")
     )
-    settlements = [_serialize_settlement(tx) for tx in settlements_qs]
-    settlements_total = sum(Decimal(s["amount"]) for s in settlements)
-    settlements_count = len(settlements)
+
+    return {
+        "game_logs": game_logs_qs,
+        "transactions": tx_qs,
+        "deposits": dep_qs,
+        "withdrawals": wd_qs,
+        "settlements": settlements_qs,
+    }
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def accounting_report(request):
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    querysets = _report_querysets(request)
+    game_logs_qs = querysets["game_logs"]
+    tx_qs = querysets["transactions"]
+    dep_qs = querysets["deposits"]
+    wd_qs = querysets["withdrawals"]
+    settlements_qs = querysets["settlements"]
+
+    # One section as a list (keyset page with limit / cursor), or only the summary
+    sections = {
+        "game_logs": (game_logs_qs, lambda rows: GameLogSerializer(rows, many=True).data),
+        "transactions": (tx_qs, lambda rows: TransactionSerializer(rows, many=True).data),
+        "deposits": (dep_qs, lambda rows: DepositSerializer(rows, many=True, context={"request": request}).data),
+        "withdrawals": (wd_qs, lambda rows: WithdrawSerializer(rows, many=True, context={"request": request}).data),
+        "settlements": (settlements_qs, lambda rows: [_serialize_settlement(tx) for tx in rows]),
+    }
+    section = request.query_params.get("section", "").strip()
+    if section in sections:
+        queryset, serialize = sections[section]
+        return cursor_response(request, queryset, serialize)
+
+    # P/L: sum(win_amount - lose_amount) from GameLog in range
+    pl_agg = game_logs_qs.aggregate(
+        total=Sum(F("win_amount") - F("lose_amount"))
+    )
+    total_pl = pl_agg.get("total")
+    if total_pl is None:
+        total_pl = Decimal("0")
+
+    deposits_approved = dep_qs.filter(status="approved")
+    total_deposits = deposits_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
+    deposits_count = dep_qs.count()
+    withdrawals_approved = wd_qs.filter(status="approved")
+    total_withdrawals = withdrawals_approved.aggregate(s=Sum("amount"))["s"] or Decimal("0")
+    withdrawals_count = wd_qs.count()
+    settlements_total = settlements_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
+    settlements_count = settlements_qs.count()
 
     summary = {
         "total_pl": str(total_pl),
@@ -140,17 +173,55 @@ def accounting_report(request):
         "deposits_count": deposits_count,
         "total_withdrawals": str(total_withdrawals),
         "withdrawals_count": withdrawals_count,
-        "game_logs_count": len(game_logs),
-        "transactions_count": len(transactions),
+        "game_logs_count": game_logs_qs.count(),
+        "transactions_count": tx_qs.count(),
         "settlements_count": settlements_count,
         "settlements_total": str(settlements_total),
     }
 
+    if section == "summary":
+        return Response({"summary": summary})
+
     return Response({
         "summary": summary,
-        "game_logs": game_logs,
-        "transactions": transactions,
-        "deposits": deposits,
-        "withdrawals": withdrawals,
-        "settlements": settlements,
+        "game_logs": sections["game_logs"][1](game_logs_qs),
+        "transactions": sections["transactions"][1](tx_qs),
+        "deposits": sections["deposits"][1](dep_qs),
+        "withdrawals": sections["withdrawals"][1](wd_qs),
+        "settlements": sections["settlements"][1](settlements_qs),
     })
+
+
+EXPORT_COLUMNS = {
+    "game_logs": GAME_LOG_COLUMNS,
+    "transactions": TRANSACTION_COLUMNS,
+    "deposits": DEPOSIT_COLUMNS,
+    "withdrawals": WITHDRAW_COLUMNS,
+    "settlements": [
+        ("ID", "id"),
+        ("Date", "created_at"),
+        ("From", "from_user.username"),
+        ("Amount", "amount"),
+    ],
+}
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def accounting_report_export(request):
+    """One report section (section=game_logs|transactions|deposits|withdrawals|settlements) as CSV / XLSX."""
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    section = request.query_params.get("section", "").strip()
+    if section not in EXPORT_COLUMNS:
+        return Response(
+            {"detail": f"section must be one of: {', '.join(EXPORT_COLUMNS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    qs = _report_querysets(request)[section]
+    if section == "game_logs":
+        qs = qs.defer("provider_raw_data")
+    elif section in ("deposits", "withdrawals"):
+        qs = qs.select_related("processed_by", "payment_mode__payment_method")
+    return export_response(request, f"accounting-{section.replace('_', '-')}", EXPORT_COLUMNS[section], iter_queryset(qs))
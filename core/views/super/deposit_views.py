@@ -10,6 +10,9 @@ from core.models import Deposit, PaymentMode, User, UserRole
 from core.serializers import DepositSerializer, DepositCreateSerializer, PaymentModeSerializer
 from core.services.deposit_service import approve_deposit
 from core.services.reference_id_validation import validate_reference_id_unique, validation_error_response
+from core.services.bulk_approval_service import approve_many, parse_ids, reject_many, summary
+from core.utils.date_ranges import day_start, day_end
+from core.utils.cursor_pagination import cursor_response
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 
@@ -44,7 +47,7 @@ def deposit_list(request):
     if err:
         return err
     qs = Deposit.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user)
+        Q(user__super=request.user) & ~Q(user=request.user)
     ).select_related('user', 'payment_mode').order_by('-created_at')
     search = request.query_params.get('search', '').strip()
     if search:
@@ -54,12 +57,11 @@ def deposit_list(request):
         qs = qs.filter(status=status_filter)
     date_from = request.query_params.get('date_from', '').strip()
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     date_to = request.query_params.get('date_to', '').strip()
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    qs = qs[:500]
-    return Response(DepositSerializer(qs, many=True, context={'request': request}).data)
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    return cursor_response(request, qs, lambda rows: DepositSerializer(rows, many=True, context={'request': request}).data, legacy_limit=500)
 
 @api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
@@ -68,7 +70,7 @@ def deposit_detail(request, pk):
     if err:
         return err
     obj = Deposit.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user), pk=pk
+        Q(user__super=request.user) & ~Q(user=request.user), pk=pk
     ).first()
     if not obj:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
@@ -179,7 +181,7 @@ def deposit_approve(request, pk):
     if not pin or request.user.pin != pin:
         return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
     dep = Deposit.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user),
+        Q(user__super=request.user) & ~Q(user=request.user),
         pk=pk, status='pending'
     ).first()
     if not dep:
@@ -196,7 +198,7 @@ def deposit_reject(request, pk):
     if err:
         return err
     dep = Deposit.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user),
+        Q(user__super=request.user) & ~Q(user=request.user),
         pk=pk, status='pending'
     ).first()
     if not dep:
@@ -207,3 +209,30 @@ def deposit_reject(request, pk):
     dep.processed_at = timezone.now()
     dep.save()
     return Response(DepositSerializer(dep, context={'request': request}).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def deposit_bulk_approve(request):
+    """Approve pending deposits in one transaction. Body: ids (max 500), pin. Per-id results."""
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    pin = request.data.get('pin')
+    if not pin or request.user.pin != pin:
+        return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = parse_ids(request.data)
+    results = approve_many(Deposit.objects.filter(Q(user__super=request.user) & ~Q(user=request.user)), ids, request.user)
+    return Response(summary(results, 'approved'))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def deposit_bulk_reject(request):
+    """Reject pending deposits. Body: ids, reject_reason. Per-id results."""
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    ids = parse_ids(request.data)
+    results = reject_many(Deposit.objects.filter(Q(user__super=request.user) & ~Q(user=request.user)), ids, request.user, request.data.get('reject_reason', ''))
+    return Response(summary(results, 'rejected'))
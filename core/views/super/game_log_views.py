@@ -6,6 +6,7 @@ from django.db.models import Q
 from core.permissions import require_role
 from core.models import GameLog, Transaction, UserRole
 from core.serializers import GameLogSerializer, TransactionSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 def _get_related_transaction(game_log):
@@ -24,9 +25,9 @@ def game_log_list(request):
     if err:
         return err
     qs = GameLog.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user)
-    ).select_related('user', 'game', 'provider').order_by('-created_at')[:500]
-    return Response(GameLogSerializer(qs, many=True).data)
+        Q(super=request.user) & ~Q(user=request.user)
+    ).select_related('user', 'game', 'provider').order_by('-created_at')
+    return cursor_response(request, qs, lambda rows: GameLogSerializer(rows, many=True).data, legacy_limit=500)
 
 
 @api_view(['GET'])
@@ -36,7 +37,7 @@ def game_log_detail(request, pk):
     if err:
         return err
     log = GameLog.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user),
+        Q(super=request.user) & ~Q(user=request.user),
         pk=pk,
     ).select_related('user', 'game', 'provider').first()
     if not log:
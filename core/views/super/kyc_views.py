@@ -5,6 +5,7 @@ from rest_framework import status
 from core.permissions import require_role
 from core.models import User, UserRole
 from core.serializers import UserMinimalSerializer, KycListSerializer
+from core.utils.cursor_pagination import cursor_response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -12,8 +13,8 @@ def kyc_list(request):
     err = require_role(request, [UserRole.SUPER])
     if err:
         return err
-    qs = User.objects.filter(role=UserRole.PLAYER, kyc_status='pending', parent__parent=request.user)
-    return Response(KycListSerializer(qs, many=True, context={'request': request}).data)
+    qs = User.objects.filter(role=UserRole.PLAYER, kyc_status='pending', super=request.user)
+    return cursor_response(request, qs, lambda rows: KycListSerializer(rows, many=True, context={'request': request}).data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -21,7 +22,7 @@ def kyc_approve(request, pk):
     err = require_role(request, [UserRole.SUPER])
     if err:
         return err
-    user = User.objects.filter(pk=pk, role=UserRole.PLAYER, parent__parent=request.user).first()
+    user = User.objects.filter(pk=pk, role=UserRole.PLAYER, super=request.user).first()
     if not user:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     user.kyc_status = 'approved'
@@ -36,7 +37,7 @@ def kyc_reject(request, pk):
     err = require_role(request, [UserRole.SUPER])
     if err:
         return err
-    user = User.objects.filter(pk=pk, role=UserRole.PLAYER, parent__parent=request.user).first()
+    user = User.objects.filter(pk=pk, role=UserRole.PLAYER, super=request.user).first()
     if not user:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     user.kyc_status = 'rejected'
@@ -7,6 +7,7 @@ from django.utils import timezone
 from core.permissions import require_role, get_masters_queryset
 from core.models import PaymentMode, UserRole
 from core.serializers import PaymentModeSerializer
+from core.utils.cursor_pagination import cursor_response
 
 
 def _qs(request):
@@ -25,7 +26,7 @@ def payment_mode_verification_list(request):
     qs = _qs(request).select_related('user', 'action_by', 'payment_method').order_by('-created_at')
     if status_filter and status_filter != 'all':
         qs = qs.filter(status=status_filter)
-    return Response(PaymentModeSerializer(qs, many=True, context={'request': request}).data)
+    return cursor_response(request, qs, lambda rows: PaymentModeSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['POST'])
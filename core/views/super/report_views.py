@@ -1,133 +1,169 @@
-"""Reports for super: Total D/W, Super Master D/W, Super D/W State."""
+"""Reports for super: Total D/W, Super Master D/W, Super D/W State (lists and CSV / XLSX exports)."""
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum
 from core.permissions import require_role, get_masters_queryset, get_players_queryset, get_supers_queryset
-from core.models import Deposit, Withdraw, UserRole
+from core.models import User, UserRole
+from core.services.dw_report_service import dw_rows, page_rows, sort_rows
+from core.utils.export import export_response
 
 
-def _date_filter(qs, date_from, date_to, date_field="created_at"):
-    if date_from:
-        qs = qs.filter(**{f"{date_field}__date__gte": date_from})
-    if date_to:
-        qs = qs.filter(**{f"{date_field}__date__lte": date_to})
-    return qs
+def _dates(request):
+    return request.query_params.get("date_from", "").strip(), request.query_params.get("date_to", "").strip()
+
+
+def _is_powerhouse(user):
+    role_value = getattr(UserRole.POWERHOUSE, "value", "powerhouse")
+    return getattr(user, "role", None) == UserRole.POWERHOUSE or getattr(user, "role", None) == role_value
+
+
+def _report_rows(request, owners, owner_lookup, columns):
+    """
+    D/W rows for owners (see dw_report_service), sorted by ?ordering and shaped as columns:
+    output key -> dw_rows key (amounts as strings).
+    """
+    rows = dw_rows(owners, owner_lookup, *_dates(request))
+    rows = sort_rows(rows, request.query_params.get("ordering"), columns)
+    return [
+        {key: str(row[source]) if isinstance(row[source], Decimal) else row[source] for key, source in columns.items()}
+        for row in rows
+    ]
+
+
+def _report_response(request, rows):
+    """Plain list, or {"results", "count"} when page / page_size is given."""
+    params = request.query_params
+    if "page" in params or "page_size" in params:
+        results, count = page_rows(rows, params.get("page"), params.get("page_size"))
+        return Response({"results": results, "count": count})
+    return Response(rows)
+
+
+TOTAL_DW_FIELDS = {
+    "username": "username",
+    "user_id": "user_id",
+    "deposit": "deposit",
+    "withdrawal": "withdrawal",
+    "total": "net",
+}
+SUPER_MASTER_DW_FIELDS = {
+    "username": "username",
+    "user_id": "user_id",
+    "no_of_deposit": "deposit_count",
+    "deposit": "deposit",
+    "no_of_withdrawal": "withdraw_count",
+    "withdrawal": "withdrawal",
+    "total": "net",
+}
+SUPER_DW_STATE_FIELDS = {
+    "username": "username",
+    "user_id": "user_id",
+    "no_of_deposit": "deposit_count",
+    "total_deposit": "deposit",
+    "no_of_withdrawal": "withdraw_count",
+    "total_withdrawal": "withdrawal",
+    "net_d_w": "net",
+    "total_d_w": "gross",
+}
+
+
+def _total_dw_rows(request):
+    """Per-player deposit/withdrawal totals (super: its players; powerhouse: all players)."""
+    return _report_rows(request, get_players_queryset(request.user), "user", TOTAL_DW_FIELDS)
+
+
+def _super_master_dw_rows(request):
+    """One row per master of the requesting super (powerhouse: every master), over its players' D/W."""
+    return _report_rows(request, get_masters_queryset(request.user), "user__parent", SUPER_MASTER_DW_FIELDS)
+
+
+def _super_dw_state_rows(request):
+    """Super: its own row. Powerhouse: one row per super."""
+    user = request.user
+    supers = get_supers_queryset(user) if _is_powerhouse(user) else User.objects.filter(pk=user.pk)
+    return _report_rows(request, supers, "user", SUPER_DW_STATE_FIELDS)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def total_dw_list(request):
-    """Per-user deposit/withdrawal totals (super: players only; powerhouse: all players). date_from, date_to."""
+    """Per-user deposit/withdrawal totals (super: players only; powerhouse: all players). date_from, date_to, ordering, page, page_size."""
     err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
     if err:
         return err
-    date_from = request.query_params.get("date_from", "").strip()
-    date_to = request.query_params.get("date_to", "").strip()
-    players = get_players_queryset(request.user)
-    results = []
-    for user in players:
-        dep_qs = _date_filter(
-            Deposit.objects.filter(user=user, status="approved"),
-            date_from, date_to
-        )
-        wd_qs = _date_filter(
-            Withdraw.objects.filter(user=user, status="approved"),
-            date_from, date_to
-        )
-        total_dep = dep_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        total_wd = wd_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        total = total_dep - total_wd
-        results.append({
-            "username": user.username,
-            "user_id": user.id,
-            "deposit": str(total_dep),
-            "withdrawal": str(total_wd),
-            "total": str(total),
-        })
-    return Response(results)
+    return _report_response(request, _total_dw_rows(request))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def super_master_dw_list(request):
-    """One row per master: no_of_withdrawal, withdrawal, no_of_deposit, deposit, total. date_from, date_to."""
+    """One row per master: no_of_withdrawal, withdrawal, no_of_deposit, deposit, total. date_from, date_to, ordering, page, page_size."""
     err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
     if err:
         return err
-    date_from = request.query_params.get("date_from", "").strip()
-    date_to = request.query_params.get("date_to", "").strip()
-    masters = get_masters_queryset(request.user)
-    results = []
-    for master in masters:
-        dep_qs = _date_filter(
-            Deposit.objects.filter(user__parent=master, status="approved"),
-            date_from, date_to
-        )
-        wd_qs = _date_filter(
-            Withdraw.objects.filter(user__parent=master, status="approved"),
-            date_from, date_to
-        )
-        no_dep = dep_qs.count()
-        no_wd = wd_qs.count()
-        total_dep = dep_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        total_wd = wd_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-        total = total_dep - total_wd
-        results.append({
-            "username": master.username,
-            "user_id": master.id,
-            "no_of_deposit": no_dep,
-            "deposit": str(total_dep),
-            "no_of_withdrawal": no_wd,
-            "withdrawal": str(total_wd),
-            "total": str(total),
-        })
-    return Response(results)
-
-
-def _super_dw_state_row(super_user, date_from, date_to):
-    """Build one Super D/W State row for a given super user."""
-    dep_qs = _date_filter(
-        Deposit.objects.filter(user=super_user, status="approved"),
-        date_from, date_to
-    )
-    wd_qs = _date_filter(
-        Withdraw.objects.filter(user=super_user, status="approved"),
-        date_from, date_to
-    )
-    no_dep = dep_qs.count()
-    no_wd = wd_qs.count()
-    total_dep = dep_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-    total_wd = wd_qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
-    net_d_w = total_dep - total_wd
-    total_d_w = total_dep + total_wd
-    return {
-        "username": super_user.username,
-        "user_id": super_user.id,
-        "no_of_deposit": no_dep,
-        "total_deposit": str(total_dep),
-        "no_of_withdrawal": no_wd,
-        "total_withdrawal": str(total_wd),
-        "net_d_w": str(net_d_w),
-        "total_d_w": str(total_d_w),
-    }
+    return _report_response(request, _super_master_dw_rows(request))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def super_dw_state_list(request):
-    """Super: one row (logged-in super's own D/W). Powerhouse: one row per super (all supers' D/W state). date_from, date_to."""
+    """Super: one row (logged-in super's own D/W). Powerhouse: one row per super (all supers' D/W state). date_from, date_to, ordering, page, page_size."""
     err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
     if err:
         return err
-    date_from = request.query_params.get("date_from", "").strip()
-    date_to = request.query_params.get("date_to", "").strip()
-    user = request.user
-    role_value = getattr(UserRole.POWERHOUSE, "value", "powerhouse")
-    if getattr(user, "role", None) == UserRole.POWERHOUSE or getattr(user, "role", None) == role_value:
-        supers = get_supers_queryset(user)
-        results = [_super_dw_state_row(super_user, date_from, date_to) for super_user in supers]
-    else:
-        results = [_super_dw_state_row(user, date_from, date_to)]
-    return Response(results)
+    return _report_response(request, _super_dw_state_rows(request))
+
+
+# --- Exports (same filters and ordering as the lists, streamed as CSV / XLSX per export_format) ---
+
+TOTAL_DW_COLUMNS = [
+    ("Username", "username"),
+    ("Deposit", "deposit"),
+    ("Withdrawal", "withdrawal"),
+    ("Total", "total"),
+]
+SUPER_MASTER_DW_COLUMNS = [
+    ("Username", "username"),
+    ("No. of Deposit", "no_of_deposit"),
+    ("Deposit", "deposit"),
+    ("No. of Withdrawal", "no_of_withdrawal"),
+    ("Withdrawal", "withdrawal"),
+    ("Total", "total"),
+]
+SUPER_DW_STATE_COLUMNS = [
+    ("Username", "username"),
+    ("No. of Deposit", "no_of_deposit"),
+    ("Total Deposit", "total_deposit"),
+    ("No. of Withdrawal", "no_of_withdrawal"),
+    ("Total Withdrawal", "total_withdrawal"),
+    ("Net D/W", "net_d_w"),
+    ("Total D/W", "total_d_w"),
+]
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def total_dw_export(request):
+    err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
+    if err:
+        return err
+    return export_response(request, "total-dw", TOTAL_DW_COLUMNS, _total_dw_rows(request))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def super_master_dw_export(request):
+    err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
+    if err:
+        return err
+    return export_response(request, "super-master-dw", SUPER_MASTER_DW_COLUMNS, _super_master_dw_rows(request))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def super_dw_state_export(request):
+    err = require_role(request, [UserRole.SUPER, UserRole.POWERHOUSE])
+    if err:
+        return err
+    return export_response(request, "super-dw-state", SUPER_DW_STATE_COLUMNS, _super_dw_state_rows(request))
@@ -1,4 +1,4 @@
-"""Account and Bonus statement listing for super (date range, pagination)."""
+"""Account and Bonus statement listing for super (date range, page/page_size or cursor pagination)."""
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -6,6 +6,8 @@ from django.db.models import Q
 from core.permissions import require_role
 from core.models import Transaction, UserRole
 from core.models import TransactionActionType, TransactionType
+from core.utils.cursor_pagination import cursor_response, wants_page
+from core.utils.date_ranges import day_start, day_end
 
 
 def _parse_dates(request):
@@ -17,11 +19,7 @@ def _parse_dates(request):
 def _base_qs(request):
     if request.user.role in (UserRole.POWERHOUSE, getattr(UserRole.POWERHOUSE, "value", "powerhouse")):
         return Transaction.objects.all().select_related("user", "processed_by").order_by("-created_at")
-    return Transaction.objects.filter(
-        Q(user__parent=request.user)
-        | Q(user__parent__parent=request.user)
-        | Q(user=request.user)
-    ).select_related("user", "processed_by").order_by("-created_at")
+    return Transaction.objects.filter(super=request.user).select_related("user", "processed_by").order_by("-created_at")
 
 
 def _to_statement_row(tx):
@@ -53,9 +51,9 @@ def account_statement_list(request):
     date_from, date_to = _parse_dates(request)
     qs = _base_qs(request)
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+        qs = qs.filter(created_at__lt=day_end(date_to))
     search = request.query_params.get("search", "").strip()
     if search:
         qs = qs.filter(
@@ -63,6 +61,8 @@ def account_statement_list(request):
             | Q(remarks__icontains=search)
             | Q(reference_id__icontains=search)
         )
+    if wants_page(request):
+        return cursor_response(request, qs, lambda rows: [_to_statement_row(tx) for tx in rows])
     page = max(1, int(request.query_params.get("page", 1)))
     page_size = min(100, max(1, int(request.query_params.get("page_size", 20))))
     count = qs.count()
@@ -81,9 +81,9 @@ def bonus_statement_list(request):
     date_from, date_to = _parse_dates(request)
     qs = _base_qs(request).filter(transaction_type=TransactionType.BONUS)
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+        qs = qs.filter(created_at__lt=day_end(date_to))
     search = request.query_params.get("search", "").strip()
     if search:
         qs = qs.filter(
@@ -91,6 +91,8 @@ def bonus_statement_list(request):
             | Q(remarks__icontains=search)
             | Q(reference_id__icontains=search)
         )
+    if wants_page(request):
+        return cursor_response(request, qs, lambda rows: [_to_statement_row(tx) for tx in rows])
     page = max(1, int(request.query_params.get("page", 1)))
     page_size = min(100, max(1, int(request.query_params.get("page_size", 20))))
     count = qs.count()
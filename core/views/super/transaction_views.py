@@ -1,10 +1,10 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 from django.db.models import Q
 from core.permissions import require_role
 from core.models import Transaction, UserRole
 from core.serializers import TransactionSerializer
+from core.utils.cursor_pagination import cursor_response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -13,6 +13,6 @@ def transaction_list(request):
     if err:
         return err
     qs = Transaction.objects.filter(
-        Q(user__parent=request.user) | Q(user__parent__parent=request.user) | Q(user=request.user)
-    ).select_related('user').order_by('-created_at')[:500]
-    return Response(TransactionSerializer(qs, many=True).data)
+        Q(super=request.user)
+    ).select_related('user').order_by('-created_at')
+    return cursor_response(request, qs, lambda rows: TransactionSerializer(rows, many=True).data, legacy_limit=500)
@@ -11,6 +11,9 @@ from core.serializers import (
     DepositSerializer, WithdrawSerializer, GameLogSerializer,
     TransactionSerializer, ActivityLogSerializer,
 )
+from core.services.pl_service import annotate_pending_pl
+from core.utils.date_ranges import day_start, day_end
+from core.utils.cursor_pagination import cursor_response
 
 
 def _verify_super_pin(request):
@@ -29,8 +32,8 @@ def master_list(request):
     err = require_role(request, [UserRole.SUPER])
     if err:
         return err
-    qs = get_masters_queryset(request.user).order_by('-created_at')
-    return Response(UserListSerializer(qs, many=True).data)
+    qs = annotate_pending_pl(get_masters_queryset(request.user)).select_related('downline_stat').order_by('-created_at')
+    return cursor_response(request, qs, lambda rows: UserListSerializer(rows, many=True).data)
 
 
 @api_view(['GET'])
@@ -186,16 +189,16 @@ def player_list(request):
         qs = qs.filter(Q(username__icontains=search) | Q(name__icontains=search) | Q(phone__icontains=search))
     date_from = request.query_params.get('date_from', '').strip()
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     date_to = request.query_params.get('date_to', '').strip()
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
+        qs = qs.filter(created_at__lt=day_end(date_to))
     is_active = request.query_params.get('is_active', '')
     if is_active.lower() == 'true':
         qs = qs.filter(is_active=True)
     elif is_active.lower() == 'false':
         qs = qs.filter(is_active=False)
-    return Response(UserListSerializer(qs, many=True).data)
+    return cursor_response(request, qs, lambda rows: UserListSerializer(rows, many=True).data)
 
 
 @api_view(['GET'])
@@ -349,9 +352,9 @@ def player_report(request, pk):
     total_balance = (player.main_balance or 0) + (player.bonus_balance or 0) + (player.exposure_balance or 0)
     gl_qs = GameLog.objects.filter(user=player)
     if date_from:
-        gl_qs = gl_qs.filter(created_at__date__gte=date_from)
+        gl_qs = gl_qs.filter(created_at__gte=day_start(date_from))
     if date_to:
-        gl_qs = gl_qs.filter(created_at__date__lte=date_to)
+        gl_qs = gl_qs.filter(created_at__lt=day_end(date_to))
     agg = gl_qs.aggregate(w=Sum('win_amount'), l=Sum('lose_amount'))
     total_win_loss = (agg['w'] or 0) - (agg['l'] or 0)
 
@@ -360,15 +363,15 @@ def player_report(request, pk):
     tx_qs = Transaction.objects.filter(user=player).select_related('user').order_by('-created_at')
     act_qs = ActivityLog.objects.filter(user=player).select_related('user', 'game').order_by('-created_at')
     if date_from:
-        dep_qs = dep_qs.filter(created_at__date__gte=date_from)
-        wd_qs = wd_qs.filter(created_at__date__gte=date_from)
-        tx_qs = tx_qs.filter(created_at__date__gte=date_from)
-        act_qs = act_qs.filter(created_at__date__gte=date_from)
+        dep_qs = dep_qs.filter(created_at__gte=day_start(date_from))
+        wd_qs = wd_qs.filter(created_at__gte=day_start(date_from))
+        tx_qs = tx_qs.filter(created_at__gte=day_start(date_from))
+        act_qs = act_qs.filter(created_at__gte=day_start(date_from))
     if date_to:
-        dep_qs = dep_qs.filter(created_at__date__lte=date_to)
-        wd_qs = wd_qs.filter(created_at__date__lte=date_to)
-        tx_qs = tx_qs.filter(created_at__date__lte=date_to)
-        act_qs = act_qs.filter(created_at__date__lte=date_to)
+        dep_qs = dep_qs.filter(created_at__lt=day_end(date_to))
+        wd_qs = wd_qs.filter(created_at__lt=day_end(date_to))
+        tx_qs = tx_qs.filter(created_at__lt=day_end(date_to))
+        act_qs = act_qs.filter(created_at__lt=day_end(date_to))
 
     context = {'request': request}
     return Response({
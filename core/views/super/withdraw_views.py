@@ -10,6 +10,9 @@ from core.models import Withdraw, UserRole
 from core.serializers import WithdrawSerializer
 from core.services.withdraw_service import approve_withdraw
 from core.services.reference_id_validation import validate_reference_id_unique, validation_error_response, normalize_reference_id
+from core.services.bulk_approval_service import approve_many, parse_ids, reject_many, summary
+from core.utils.date_ranges import day_start, day_end
+from core.utils.cursor_pagination import cursor_response
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 
@@ -66,7 +69,7 @@ def withdraw_list(request):
     if err:
         return err
     qs = Withdraw.objects.filter(
-        Q(user__parent__parent=request.user) | Q(user__parent=request.user)
+        Q(user__super=request.user) & ~Q(user=request.user)
     ).select_related('user', 'payment_mode').order_by('-created_at')
     search = request.query_params.get('search', '').strip()
     if search:
@@ -76,11 +79,11 @@ def withdraw_list(request):
         qs = qs.filter(status=status_filter)
     date_from = request.query_params.get('date_from', '').strip()
     if date_from:
-        qs = qs.filter(created_at__date__gte=date_from)
+        qs = qs.filter(created_at__gte=day_start(date_from))
     date_to = request.query_params.get('date_to', '').strip()
     if date_to:
-        qs = qs.filter(created_at__date__lte=date_to)
-    return Response(WithdrawSerializer(qs, many=True, context={'request': request}).data)
+        qs = qs.filter(created_at__lt=day_end(date_to))
+    return cursor_response(request, qs, lambda rows: WithdrawSerializer(rows, many=True, context={'request': request}).data)
 
 
 @api_view(['GET', 'PATCH'])
@@ -90,7 +93,7 @@ def withdraw_detail(request, pk):
     if err:
         return err
     obj = Withdraw.objects.filter(
-        Q(user__parent__parent=request.user) | Q(user__parent=request.user), pk=pk
+        Q(user__super=request.user) & ~Q(user=request.user), pk=pk
     ).first()
     if not obj:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
@@ -134,7 +137,7 @@ def withdraw_approve(request, pk):
     if not pin or request.user.pin != pin:
         return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
     wd = Withdraw.objects.filter(
-        Q(user__parent__parent=request.user) | Q(user__parent=request.user),
+        Q(user__super=request.user) & ~Q(user=request.user),
         pk=pk, status='pending'
     ).first()
     if not wd:
@@ -152,7 +155,7 @@ def withdraw_reject(request, pk):
     if err:
         return err
     wd = Withdraw.objects.filter(
-        Q(user__parent__parent=request.user) | Q(user__parent=request.user),
+        Q(user__super=request.user) & ~Q(user=request.user),
         pk=pk, status='pending'
     ).first()
     if not wd:
@@ -163,3 +166,30 @@ def withdraw_reject(request, pk):
     wd.processed_at = timezone.now()
     wd.save()
     return Response(WithdrawSerializer(wd, context={'request': request}).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def withdraw_bulk_approve(request):
+    """Approve pending withdrawals in one transaction. Body: ids (max 500), pin. Per-id results."""
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    pin = request.data.get('pin')
+    if not pin or request.user.pin != pin:
+        return Response({'detail': 'Invalid PIN.'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = parse_ids(request.data)
+    results = approve_many(Withdraw.objects.filter(Q(user__super=request.user) & ~Q(user=request.user)), ids, request.user)
+    return Response(summary(results, 'approved'))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def withdraw_bulk_reject(request):
+    """Reject pending withdrawals. Body: ids, reject_reason. Per-id results."""
+    err = require_role(request, [UserRole.SUPER])
+    if err:
+        return err
+    ids = parse_ids(request.data)
+    results = reject_many(Withdraw.objects.filter(Q(user__super=request.user) & ~Q(user=request.user)), ids, request.user, request.data.get('reject_reason', ''))
+    return Response(summary(results, 'rejected'))
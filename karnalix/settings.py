@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import pymysql
 pymysql.install_as_MySQLdb()
 # Django 6 requires "mysqlclient 2.2.1+"; PyMySQL reports 1.x. Patch so Django accepts PyMySQL.
@@ -92,14 +94,13 @@ else:
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    # DRF throttling uses django cache. Configure at least a basic cache backend
-    # (Redis recommended in production).
+    # Counted by core.throttles in THROTTLE_STORE (below).
     'DEFAULT_THROTTLE_RATES': {
         # Public auth endpoints (per IP, per minute)
         'login': '10/min',
@@ -120,8 +121,24 @@ REST_FRAMEWORK = {
     },
 }
 
+# Sliding-window throttle counters (core.utils.sliding_window). Set THROTTLE_REDIS_URL to share them
+# across hosts; otherwise one SQLite file shared by the workers of this host.
+_throttle_redis_url = os.environ.get('THROTTLE_REDIS_URL', '').strip()
+if _throttle_redis_url:
+    THROTTLE_STORE = {
+        'BACKEND': 'core.utils.sliding_window.RedisStore',
+        'LOCATION': _throttle_redis_url,
+    }
+else:
+    THROTTLE_STORE = {
+        'BACKEND': 'core.utils.sliding_window.SQLiteStore',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'karnalix-throttle.sqlite3'),
+    }
+if sys.argv[1:2] == ['test']:
+    # Test runs keep throttle counters and token revisions out of the shared file.
+    THROTTLE_STORE = {'BACKEND': 'core.utils.sliding_window.MemoryStore'}
+
 #
-# Cache backend required for DRF throttling to work.
 # NOTE: For multiple gunicorn/daphne workers, switch this to Redis.
 #
 CACHES = {
@@ -232,6 +249,37 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Game provider launch (fallback when GameProvider.api_secret / SuperSetting not set)
 GAME_PROVIDER_API_SECRET = ''
 
+# Process-local game/provider/SuperSetting snapshot cache for callback and launch (core.catalog_cache).
+# Invalidated by signals in-process; TTL (seconds) bounds staleness across workers.
+GAME_CATALOG_CACHE_SIZE = 4096
+GAME_CATALOG_CACHE_TTL = 300
+
+# Process-local per-day analytics cache (core.analytics_cache). Entries for today (and later) expire
+# after ANALYTICS_CACHE_TODAY_TTL seconds, closed days after ANALYTICS_CACHE_PAST_TTL; rollup writes
+# in this process invalidate the affected day immediately.
+ANALYTICS_CACHE_SIZE = 50000
+ANALYTICS_CACHE_TODAY_TTL = 60
+ANALYTICS_CACHE_PAST_TTL = 86400
+
+# Process-local cache of platform-wide balance totals for /me and the powerhouse dashboard
+# (core.services.balance_summary_service); values may lag writes by up to this many seconds.
+BALANCE_SUMMARY_TTL = 5
+
+# Process-local token -> user cache for REST and WebSocket authentication (core.token_cache).
+# Revocations go through a per-user revision counter in TOKEN_REVISION_STORE (default: THROTTLE_STORE,
+# shared by the workers); the TTL (seconds) bounds staleness when that store is process-local.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+
+# WebSocket events are written to the OutboxEvent table with the change they announce and sent after
+# commit by a per-process background thread (core.services.outbox_service), or inline in the commit
+# callback when this is False or the database is SQLite (one writer at a time); run
+# `manage.py outbox_worker` to send rows a process left behind and to retry failed sends.
+OUTBOX_DISPATCH_IN_BACKGROUND = True
+
+# Topics one multiplexed WebSocket (ws/stream/, core.consumers.StreamConsumer) may subscribe to.
+WS_MAX_SUBSCRIPTIONS = 4
+
 # Optional: path to built frontend index.html for serve_app_index (so WhatsApp/Facebook get site logo in link previews).
 # Example: os.path.join(BASE_DIR, '../frontend/dist/index.html')
 FRONTEND_INDEX_HTML_PATH = os.environ.get('FRONTEND_INDEX_HTML_PATH', '')